@@ -1,13 +1,31 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
-from routers.email_router import router as email_router
-import uvicorn
-from logger_config import logger
+from routers.email_router import router as email_router, get_email_service
+from services.metrics import CONTENT_TYPE_LATEST, render_latest
+from request_timing import ServerTimingMiddleware
+from logger_config import logger, shutdown_logging
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    app.state.ready = False
+    email_service = get_email_service()
+    await email_service.start()
+    await email_service.warm_up()
+    app.state.ready = True
+    logger.info("Email service ready")
+    yield
+    app.state.ready = False
+    await email_service.stop()
+    shutdown_logging()
+
 
 app = FastAPI(
     title="User Registration Email Service",
     description="API service for async email sending in user registration flow",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 logger.info("Starting FastAPI app")
@@ -20,6 +38,8 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(ServerTimingMiddleware, **ServerTimingMiddleware.settings_from_env())
+
 app.include_router(email_router)
 
 
@@ -33,19 +53,12 @@ async def root():
     }
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return Response(content=render_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
 if __name__ == '__main__':
-    import sys
-    from pathlib import Path
-    
-    backend_dir = Path(__file__).parent
-    if str(backend_dir) not in sys.path:
-        sys.path.insert(0, str(backend_dir))
+    import serve
     
-    logger.info("Starting server on 0.0.0.0:5001")
-    uvicorn.run(
-        "app:app",
-        host="0.0.0.0",
-        port=5001,
-        reload=False,
-        log_config=None
-    )
+    serve.main()
@@ -0,0 +1,197 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import httpx
+
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from benchmarks.bench_load import git_commit, ms, percentile
+from benchmarks.stubs import BackendServer
+
+CLOCK_TICKS = os.sysconf('SC_CLK_TCK')
+
+
+def cpu_seconds(pid: int) -> float:
+    with open(f'/proc/{pid}/stat') as f:
+        fields = f.read().rsplit(')', 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / CLOCK_TICKS
+
+
+def send_email(client: httpx.AsyncClient, i: int):
+    return client.post('/api/send-email', json={'userId': f'bench-{i}', 'email': f'bench{i}@example.com'})
+
+
+def health(client: httpx.AsyncClient, i: int):
+    return client.get('/api/health')
+
+
+def get_task(client: httpx.AsyncClient, i: int):
+    return client.get('/api/tasks/task-bench-0-bench0@example.com')
+
+
+ENDPOINTS: Dict[str, Callable] = {
+    'POST /api/send-email': send_email,
+    'GET /api/health': health,
+    'GET /api/tasks/{id}': get_task,
+}
+
+
+async def drive(url: str, call: Callable, requests: int, concurrency: int, pid: int) -> Dict[str, object]:
+    latencies: List[float] = []
+    errors = 0
+    counter = iter(range(requests))
+
+    async def worker(client: httpx.AsyncClient) -> None:
+        nonlocal errors
+        for i in counter:
+            started = time.perf_counter()
+            response = await call(client, i)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code >= 300:
+                errors += 1
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=30) as client:
+        cpu_started = cpu_seconds(pid)
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+        cpu = cpu_seconds(pid) - cpu_started
+    return {
+        'rps': round(requests / elapsed, 1),
+        'server_cpu_s': round(cpu, 2),
+        'rps_per_core': round(requests / cpu, 1) if cpu else None,
+        'p50_ms': ms(percentile(latencies, 0.50)),
+        'p99_ms': ms(percentile(latencies, 0.99)),
+        'errors': errors,
+    }
+
+
+ASGI_REQUESTS = {
+    'POST /api/send-email': ('POST', '/api/send-email', b'{"userId":"bench-%d","email":"bench%d@example.com"}'),
+    'GET /api/health': ('GET', '/api/health', b''),
+    'GET /api/tasks/{id}': ('GET', '/api/tasks/task-bench-0-bench0@example.com', b''),
+}
+
+
+async def asgi_call(app, method: str, path: str, body: bytes) -> int:
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': method, 'scheme': 'http',
+        'path': path, 'raw_path': path.encode(), 'query_string': b'', 'root_path': '',
+        'headers': [(b'host', b'bench'), (b'content-type', b'application/json'),
+                    (b'content-length', str(len(body)).encode())],
+        'client': ('127.0.0.1', 50000), 'server': ('127.0.0.1', 5001),
+    }
+    status = 0
+
+    async def receive():
+        return {'type': 'http.request', 'body': body, 'more_body': False}
+
+    async def send(message):
+        nonlocal status
+        if message['type'] == 'http.response.start':
+            status = message['status']
+
+    await app(scope, receive, send)
+    return status
+
+
+async def drive_asgi(app, name: str, requests: int, offset: int) -> Dict[str, object]:
+    method, path, body = ASGI_REQUESTS[name]
+    errors = 0
+    cpu_started = time.process_time()
+    started = time.perf_counter()
+    for i in range(offset, offset + requests):
+        status = await asgi_call(app, method, path, body % (i, i) if body else body)
+        errors += status >= 300
+    elapsed = time.perf_counter() - started
+    cpu = time.process_time() - cpu_started
+    return {
+        'rps': round(requests / elapsed, 1),
+        'server_cpu_s': round(cpu, 2),
+        'rps_per_core': round(requests / cpu, 1) if cpu else None,
+        'us_per_request': round(cpu / requests * 1e6, 1),
+        'errors': errors,
+    }
+
+
+async def run_asgi(args: argparse.Namespace) -> List[Dict[str, object]]:
+    from app import app
+
+    results = []
+    async with app.router.lifespan_context(app):
+        for name in ASGI_REQUESTS:
+            await drive_asgi(app, name, args.warmup, 0)
+            results.append({'endpoint': name, **await drive_asgi(app, name, args.requests, args.warmup)})
+    return results
+
+
+def bench_env(args: argparse.Namespace, log_dir: str) -> Dict[str, str]:
+    return {
+        'USE_GCP': 'false',
+        'SENDGRID_API_KEY': '',
+        'FIRESTORE_STATUS_UPDATES': 'false',
+        'EMAIL_MIN_DELAY_SECONDS': '0',
+        'EMAIL_DEDUPE_TTL_SECONDS': '0',
+        'EMAIL_QUEUE_MAXSIZE': str(args.requests * len(ENDPOINTS) * 2),
+        'EMAIL_ADMISSION_HIGH_WATERMARK': str(args.requests * len(ENDPOINTS) * 2),
+        'EMAIL_ADMISSION_MAX_WAIT_SECONDS': '1000000',
+        'LOG_LEVEL': 'WARNING',
+        'LOG_DIR': log_dir,
+    }
+
+
+def run(args: argparse.Namespace) -> List[Dict[str, object]]:
+    results = []
+    with tempfile.TemporaryDirectory() as log_dir:
+        if args.transport == 'asgi':
+            os.environ.update(bench_env(args, log_dir))
+            return asyncio.run(run_asgi(args))
+        with BackendServer({**os.environ, **bench_env(args, log_dir)}) as server:
+            for name, call in ENDPOINTS.items():
+                asyncio.run(drive(server.url, call, args.warmup, args.concurrency, server.pid))
+                results.append({'endpoint': name,
+                                **asyncio.run(drive(server.url, call, args.requests, args.concurrency, server.pid))})
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Requests per second per server CPU core for small API endpoints')
+    parser.add_argument('--transport', choices=['asgi', 'http'], default='asgi',
+                        help='asgi calls the app in-process and times only its CPU; http goes through uvicorn')
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--warmup', type=int, default=500)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--json', type=Path, help='write results to this file')
+    parser.add_argument('--compare', type=Path, help='earlier results file to compare against')
+    args = parser.parse_args()
+
+    results = run(args)
+    baseline: Dict[str, Dict[str, object]] = {}
+    if args.compare:
+        baseline = {result['endpoint']: result for result in json.loads(args.compare.read_text())['results']}
+    print(f"commit {git_commit()}   transport {args.transport}   requests {args.requests}")
+    print(f"{'endpoint':<22} {'rps':>8} {'rps/core':>9} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for result in results:
+        line = (f"{result['endpoint']:<22} {result['rps']:>8} {result['rps_per_core']:>9} "
+                f"{str(result.get('p50_ms', '-')):>8} {str(result.get('p99_ms', '-')):>8} {result['errors']:>7}")
+        previous: Optional[Dict[str, object]] = baseline.get(result['endpoint'])
+        if previous and previous['rps_per_core']:
+            change = (result['rps_per_core'] - previous['rps_per_core']) / previous['rps_per_core'] * 100
+            line += f"   (baseline {previous['rps_per_core']} rps/core, {change:+.1f}%)"
+        print(line)
+    if args.json:
+        args.json.write_text(json.dumps({'commit': git_commit(), 'transport': args.transport, 'results': results},
+                                        indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List
+
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from benchmarks.fake_grpc import fake_firestore_server
+from benchmarks.stubs import SendGridStub, StubServer
+
+FUNCTION_SOURCE = backend_dir / 'cloud_functions' / 'send_email' / 'main_http.py'
+
+
+def percentile(values: List[float], pct: float) -> float:
+    values = sorted(values)
+    return values[max(int(len(values) * pct) - 1, 0)]
+
+
+def summarize(name: str, latencies: List[float]) -> Dict[str, float]:
+    return {
+        'scenario': name,
+        'invocations': len(latencies),
+        'first_ms': round(latencies[0] * 1000, 2),
+        'mean_ms': round(statistics.mean(latencies) * 1000, 2),
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+    }
+
+
+def invoke(client, i: int) -> float:
+    started = time.perf_counter()
+    response = client.post('/', json={'userId': f'user-{i}', 'email': f'user{i}@example.com'})
+    elapsed = time.perf_counter() - started
+    if response.status_code != 200:
+        raise RuntimeError(f'Invocation failed: {response.status_code} {response.get_data(as_text=True)}')
+    return elapsed
+
+
+def invoke_batch(client, start: int, size: int) -> float:
+    started = time.perf_counter()
+    response = client.post('/', json=[
+        {'userId': f'user-{i}', 'email': f'user{i}@example.com'} for i in range(start, start + size)
+    ])
+    elapsed = time.perf_counter() - started
+    if response.status_code != 200:
+        raise RuntimeError(f'Invocation failed: {response.status_code} {response.get_data(as_text=True)}')
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Per-invocation latency of the send_email Cloud Function')
+    parser.add_argument('--invocations', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=8, help='threads for the concurrent warm scenario')
+    parser.add_argument('--sendgrid-latency', type=float, default=0.0)
+    parser.add_argument('--batch-size', type=int, default=50, help='emails per invocation for the batched scenario')
+    parser.add_argument('--json', type=Path, help='write results to this file')
+    args = parser.parse_args()
+
+    with StubServer(SendGridStub(latency=args.sendgrid_latency)) as sendgrid, fake_firestore_server() as firestore_server:
+        os.environ.update({
+            'SENDGRID_API_KEY': 'SG.benchmark',
+            'SENDGRID_API_HOST': sendgrid.url,
+            'FIRESTORE_EMULATOR_HOST': firestore_server.address,
+            'GOOGLE_CLOUD_PROJECT': 'demo-project',
+        })
+        import functions_framework
+        app = functions_framework.create_app(target='send_email', source=str(FUNCTION_SOURCE))
+        client = app.test_client()
+        import clients
+
+        per_invocation = []
+        for i in range(args.invocations):
+            clients.reset_clients()
+            per_invocation.append(invoke(client, i))
+
+        clients.reset_clients()
+        shared = [invoke(client, i) for i in range(args.invocations)]
+
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            concurrent = list(pool.map(lambda i: invoke(app.test_client(), i), range(args.invocations)))
+
+        batched = [invoke_batch(client, i, args.batch_size) for i in range(0, args.invocations, args.batch_size)]
+
+    results = [
+        summarize('new clients every invocation', per_invocation),
+        summarize('shared clients (first call cold)', shared),
+        summarize(f'shared clients, {args.concurrency} threads', concurrent),
+        summarize(f'{args.batch_size} emails per invocation', batched),
+    ]
+    results[-1]['emails'] = args.invocations
+    results[-1]['per_email_ms'] = round(sum(batched) / args.invocations * 1000, 2)
+    for result in results:
+        print(f"{result['scenario']:<36} first {result['first_ms']:>8} ms  mean {result['mean_ms']:>7} ms  "
+              f"p50 {result['p50_ms']:>7} ms  p99 {result['p99_ms']:>7} ms")
+    print(f"{'':<36} {results[-1]['per_email_ms']} ms per email over {results[-1]['invocations']} invocations, "
+          f"vs {round(sum(shared) / len(shared) * 1000, 2)} ms with one email per invocation")
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
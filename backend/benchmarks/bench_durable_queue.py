@@ -0,0 +1,102 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+os.environ.setdefault('LOG_LEVEL', 'WARNING')
+
+from services.durable_queue import SQLiteJobQueue
+
+SCENARIOS = {
+    'memory': None,
+    'sqlite FULL, commit per job': dict(synchronous='FULL', max_batch_size=1),
+    'sqlite FULL, group commit': dict(synchronous='FULL'),
+    'sqlite FULL, group commit +1ms': dict(synchronous='FULL', commit_interval=0.001),
+    'sqlite NORMAL, group commit': dict(synchronous='NORMAL'),
+}
+
+
+def percentile(values: List[float], pct: float) -> float:
+    values = sorted(values)
+    return values[max(int(len(values) * pct) - 1, 0)]
+
+
+async def enqueue(queue, jobs: int, producers: int) -> List[float]:
+    latencies: List[float] = []
+
+    async def produce(worker: int) -> None:
+        for i in range(worker, jobs, producers):
+            started = time.perf_counter()
+            committed = queue.put_nowait((f'user-{i}', f'user{i}@example.com'))
+            if committed is not None:
+                await committed
+            latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(produce(worker) for worker in range(producers)))
+    return latencies
+
+
+async def measure(name: str, settings: Optional[Dict[str, object]], jobs: int, producers: int,
+                  directory: Path) -> Dict[str, object]:
+    if settings is None:
+        queue = asyncio.Queue()
+    else:
+        queue = SQLiteJobQueue(directory / f'{len(list(directory.iterdir()))}.db', **settings)
+    started = time.perf_counter()
+    latencies = await enqueue(queue, jobs, producers)
+    elapsed = time.perf_counter() - started
+    commits = None
+    if settings is not None:
+        commits = queue.commits
+        await queue.close()
+    return {
+        'scenario': name,
+        'producers': producers,
+        'jobs': jobs,
+        'jobs_per_sec': round(jobs / elapsed),
+        'commits': commits,
+        'jobs_per_commit': round(jobs / commits, 1) if commits else None,
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 3),
+    }
+
+
+async def run(args: argparse.Namespace) -> List[Dict[str, object]]:
+    results = []
+    with tempfile.TemporaryDirectory(dir=args.dir) as directory:
+        for producers in args.producers:
+            for name, settings in SCENARIOS.items():
+                results.append(await measure(name, settings, args.jobs, producers, Path(directory)))
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Enqueue throughput of the in-memory and SQLite job queues')
+    parser.add_argument('--jobs', type=int, default=5000)
+    parser.add_argument('--producers', type=int, nargs='+', default=[1, 16, 128],
+                        help='concurrent enqueuers, like concurrent POST /api/send-email requests')
+    parser.add_argument('--dir', help='directory for the database files; use the disk the queue will live on')
+    parser.add_argument('--json', type=Path, help='write results to this file')
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    print(f"{'scenario':<32} {'producers':>9} {'jobs/s':>9} {'commits':>8} {'jobs/commit':>11} "
+          f"{'p50 ms':>8} {'p99 ms':>8}")
+    for result in results:
+        print(f"{result['scenario']:<32} {result['producers']:>9} {result['jobs_per_sec']:>9} "
+              f"{str(result['commits'] or '-'):>8} {str(result['jobs_per_commit'] or '-'):>11} "
+              f"{result['p50_ms']:>8.3f} {result['p99_ms']:>8.3f}")
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,257 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import httpx
+
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from benchmarks.stubs import BackendServer, SendGridStub, StubServer
+
+RESULTS_DIR = backend_dir / 'benchmarks' / 'results'
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    values = sorted(values)
+    return values[max(int(len(values) * pct) - 1, 0)]
+
+
+def ms(seconds: Optional[float]) -> Optional[float]:
+    return round(seconds * 1000, 2) if seconds is not None else None
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=backend_dir, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def fake_cloud_tasks_server(latency: float):
+    from benchmarks.fake_grpc import FakeGrpcServer
+    import grpc
+    from google.cloud.tasks_v2.types import cloudtasks, task as task_types
+
+    def create_task(request, context):
+        if latency:
+            time.sleep(latency)
+        return task_types.Task(name=request.task.name or f'{request.parent}/tasks/{random.getrandbits(64):x}')
+
+    return FakeGrpcServer('google.cloud.tasks.v2.CloudTasks', {
+        'CreateTask': grpc.unary_unary_rpc_method_handler(
+            create_task,
+            request_deserializer=cloudtasks.CreateTaskRequest.deserialize,
+            response_serializer=task_types.Task.serialize,
+        ),
+    })
+
+
+async def drive(url: str, requests: int, concurrency: int, rate: float, poisson: bool) -> Dict[str, object]:
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+    accepted: Dict[str, float] = {}
+    slots = asyncio.Semaphore(concurrency)
+
+    async def send(client: httpx.AsyncClient, i: int, scheduled: float) -> None:
+        wall_started = time.time() - (time.perf_counter() - scheduled)
+        try:
+            response = await client.post('/api/send-email', json={'userId': f'load-{i}', 'email': f'load{i}@example.com'})
+            statuses[response.status_code] += 1
+            if response.status_code == 202:
+                accepted[response.json()['taskId']] = wall_started
+        except httpx.HTTPError as e:
+            statuses[type(e).__name__] += 1
+        latencies.append(time.perf_counter() - scheduled)
+
+    async def send_in_slot(client: httpx.AsyncClient, i: int, scheduled: float) -> None:
+        if rate > 0:
+            async with slots:
+                await send(client, i, scheduled)
+            return
+        try:
+            await send(client, i, scheduled)
+        finally:
+            slots.release()
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=30) as client:
+        await client.get('/api/ready')
+        pending = []
+        started = time.perf_counter()
+        next_arrival = started
+        for i in range(requests):
+            if rate > 0:
+                delay = next_arrival - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                scheduled = next_arrival
+                next_arrival += random.expovariate(rate) if poisson else 1 / rate
+            else:
+                await slots.acquire()
+                scheduled = time.perf_counter()
+            pending.append(asyncio.create_task(send_in_slot(client, i, scheduled)))
+        await asyncio.gather(*pending)
+        elapsed = time.perf_counter() - started
+
+    errors = sum(count for status, count in statuses.items() if status != 202)
+    return {
+        'requests': requests,
+        'duration_s': round(elapsed, 2),
+        'rps': round(requests / elapsed, 1),
+        'error_rate': round(errors / requests, 4),
+        'status_counts': {str(status): count for status, count in sorted(statuses.items(), key=str)},
+        'p50_ms': ms(percentile(latencies, 0.50)),
+        'p95_ms': ms(percentile(latencies, 0.95)),
+        'p99_ms': ms(percentile(latencies, 0.99)),
+        'max_ms': ms(max(latencies)),
+        '_accepted': accepted,
+    }
+
+
+async def collect_send_latency(url: str, accepted: Dict[str, float], timeout: float) -> Dict[str, object]:
+    latencies: List[float] = []
+    failed = 0
+    remaining = dict(accepted)
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=url, timeout=30) as client:
+        while remaining and time.monotonic() < deadline:
+            for task_id, wall_started in list(remaining.items()):
+                response = await client.get(f'/api/tasks/{task_id}')
+                if response.status_code != 200:
+                    del remaining[task_id]
+                    continue
+                result = response.json()
+                if result['status'] == 'queued':
+                    continue
+                del remaining[task_id]
+                if result['status'] != 'sent':
+                    failed += 1
+                    continue
+                completed = datetime.fromisoformat(result['completedAt']).astimezone(timezone.utc).timestamp()
+                latencies.append(completed - wall_started)
+            if remaining:
+                await asyncio.sleep(0.2)
+    return {
+        'sent': len(latencies),
+        'send_failed': failed,
+        'unfinished': len(remaining),
+        'e2e_p50_ms': ms(percentile(latencies, 0.50)),
+        'e2e_p95_ms': ms(percentile(latencies, 0.95)),
+        'e2e_p99_ms': ms(percentile(latencies, 0.99)),
+    }
+
+
+def run(args: argparse.Namespace) -> Dict[str, object]:
+    from benchmarks.fake_grpc import fake_firestore_server
+
+    with tempfile.TemporaryDirectory() as log_dir:
+        env = {
+            **os.environ,
+            'SENDGRID_API_KEY': 'load-test-key',
+            'FIRESTORE_STATUS_UPDATES': 'true',
+            'GCP_PROJECT_ID': 'demo-project',
+            'EMAIL_MIN_DELAY_SECONDS': str(args.min_delay),
+            'EMAIL_WORKER_CONCURRENCY': str(args.workers),
+            'EMAIL_QUEUE_MAXSIZE': str(args.queue_size),
+            'EMAIL_SHUTDOWN_TIMEOUT_SECONDS': '1',
+            'EMAIL_DEDUPE_TTL_SECONDS': '0',
+            'EMAIL_SEND_BATCH_SIZE': str(args.send_batch_size),
+            'EMAIL_SEND_BATCH_WINDOW_SECONDS': str(args.send_batch_window),
+            'LOG_LEVEL': args.log_level,
+            'LOG_DIR': log_dir,
+        }
+        with StubServer(SendGridStub(latency=args.sendgrid_latency)) as sendgrid, \
+                fake_firestore_server(latency=args.firestore_latency) as firestore, \
+                fake_cloud_tasks_server(latency=args.tasks_latency) as cloud_tasks:
+            env.update({
+                'USE_GCP': 'true' if args.mode == 'gcp' else 'false',
+                'SENDGRID_API_BASE_URL': sendgrid.url,
+                'FIRESTORE_EMULATOR_HOST': firestore.address,
+                'CLOUD_TASKS_EMULATOR_HOST': cloud_tasks.address,
+            })
+            with open(Path(log_dir) / 'stdout.log', 'w') as stdout:
+                with BackendServer(env, stdout=stdout) as server:
+                    result = asyncio.run(drive(server.url, args.requests, args.concurrency, args.rate, args.poisson))
+                    accepted = result.pop('_accepted')
+                    if args.mode == 'local':
+                        result.update(asyncio.run(collect_send_latency(server.url, accepted, args.drain_timeout)))
+                        stats = httpx.get(f'{server.url}/api/queue/stats', timeout=10).json()
+                        result['send_batches'] = stats.get('sendBatches')
+                        result['avg_send_batch_size'] = stats.get('avgSendBatchSize')
+
+    return {
+        'commit': git_commit(),
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'params': {key: value for key, value in vars(args).items() if key not in ('json', 'compare')},
+        **result,
+    }
+
+
+def print_result(result: Dict[str, object], baseline: Optional[Dict[str, object]] = None) -> None:
+    keys = ['rps', 'error_rate', 'p50_ms', 'p95_ms', 'p99_ms', 'max_ms', 'e2e_p50_ms', 'e2e_p95_ms', 'e2e_p99_ms',
+            'send_batches', 'avg_send_batch_size']
+    print(f"commit {result['commit']}   mode {result['params']['mode']}   requests {result['requests']}   "
+          f"statuses {result['status_counts']}")
+    for key in keys:
+        value = result.get(key)
+        if value is None:
+            continue
+        line = f"  {key:<19} {value:>10}"
+        previous = baseline.get(key) if baseline else None
+        if previous:
+            line += f"   (baseline {previous}, {(value - previous) / previous * 100:+.1f}%)"
+        print(line)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Load test POST /api/send-email against stubbed providers')
+    parser.add_argument('--mode', choices=['local', 'gcp'], default='local')
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=64, help='max requests in flight')
+    parser.add_argument('--rate', type=float, default=0.0,
+                        help='arrival rate in requests per second; 0 runs closed-loop at --concurrency')
+    parser.add_argument('--poisson', action='store_true', help='exponential inter-arrival times instead of fixed')
+    parser.add_argument('--workers', type=int, default=32, help='EMAIL_WORKER_CONCURRENCY')
+    parser.add_argument('--queue-size', type=int, default=10000, help='EMAIL_QUEUE_MAXSIZE')
+    parser.add_argument('--min-delay', type=float, default=0.0, help='EMAIL_MIN_DELAY_SECONDS')
+    parser.add_argument('--send-batch-size', type=int, default=1,
+                        help='EMAIL_SEND_BATCH_SIZE; 1 sends one email per request')
+    parser.add_argument('--send-batch-window', type=float, default=0.05, help='EMAIL_SEND_BATCH_WINDOW_SECONDS')
+    parser.add_argument('--sendgrid-latency', type=float, default=0.05)
+    parser.add_argument('--firestore-latency', type=float, default=0.01)
+    parser.add_argument('--tasks-latency', type=float, default=0.01)
+    parser.add_argument('--drain-timeout', type=float, default=120.0,
+                        help='seconds to wait for queued sends when measuring end-to-end latency')
+    parser.add_argument('--log-level', default='WARNING')
+    parser.add_argument('--json', type=Path, help='results file (default: benchmarks/results/load-<commit>-<time>.json)')
+    parser.add_argument('--compare', type=Path, help='earlier results file to compare against')
+    args = parser.parse_args()
+
+    result = run(args)
+    baseline = json.loads(args.compare.read_text()) if args.compare else None
+    print_result(result, baseline)
+
+    output = args.json
+    if output is None:
+        RESULTS_DIR.mkdir(exist_ok=True)
+        output = RESULTS_DIR / f"load-{result['commit'] or 'unknown'}-{result['timestamp'].replace(':', '')}.json"
+    output.write_text(json.dumps(result, indent=2))
+    print(f"results written to {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import httpx
+
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from benchmarks.stubs import BackendServer
+
+SCENARIOS = {
+    'logging off': {'LOG_LEVEL': 'CRITICAL', 'LOG_ASYNC': 'false'},
+    'logging on (handlers on event loop)': {'LOG_LEVEL': 'INFO', 'LOG_ASYNC': 'false'},
+    'logging on (queue + listener thread)': {'LOG_LEVEL': 'INFO', 'LOG_ASYNC': 'true'},
+}
+
+
+def percentile(values: List[float], pct: float) -> float:
+    values = sorted(values)
+    return values[max(int(len(values) * pct) - 1, 0)]
+
+
+async def drive(url: str, requests: int, concurrency: int) -> Dict[str, float]:
+    latencies: List[float] = []
+    counter = iter(range(requests))
+
+    async def worker(client: httpx.AsyncClient) -> None:
+        for i in counter:
+            started = time.perf_counter()
+            response = await client.post('/api/send-email', json={'userId': f'user-{i}', 'email': f'user{i}@example.com'})
+            latencies.append(time.perf_counter() - started)
+            if response.status_code != 202:
+                raise RuntimeError(f'Request failed: {response.status_code} {response.text}')
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=30) as client:
+        await client.get('/api/ready')
+        started = time.perf_counter()
+        await asyncio.gather(*[worker(client) for _ in range(concurrency)])
+        elapsed = time.perf_counter() - started
+
+    return {
+        'requests': len(latencies),
+        'rps': round(len(latencies) / elapsed, 1),
+        'mean_ms': round(statistics.mean(latencies) * 1000, 2),
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='POST /api/send-email latency with logging off, synchronous and queued')
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--json', type=Path, help='write results to this file')
+    args = parser.parse_args()
+
+    results = []
+    for name, overrides in SCENARIOS.items():
+        with tempfile.TemporaryDirectory() as log_dir:
+            env = {
+                **os.environ,
+                'USE_GCP': 'false',
+                'SENDGRID_API_KEY': '',
+                'FIRESTORE_STATUS_UPDATES': 'false',
+                'EMAIL_MIN_DELAY_SECONDS': '0',
+                'EMAIL_WORKER_CONCURRENCY': '64',
+                'EMAIL_QUEUE_MAXSIZE': str(args.requests * 2),
+                'EMAIL_ADMISSION_MAX_WAIT_SECONDS': '3600',
+                'EMAIL_SHUTDOWN_TIMEOUT_SECONDS': '1',
+                'LOG_DIR': log_dir,
+                **overrides,
+            }
+            with open(Path(log_dir) / 'stdout.log', 'w') as stdout:
+                with BackendServer(env, stdout=stdout) as server:
+                    result = asyncio.run(drive(server.url, args.requests, args.concurrency))
+        results.append({'scenario': name, **result})
+
+    for result in results:
+        print(f"{result['scenario']:<40} {result['rps']:>8.1f} req/s   mean {result['mean_ms']:>7.2f} ms   "
+              f"p50 {result['p50_ms']:>7.2f} ms   p99 {result['p99_ms']:>7.2f} ms")
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
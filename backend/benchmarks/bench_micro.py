@@ -0,0 +1,240 @@
+import argparse
+import asyncio
+import contextlib
+import gc
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+_log_dir = tempfile.TemporaryDirectory()
+os.environ.update({
+    'LOG_DIR': _log_dir.name,
+    'LOG_LEVEL': 'WARNING',
+    'LOG_ASYNC': 'false',
+    'LOG_QUEUE_SIZE': '10000000',
+    'USE_GCP': 'false',
+    'SENDGRID_API_KEY': 'bench-key',
+    'FIRESTORE_STATUS_UPDATES': 'false',
+    'EMAIL_MIN_DELAY_SECONDS': '0',
+    'EMAIL_DEDUPE_TTL_SECONDS': '0',
+    'EMAIL_QUEUE_MAXSIZE': '0',
+})
+
+from logger_config import LogEvent, setup_logger
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from json_api import ModelResponse
+from models import SendEmailRequest, SendEmailResponse
+from cloud_functions.send_email.email_template import render_email
+from services.domain_check import DomainChecker
+from services.email_service import EmailService, send_email_task
+from services.resilience import ResilientSender
+from services.sendgrid_client import SendGridResponse
+
+Op = Callable[[int], Any]
+
+_devnull = open(os.devnull, 'w')
+
+
+class StubTransport:
+    closed = False
+
+    async def send(self, payload: Dict[str, Any]) -> SendGridResponse:
+        return SendGridResponse(status_code=202, message_id='bench')
+
+
+def bench_request_validate() -> Op:
+    return lambda i: SendEmailRequest.model_validate({'userId': f'user-{i}', 'email': f'user{i}@example.com'})
+
+
+def _request_body(i: int) -> bytes:
+    return b'{"userId":"user-%d","email":"user%d@example.com"}' % (i, i)
+
+
+def bench_request_parse_validate() -> Op:
+    return lambda i: SendEmailRequest.model_validate(json.loads(_request_body(i)))
+
+
+def bench_request_validate_json() -> Op:
+    return lambda i: SendEmailRequest.model_validate_json(_request_body(i))
+
+
+def bench_response_json_encoder() -> Op:
+    return lambda i: JSONResponse(jsonable_encoder(
+        SendEmailResponse(success=True, taskId=f'task-{i}', message='Email queued successfully')
+    ))
+
+
+def bench_response_model_response() -> Op:
+    return lambda i: ModelResponse(
+        SendEmailResponse(success=True, taskId=f'task-{i}', message='Email queued successfully')
+    )
+
+
+def bench_response_serialize() -> Op:
+    return lambda i: SendEmailResponse(
+        success=True, taskId=f'task-{i}', message='Email queued successfully'
+    ).model_dump_json()
+
+
+def bench_render_email() -> Op:
+    return lambda i: render_email('welcome', None, user_id=f'user-{i}')
+
+
+def bench_send_email_task() -> Op:
+    transport = StubTransport()
+    resilience = ResilientSender()
+    return lambda i: send_email_task(f'user-{i}', f'user{i}@example.com', transport=transport, resilience=resilience)
+
+
+def bench_queue_local_task() -> Op:
+    service = EmailService()
+    service.worker_pool.start = lambda: None
+    return lambda i: service._queue_local_task(f'user-{i}', f'user{i}@example.com')
+
+
+def bench_domain_check_cached() -> Op:
+    checker = DomainChecker(resolver=None)
+    checker._put('example.com', True, 3600)
+    return lambda i: checker.accepts(f'user{i}@example.com')
+
+
+def _bench_logging(name: str, use_queue: bool) -> Op:
+    with contextlib.redirect_stdout(_devnull):
+        logger = setup_logger(name, 'INFO', use_queue=use_queue)
+    return lambda i: logger.info(LogEvent({'event': 'email', 'stage': 'queued', 'task_id': f'task-{i}',
+                                           'user_id': f'user-{i}', 'mode': 'local', 'duration_ms': 0.12}))
+
+
+def bench_log_sync() -> Op:
+    return _bench_logging('bench_sync', use_queue=False)
+
+
+def bench_log_queued() -> Op:
+    return _bench_logging('bench_queued', use_queue=True)
+
+
+BENCHMARKS: Dict[str, Callable[[], Op]] = {
+    'SendEmailRequest.model_validate': bench_request_validate,
+    'json.loads + model_validate': bench_request_parse_validate,
+    'SendEmailRequest.model_validate_json': bench_request_validate_json,
+    'SendEmailResponse.model_dump_json': bench_response_serialize,
+    'JSONResponse(jsonable_encoder(...))': bench_response_json_encoder,
+    'ModelResponse(SendEmailResponse)': bench_response_model_response,
+    'render_email (welcome)': bench_render_email,
+    'send_email_task (stub transport)': bench_send_email_task,
+    '_queue_local_task (no min delay)': bench_queue_local_task,
+    'DomainChecker.accepts (cached)': bench_domain_check_cached,
+    'log event (sync handlers)': bench_log_sync,
+    'log event (queue handler)': bench_log_queued,
+}
+
+
+def make_runner(op: Op, loop: asyncio.AbstractEventLoop) -> Callable[[int, int], None]:
+    if asyncio.iscoroutine(probe := op(-1)):
+        loop.run_until_complete(probe)
+
+        async def run_async(start: int, count: int) -> None:
+            for i in range(start, start + count):
+                await op(i)
+
+        return lambda start, count: loop.run_until_complete(run_async(start, count))
+
+    def run_sync(start: int, count: int) -> None:
+        for i in range(start, start + count):
+            op(i)
+
+    return run_sync
+
+
+def measure(name: str, factory: Callable[[], Op], number: int, repeat: int) -> Dict[str, object]:
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    run = make_runner(factory(), loop)
+    counter = 0
+
+    def batch(count: int) -> None:
+        nonlocal counter
+        run(counter, count)
+        counter += count
+
+    batch(min(number, 1000))
+    timings: List[float] = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        batch(number)
+        timings.append(time.perf_counter() - started)
+    best = min(timings)
+
+    gc.collect()
+    blocks_before = sys.getallocatedblocks()
+    batch(number)
+    retained_blocks = (sys.getallocatedblocks() - blocks_before) / number
+
+    samples = min(number, 200)
+    tracemalloc.start()
+    peaks = []
+    for _ in range(samples):
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        batch(1)
+        peaks.append(tracemalloc.get_traced_memory()[1] - before)
+    tracemalloc.stop()
+    loop.close()
+
+    return {
+        'benchmark': name,
+        'ops_per_sec': round(number / best),
+        'us_per_op': round(best / number * 1e6, 3),
+        'peak_bytes_per_op': round(sorted(peaks)[len(peaks) // 2]),
+        'retained_blocks_per_op': round(retained_blocks, 2),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Per-email CPU and memory cost of hot functions')
+    parser.add_argument('--number', type=int, default=20000, help='operations per timing run')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--only', help='run benchmarks whose name contains this text')
+    parser.add_argument('--json', type=Path, help='write results to this file')
+    parser.add_argument('--compare', type=Path, help='earlier --json results to compare against')
+    parser.add_argument('--fail-over', type=float, metavar='PCT',
+                        help='exit with status 1 if us/op or peak B/op regress by more than PCT percent')
+    args = parser.parse_args()
+
+    results = [
+        measure(name, factory, args.number, args.repeat)
+        for name, factory in BENCHMARKS.items()
+        if not args.only or args.only.lower() in name.lower()
+    ]
+    baseline = {result['benchmark']: result for result in json.loads(args.compare.read_text())} if args.compare else {}
+    regressions = []
+    print(f"{'benchmark':<36} {'ops/sec':>10} {'us/op':>9} {'peak B/op':>10} {'retained blocks/op':>19}")
+    for result in results:
+        line = (f"{result['benchmark']:<36} {result['ops_per_sec']:>10} {result['us_per_op']:>9.3f} "
+                f"{result['peak_bytes_per_op']:>10} {result['retained_blocks_per_op']:>19.2f}")
+        previous = baseline.get(result['benchmark'])
+        if previous:
+            changes = {key: (result[key] - previous[key]) / previous[key] * 100
+                       for key in ('us_per_op', 'peak_bytes_per_op') if previous[key]}
+            line += '   ' + '  '.join(f"{key} {change:+.1f}%" for key, change in changes.items())
+            if args.fail_over is not None and any(change > args.fail_over for change in changes.values()):
+                regressions.append(result['benchmark'])
+        print(line)
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2))
+    if regressions:
+        print(f"regressed by more than {args.fail_over}%: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+import argparse
+import asyncio
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from benchmarks.bench_load import drive, git_commit
+from benchmarks.stubs import BackendServer, SendGridStub, StubServer
+
+
+def parse_config(value: str) -> Tuple[int, int]:
+    api_workers, _, email_workers = value.partition('x')
+    try:
+        return int(api_workers), int(email_workers or 0)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected API_WORKERSxEMAIL_WORKER_PROCESSES, e.g. 2x4, got {value}")
+
+
+def queued_jobs(path: Path) -> int:
+    with sqlite3.connect(str(path), timeout=5) as db:
+        return db.execute('SELECT COUNT(*) FROM email_jobs').fetchone()[0]
+
+
+def wait_for_drain(path: Path, timeout: float) -> float:
+    started = time.perf_counter()
+    while time.perf_counter() - started < timeout:
+        if queued_jobs(path) == 0:
+            return time.perf_counter() - started
+        time.sleep(0.05)
+    raise RuntimeError(f'{queued_jobs(path)} jobs still queued after {timeout}s')
+
+
+def measure(api_workers: int, email_workers: int, args: argparse.Namespace, sendgrid_url: str) -> Dict[str, object]:
+    with tempfile.TemporaryDirectory() as directory:
+        queue_path = Path(directory) / 'queue.db'
+        env = {
+            **os.environ,
+            'USE_GCP': 'false',
+            'API_WORKERS': str(api_workers),
+            'EMAIL_WORKER_PROCESSES': str(email_workers),
+            'EMAIL_QUEUE_BACKEND': 'sqlite',
+            'EMAIL_QUEUE_PATH': str(queue_path),
+            'EMAIL_QUEUE_MAXSIZE': str(args.requests * 2),
+            'EMAIL_WORKER_CONCURRENCY': str(args.concurrency_per_worker),
+            'EMAIL_MIN_DELAY_SECONDS': '0',
+            'EMAIL_DEDUPE_TTL_SECONDS': '0',
+            'EMAIL_ADMISSION_HIGH_WATERMARK': str(args.requests * 2),
+            'EMAIL_ADMISSION_MAX_WAIT_SECONDS': '3600',
+            'EMAIL_SHUTDOWN_TIMEOUT_SECONDS': '1',
+            'FIRESTORE_STATUS_UPDATES': 'false',
+            'SENDGRID_API_KEY': 'scaling-test-key',
+            'SENDGRID_API_BASE_URL': sendgrid_url,
+            'LOG_LEVEL': args.log_level,
+            'LOG_DIR': str(Path(directory) / 'logs'),
+        }
+        env.pop('PROMETHEUS_MULTIPROC_DIR', None)
+        with BackendServer(env, serve=True) as server:
+            started = time.perf_counter()
+            result = asyncio.run(drive(server.url, args.requests, args.concurrency, 0.0, False))
+            result.pop('_accepted')
+            wait_for_drain(queue_path, args.drain_timeout)
+            total = time.perf_counter() - started
+    return {
+        'api_workers': api_workers,
+        'email_worker_processes': email_workers,
+        'api_rps': result['rps'],
+        'p99_ms': result['p99_ms'],
+        'error_rate': result['error_rate'],
+        'sends_per_sec': round(args.requests / total, 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Throughput as API workers and email worker processes are added')
+    parser.add_argument('--configs', type=parse_config, nargs='+', default=[(1, 0), (1, 1), (2, 2), (4, 4)],
+                        help='API_WORKERSxEMAIL_WORKER_PROCESSES; 1x0 is the single-process mode')
+    parser.add_argument('--requests', type=int, default=3000)
+    parser.add_argument('--concurrency', type=int, default=64, help='client requests in flight')
+    parser.add_argument('--concurrency-per-worker', type=int, default=16, help='EMAIL_WORKER_CONCURRENCY')
+    parser.add_argument('--sendgrid-latency', type=float, default=0.02)
+    parser.add_argument('--drain-timeout', type=float, default=300.0)
+    parser.add_argument('--log-level', default='WARNING')
+    parser.add_argument('--json', type=Path, help='write results to this file')
+    args = parser.parse_args()
+
+    results: List[Dict[str, object]] = []
+    with StubServer(SendGridStub(latency=args.sendgrid_latency)) as sendgrid:
+        for api_workers, email_workers in args.configs:
+            results.append(measure(api_workers, email_workers, args, sendgrid.url))
+
+    print(f"commit {git_commit()}   cpus {os.cpu_count()}   requests {args.requests}")
+    print(f"{'config':<8} {'api rps':>9} {'p99 ms':>9} {'errors':>7} {'sends/s':>9}")
+    for result in results:
+        config = f"{result['api_workers']}x{result['email_worker_processes']}"
+        print(f"{config:<8} {result['api_rps']:>9} {result['p99_ms']:>9} {result['error_rate']:>7} "
+              f"{result['sends_per_sec']:>9}")
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+import argparse
+import asyncio
+import json
+import os
+import ssl
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from sendgrid import SendGridAPIClient
+from sendgrid.helpers.mail import Mail
+from benchmarks.stubs import SendGridStub, StubServer
+from services.sendgrid_client import SendGridTransport, build_mail_payload
+
+API_KEY = 'SG.benchmark'
+FROM_EMAIL = 'noreply@example.com'
+HTML = '<html><body><h1>Welcome!</h1></body></html>'
+
+
+def summarize(name: str, latencies: List[float], elapsed: float) -> Dict[str, float]:
+    latencies = sorted(latencies)
+    return {
+        'client': name,
+        'messages': len(latencies),
+        'messages_per_sec': round(len(latencies) / elapsed, 1),
+        'mean_ms': round(statistics.mean(latencies) * 1000, 2),
+        'p99_ms': round(latencies[int(len(latencies) * 0.99) - 1] * 1000, 2),
+    }
+
+
+async def run_concurrently(send_one, messages: int, concurrency: int) -> List[float]:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+
+    async def timed(i: int) -> None:
+        async with semaphore:
+            started = time.perf_counter()
+            await send_one(i)
+            latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*[timed(i) for i in range(messages)])
+    return latencies
+
+
+async def bench_per_message_client(url: str, messages: int, concurrency: int) -> Dict[str, float]:
+    loop = asyncio.get_running_loop()
+
+    async def send_one(i: int) -> None:
+        message = Mail(from_email=FROM_EMAIL, to_emails=f'user{i}@example.com',
+                       subject='Welcome to Our App!', html_content=HTML)
+        sg = SendGridAPIClient(API_KEY, host=url)
+        await loop.run_in_executor(None, sg.send, message)
+
+    started = time.perf_counter()
+    latencies = await run_concurrently(send_one, messages, concurrency)
+    return summarize('per-message SendGridAPIClient', latencies, time.perf_counter() - started)
+
+
+async def bench_pooled_transport(url: str, messages: int, concurrency: int) -> Dict[str, float]:
+    transport = SendGridTransport(API_KEY, base_url=url, max_connections=concurrency,
+                                  max_keepalive_connections=concurrency)
+    async with transport:
+        async def send_one(i: int) -> None:
+            await transport.send(build_mail_payload(FROM_EMAIL, f'user{i}@example.com', 'Welcome to Our App!', HTML))
+
+        started = time.perf_counter()
+        latencies = await run_concurrently(send_one, messages, concurrency)
+    return summarize('pooled SendGridTransport', latencies, time.perf_counter() - started)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Compare per-message SendGrid clients with the pooled transport')
+    parser.add_argument('--messages', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--latency-ms', type=float, default=5.0, help='simulated SendGrid response latency')
+    parser.add_argument('--tls', action='store_true', help='serve the stand-in over HTTPS to include handshake cost')
+    parser.add_argument('--json', type=Path, help='write results to this file')
+    args = parser.parse_args()
+
+    with StubServer(SendGridStub(latency=args.latency_ms / 1000), tls=args.tls) as stub:
+        if stub.cert_file:
+            ssl._create_default_https_context = lambda: ssl.create_default_context(cafile=str(stub.cert_file))
+            os.environ['SSL_CERT_FILE'] = str(stub.cert_file)
+        results = [
+            asyncio.run(bench_per_message_client(stub.url, args.messages, args.concurrency)),
+            asyncio.run(bench_pooled_transport(stub.url, args.messages, args.concurrency)),
+        ]
+
+    for result in results:
+        print(f"{result['client']:<32} {result['messages_per_sec']:>10} msg/s  "
+              f"mean {result['mean_ms']:>7} ms  p99 {result['p99_ms']:>7} ms")
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
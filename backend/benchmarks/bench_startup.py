@@ -0,0 +1,90 @@
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from benchmarks.fake_grpc import FakeGrpcServer
+from benchmarks.stubs import BackendServer
+
+IMPORTTIME_LINE = re.compile(r'import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+
+
+def import_profile(env: Dict[str, str], top: int) -> Dict[str, object]:
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import app'],
+        cwd=backend_dir, env=env, capture_output=True, text=True, check=True
+    )
+    wall = time.perf_counter() - started
+    modules = []
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            modules.append((match.group(4), int(match.group(2)), len(match.group(3))))
+    app_cumulative, app_indent = next(((cumulative, indent) for name, cumulative, indent in modules if name == 'app'), (0, 1))
+    top_level = sorted((m for m in modules if m[2] == app_indent + 2), key=lambda m: m[1], reverse=True)
+    return {
+        'wall_ms': round(wall * 1000, 1),
+        'import_app_ms': round(app_cumulative / 1000, 1),
+        'heaviest': [{'module': name, 'ms': round(cumulative / 1000, 1)} for name, cumulative, _ in top_level[:top]],
+    }
+
+
+def time_to_ready(env: Dict[str, str], timeout: float) -> float:
+    with BackendServer(env, timeout=timeout) as server:
+        return server.ready_seconds
+
+
+def run_mode(name: str, env: Dict[str, str], runs: int, top: int, timeout: float) -> Dict[str, object]:
+    profiles = [import_profile(env, top) for _ in range(runs)]
+    ready = [time_to_ready(env, timeout) for _ in range(runs)]
+    return {
+        'mode': name,
+        'import_app_ms': statistics.median(p['import_app_ms'] for p in profiles),
+        'import_wall_ms': statistics.median(p['wall_ms'] for p in profiles),
+        'time_to_ready_ms': round(statistics.median(ready) * 1000, 1),
+        'heaviest_imports': profiles[-1]['heaviest'],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Import time and time-to-ready of the FastAPI backend')
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--top', type=int, default=8, help='number of heaviest top-level imports to report')
+    parser.add_argument('--timeout', type=float, default=60.0)
+    parser.add_argument('--json', type=Path, help='write results to this file')
+    args = parser.parse_args()
+
+    base_env = {**os.environ, 'SENDGRID_API_KEY': '', 'FIRESTORE_STATUS_UPDATES': 'false'}
+    results: List[Dict[str, object]] = [
+        run_mode('local', {**base_env, 'USE_GCP': 'false'}, args.runs, args.top, args.timeout)
+    ]
+    with FakeGrpcServer('google.cloud.tasks.v2.CloudTasks', {}) as tasks_server:
+        gcp_env = {
+            **base_env,
+            'USE_GCP': 'true',
+            'CLOUD_TASKS_EMULATOR_HOST': tasks_server.address,
+            'GCP_PROJECT_ID': 'demo-project',
+        }
+        results.append(run_mode('gcp (Cloud Tasks emulator)', gcp_env, args.runs, args.top, args.timeout))
+
+    for result in results:
+        print(f"{result['mode']:<28} import app {result['import_app_ms']:>8.1f} ms   "
+              f"process wall {result['import_wall_ms']:>8.1f} ms   time to ready {result['time_to_ready_ms']:>8.1f} ms")
+        for entry in result['heaviest_imports']:
+            print(f"    {entry['module']:<40} {entry['ms']:>8.1f} ms")
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
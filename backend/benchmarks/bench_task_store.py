@@ -0,0 +1,77 @@
+import argparse
+import gc
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Dict
+
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from services.task_store import TaskStore
+
+
+def fill(store: TaskStore, tasks: int, completed: bool) -> None:
+    for i in range(tasks):
+        user_id = f'user-{i:08d}'
+        email = f'user{i:08d}@example.com'
+        task_id = f'task-{user_id}-{email}'
+        store.record_queued(task_id, user_id, email, 'local')
+        if completed:
+            store.record_result(task_id, {'success': True, 'messageId': f'msg-{user_id}', 'statusCode': 202,
+                                          'mode': 'local-sendgrid'})
+
+
+def measure(tasks: int, completed: bool) -> Dict[str, object]:
+    gc.collect()
+    tracemalloc.start()
+    store = TaskStore(capacity=tasks)
+    fill(store, tasks, completed)
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del store
+    gc.collect()
+
+    store = TaskStore(capacity=tasks)
+    started = time.perf_counter()
+    fill(store, tasks, completed)
+    elapsed = time.perf_counter() - started
+
+    step = max(tasks // 100000, 1)
+    task_ids = [f'task-user-{i:08d}-user{i:08d}@example.com' for i in range(0, tasks, step)]
+    lookup_started = time.perf_counter()
+    for task_id in task_ids:
+        store.get(task_id)
+    lookup_elapsed = time.perf_counter() - lookup_started
+
+    return {
+        'scenario': 'sent' if completed else 'queued',
+        'tasks': tasks,
+        'bytes_per_task': round(current / tasks, 1),
+        'mb_per_million': round(current / tasks * 1_000_000 / 2**20, 1),
+        'peak_mb': round(peak / 2**20, 1),
+        'record_us': round(elapsed / tasks * 1e6, 3),
+        'get_us': round(lookup_elapsed / len(task_ids) * 1e6, 3),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Memory and lookup cost of the in-memory task store')
+    parser.add_argument('--tasks', type=int, default=1_000_000)
+    parser.add_argument('--json', type=Path, help='write results to this file')
+    args = parser.parse_args()
+
+    results = [measure(args.tasks, completed=False), measure(args.tasks, completed=True)]
+    for result in results:
+        print(f"{result['scenario']:<8} {result['tasks']:>9} tasks   {result['bytes_per_task']:>7.1f} B/task   "
+              f"{result['mb_per_million']:>7.1f} MB per million   record+format {result['record_us']:.3f} us   "
+              f"get {result['get_us']:.3f} us")
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
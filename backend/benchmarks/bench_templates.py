@@ -0,0 +1,79 @@
+import argparse
+import html
+import json
+import sys
+import timeit
+from pathlib import Path
+from typing import Callable, Dict, List
+
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from cloud_functions.send_email.email_template import TemplateRegistry, registry as default_registry
+
+
+def legacy_welcome_html(user_id: str) -> str:
+    return f'''
+        <html>
+            <body>
+                <h1>Welcome!</h1>
+                <p>Thank you for registering with us!</p>
+                <p>Your user ID: {user_id}</p>
+                <p>We're excited to have you on board.</p>
+            </body>
+        </html>
+        '''
+
+
+def legacy_welcome_parts(user_id: str):
+    return (
+        'Welcome to Our App!',
+        legacy_welcome_html(html.escape(user_id)),
+        f'''Welcome!
+
+Thank you for registering with us!
+Your user ID: {user_id}
+We're excited to have you on board.
+'''
+    )
+
+
+def measure(name: str, render: Callable[[int], object], messages: int, repeat: int) -> Dict[str, object]:
+    counter = iter(range(messages * repeat * 2))
+    best = min(timeit.repeat(lambda: render(next(counter)), number=messages, repeat=repeat))
+    return {'scenario': name, 'messages': messages, 'us_per_message': round(best / messages * 1e6, 3)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Email template render cost per message')
+    parser.add_argument('--messages', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--json', type=Path, help='write results to this file')
+    args = parser.parse_args()
+
+    uncached = TemplateRegistry(cache_size=0)
+    uncached._templates = default_registry._templates
+    cached = TemplateRegistry(cache_size=args.messages)
+    cached._templates = default_registry._templates
+    for i in range(args.messages):
+        cached.render('welcome', None, user_id=f'user-{i % 100}')
+
+    results: List[Dict[str, object]] = [
+        measure('legacy f-string (html only, unescaped)', lambda i: legacy_welcome_html(f'user-{i}'),
+                args.messages, args.repeat),
+        measure('f-strings (subject+escaped html+text)', lambda i: legacy_welcome_parts(f'user-{i}'),
+                args.messages, args.repeat),
+        measure('registry, unique users (subject+html+text)',
+                lambda i: uncached.render('welcome', None, user_id=f'user-{i}'), args.messages, args.repeat),
+        measure('registry, cache hits (repeat recipients)',
+                lambda i: cached.render('welcome', None, user_id=f'user-{i % 100}'), args.messages, args.repeat),
+    ]
+
+    for result in results:
+        print(f"{result['scenario']:<45} {result['us_per_message']:>8.3f} us/message")
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,39 @@
+import time
+from concurrent import futures
+from typing import Dict
+import grpc
+
+
+class FakeGrpcServer:
+    def __init__(self, service: str, methods: Dict[str, grpc.RpcMethodHandler], max_workers: int = 32):
+        self.server = grpc.server(futures.ThreadPoolExecutor(max_workers=max_workers))
+        self.server.add_generic_rpc_handlers((grpc.method_handlers_generic_handler(service, methods),))
+        self.port = self.server.add_insecure_port('127.0.0.1:0')
+
+    @property
+    def address(self) -> str:
+        return f'127.0.0.1:{self.port}'
+
+    def __enter__(self) -> 'FakeGrpcServer':
+        self.server.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.server.stop(grace=None)
+
+
+def fake_firestore_server(latency: float = 0.0) -> FakeGrpcServer:
+    from google.cloud.firestore_v1.types import firestore as firestore_types
+
+    def commit(request, context):
+        if latency:
+            time.sleep(latency)
+        return firestore_types.CommitResponse(write_results=[{} for _ in request.writes])
+
+    return FakeGrpcServer('google.firestore.v1.Firestore', {
+        'Commit': grpc.unary_unary_rpc_method_handler(
+            commit,
+            request_deserializer=firestore_types.CommitRequest.deserialize,
+            response_serializer=firestore_types.CommitResponse.serialize,
+        ),
+    })
@@ -0,0 +1,272 @@
+import asyncio
+import collections
+import datetime
+import ipaddress
+import multiprocessing
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+import uuid
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+import uvicorn
+
+BACKEND_DIR = Path(__file__).parent.parent
+
+
+class SendGridStub:
+    def __init__(self, latency: float = 0.0, status_code: int = 202):
+        self.latency = latency
+        self.status_code = status_code
+        self.retry_after: Optional[str] = None
+        self.requests = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return
+        more_body = True
+        while more_body:
+            message = await receive()
+            more_body = message.get('more_body', False)
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        self.requests += 1
+        status = self.next_status()
+        headers = [
+            (b'content-length', b'0'),
+            (b'x-message-id', uuid.uuid4().hex.encode()),
+        ]
+        if status == 429 and self.retry_after is not None:
+            headers.append((b'retry-after', self.retry_after.encode()))
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': b''})
+
+    def next_status(self) -> int:
+        return self.status_code
+
+
+class FaultInjectingSendGridStub(SendGridStub):
+    def __init__(self, faults: Iterable[int] = (), latency: float = 0.0, status_code: int = 202):
+        super().__init__(latency=latency, status_code=status_code)
+        self.faults = collections.deque(faults)
+
+    def fail_next(self, *status_codes: int) -> None:
+        self.faults.extend(status_codes)
+
+    def next_status(self) -> int:
+        if self.faults:
+            return self.faults.popleft()
+        return self.status_code
+
+
+class DNSStub(asyncio.DatagramProtocol):
+    def __init__(self, records: Optional[Dict[str, Dict[str, Iterable[str]]]] = None, latency: float = 0.0,
+                 ttl: int = 300):
+        self.records = records or {}
+        self.latency = latency
+        self.ttl = ttl
+        self.queries: collections.Counter = collections.Counter()
+        self.transport = None
+
+    @property
+    def nameserver(self) -> str:
+        host, port = self.transport.get_extra_info('sockname')[:2]
+        return f'{host}:{port}'
+
+    async def start(self, host: str = '127.0.0.1') -> 'DNSStub':
+        await asyncio.get_running_loop().create_datagram_endpoint(lambda: self, local_addr=(host, 0))
+        return self
+
+    def close(self) -> None:
+        if self.transport is not None:
+            self.transport.close()
+
+    def connection_made(self, transport) -> None:
+        self.transport = transport
+
+    def datagram_received(self, data: bytes, addr) -> None:
+        response = self.respond(data)
+        if self.latency:
+            asyncio.get_running_loop().call_later(self.latency, self.transport.sendto, response, addr)
+        else:
+            self.transport.sendto(response, addr)
+
+    def respond(self, data: bytes) -> bytes:
+        import dns.message
+        import dns.rcode
+        import dns.rdatatype
+        import dns.rrset
+
+        query = dns.message.from_wire(data)
+        question = query.question[0]
+        name = question.name.to_text(omit_final_dot=True).lower()
+        rdtype = dns.rdatatype.to_text(question.rdtype)
+        self.queries[(name, rdtype)] += 1
+        response = dns.message.make_response(query)
+        zone = self.records.get(name)
+        if zone is None:
+            response.set_rcode(dns.rcode.NXDOMAIN)
+        elif zone.get(rdtype):
+            response.answer.append(dns.rrset.from_text_list(question.name, self.ttl, 'IN', rdtype, list(zone[rdtype])))
+        return response.to_wire()
+
+
+def free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def write_self_signed_cert(directory: Path, host: str = '127.0.0.1') -> Tuple[Path, Path]:
+    from cryptography import x509
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import ec
+    from cryptography.x509.oid import NameOID
+
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, host)])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(minutes=5))
+        .not_valid_after(now + datetime.timedelta(days=1))
+        .add_extension(x509.SubjectAlternativeName([x509.IPAddress(ipaddress.ip_address(host))]), critical=False)
+        .sign(key, hashes.SHA256())
+    )
+    cert_file = directory / 'stub-cert.pem'
+    key_file = directory / 'stub-key.pem'
+    cert_file.write_bytes(cert.public_bytes(serialization.Encoding.PEM))
+    key_file.write_bytes(key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    ))
+    return cert_file, key_file
+
+
+def _serve(app, host: str, port: int, cert_file: Optional[str], key_file: Optional[str]) -> None:
+    uvicorn.run(app, host=host, port=port, log_level='warning', lifespan='off', log_config=None,
+                ssl_certfile=cert_file, ssl_keyfile=key_file)
+
+
+class StubServer:
+    def __init__(self, app, host: str = '127.0.0.1', port: Optional[int] = None, tls: bool = False):
+        self.host = host
+        self.port = port or free_port()
+        self.cert_file: Optional[Path] = None
+        key_file: Optional[Path] = None
+        if tls:
+            self._cert_dir = tempfile.TemporaryDirectory()
+            self.cert_file, key_file = write_self_signed_cert(Path(self._cert_dir.name), host)
+        self._process = multiprocessing.Process(
+            target=_serve,
+            args=(app, self.host, self.port, str(self.cert_file) if tls else None, str(key_file) if tls else None),
+            daemon=True
+        )
+
+    @property
+    def url(self) -> str:
+        scheme = 'https' if self.cert_file else 'http'
+        return f'{scheme}://{self.host}:{self.port}'
+
+    def __enter__(self) -> 'StubServer':
+        self._process.start()
+        deadline = time.monotonic() + 10
+        while True:
+            try:
+                with socket.create_connection((self.host, self.port), timeout=0.1):
+                    return self
+            except OSError:
+                if time.monotonic() > deadline or not self._process.is_alive():
+                    raise RuntimeError(f'Stub server on {self.url} did not start')
+                time.sleep(0.02)
+
+    def __exit__(self, *exc) -> None:
+        self._process.terminate()
+        self._process.join(timeout=10)
+
+
+class ThreadedStubServer:
+    def __init__(self, app, host: str = '127.0.0.1'):
+        self.host = host
+        self.port = free_port()
+        self._server = uvicorn.Server(uvicorn.Config(
+            app, host=host, port=self.port, log_level='warning', lifespan='off', log_config=None
+        ))
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f'http://{self.host}:{self.port}'
+
+    def __enter__(self) -> 'ThreadedStubServer':
+        self._thread.start()
+        deadline = time.monotonic() + 10
+        while not self._server.started:
+            if time.monotonic() > deadline or not self._thread.is_alive():
+                raise RuntimeError(f'Stub server on {self.url} did not start')
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._server.should_exit = True
+        self._thread.join(timeout=10)
+
+
+class BackendServer:
+    def __init__(self, env: Dict[str, str], timeout: float = 60.0, stdout=subprocess.DEVNULL, serve: bool = False):
+        self.env = env
+        self.timeout = timeout
+        self.stdout = stdout
+        self.serve = serve
+        self.port = free_port()
+        self.ready_seconds: Optional[float] = None
+        self._process: Optional[subprocess.Popen] = None
+
+    @property
+    def url(self) -> str:
+        return f'http://127.0.0.1:{self.port}'
+
+    @property
+    def pid(self) -> int:
+        return self._process.pid
+
+    def __enter__(self) -> 'BackendServer':
+        started = time.perf_counter()
+        if self.serve:
+            command = [sys.executable, 'serve.py']
+            env = {**self.env, 'HOST': '127.0.0.1', 'PORT': str(self.port)}
+        else:
+            command = [sys.executable, '-m', 'uvicorn', 'app:app', '--host', '127.0.0.1', '--port', str(self.port),
+                       '--log-level', 'warning']
+            env = self.env
+        self._process = subprocess.Popen(
+            command, cwd=BACKEND_DIR, env=env, stdout=self.stdout, stderr=subprocess.STDOUT
+        )
+        while time.perf_counter() - started < self.timeout:
+            if self._process.poll() is not None:
+                break
+            try:
+                with urllib.request.urlopen(f'{self.url}/api/ready', timeout=1) as response:
+                    if response.status == 200:
+                        self.ready_seconds = time.perf_counter() - started
+                        return self
+            except OSError:
+                pass
+            time.sleep(0.01)
+        self.__exit__()
+        raise RuntimeError(f'Backend on {self.url} did not become ready within {self.timeout}s')
+
+    def __exit__(self, *exc) -> None:
+        self._process.terminate()
+        try:
+            self._process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            self._process.kill()
+            self._process.wait()
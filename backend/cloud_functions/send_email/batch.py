@@ -0,0 +1,94 @@
+import os
+from typing import Any, Dict, List, Optional, Tuple
+from google.cloud import firestore
+from sendgrid.helpers.mail import Mail
+from email_template import render_email
+from clients import get_executor, get_firestore_client, get_sendgrid_client
+
+# Firestore allows at most 500 writes in one batch.
+MAX_BATCH_SIZE = 500
+
+
+def _send_one(sendgrid_api_key: str, item: Dict[str, Any]):
+    rendered = render_email('welcome', item.get('locale'), user_id=item['userId'])
+    message = Mail(
+        from_email=os.environ.get('SENDGRID_FROM_EMAIL', 'noreply@yourapp.com'),
+        to_emails=item['email'],
+        subject=rendered.subject,
+        plain_text_content=rendered.text,
+        html_content=rendered.html
+    )
+    return get_sendgrid_client(sendgrid_api_key).send(message)
+
+
+def _already_sent(db, items: List[Dict[str, Any]]) -> set:
+    refs = [db.collection('users').document(item['userId']) for item in items]
+    return {snapshot.id for snapshot in db.get_all(refs) if snapshot.exists and snapshot.get('emailSent')}
+
+
+def send_email_batch(items: List[Any], sendgrid_api_key: str, retry_count: int = 0) -> Tuple[Dict[str, Any], int]:
+    if not items:
+        return {'error': 'No payload provided'}, 400
+    if len(items) > MAX_BATCH_SIZE:
+        return {'error': f'At most {MAX_BATCH_SIZE} emails per request'}, 400
+
+    results: List[Optional[Dict[str, Any]]] = [None] * len(items)
+    valid = []
+    for i, item in enumerate(items):
+        if not isinstance(item, dict) or not item.get('userId') or not item.get('email'):
+            results[i] = {'success': False, 'error': 'userId and email are required'}
+        else:
+            valid.append((i, item))
+
+    db = get_firestore_client()
+    skipped = _already_sent(db, [item for _, item in valid]) if retry_count and valid else set()
+    to_send = []
+    for i, item in valid:
+        if item['userId'] in skipped:
+            results[i] = {'success': True, 'userId': item['userId'], 'skipped': 'already sent'}
+        else:
+            to_send.append((i, item))
+
+    futures = [(i, item, get_executor().submit(_send_one, sendgrid_api_key, item)) for i, item in to_send]
+    batch = db.batch()
+    updates = []
+    failed = 0
+    for i, item, future in futures:
+        try:
+            response = future.result()
+        except Exception as e:
+            print(f"Error sending email to {item['userId']}: {str(e)}")
+            results[i] = {'success': False, 'userId': item['userId'], 'error': str(e)}
+            failed += 1
+            continue
+        message_id = response.headers.get('X-Message-Id')
+        update = {
+            'emailSent': True,
+            'emailSentAt': firestore.SERVER_TIMESTAMP,
+            'emailMessageId': message_id
+        }
+        batch.update(db.collection('users').document(item['userId']), update)
+        updates.append((i, item['userId'], update))
+        results[i] = {
+            'success': True,
+            'userId': item['userId'],
+            'messageId': message_id,
+            'statusCode': response.status_code
+        }
+
+    if updates:
+        try:
+            batch.commit()
+        except Exception as e:
+            # One missing user document fails the whole batch, so fall back to one write per user.
+            print(f"Batch status update failed, retrying users individually: {str(e)}")
+            for i, user_id, update in updates:
+                try:
+                    db.collection('users').document(user_id).update(update)
+                except Exception as e:
+                    print(f"Error updating email status for {user_id}: {str(e)}")
+                    results[i]['statusUpdateFailed'] = True
+
+    # A non-2xx status makes Cloud Tasks retry the whole task; the retry skips users already marked as sent.
+    return {'success': failed == 0, 'sent': len(futures) - failed, 'failed': failed, 'results': results}, \
+        500 if failed else 200
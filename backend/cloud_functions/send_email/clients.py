@@ -0,0 +1,56 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from google.cloud import firestore
+from sendgrid import SendGridAPIClient
+
+_lock = threading.Lock()
+_sendgrid_client = None
+_sendgrid_api_key = None
+_firestore_client = None
+_executor = None
+
+
+def get_sendgrid_client(api_key: str) -> SendGridAPIClient:
+    global _sendgrid_client, _sendgrid_api_key
+    client = _sendgrid_client
+    if client is not None and _sendgrid_api_key == api_key:
+        return client
+    with _lock:
+        if _sendgrid_client is None or _sendgrid_api_key != api_key:
+            host = os.environ.get('SENDGRID_API_HOST', 'https://api.sendgrid.com')
+            _sendgrid_client = SendGridAPIClient(api_key, host=host)
+            _sendgrid_api_key = api_key
+        return _sendgrid_client
+
+
+def get_firestore_client() -> firestore.Client:
+    global _firestore_client
+    client = _firestore_client
+    if client is not None:
+        return client
+    with _lock:
+        if _firestore_client is None:
+            _firestore_client = firestore.Client()
+        return _firestore_client
+
+
+def get_executor() -> ThreadPoolExecutor:
+    global _executor
+    executor = _executor
+    if executor is not None:
+        return executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=int(os.environ.get('SEND_EMAIL_BATCH_THREADS', '8')))
+        return _executor
+
+
+def reset_clients() -> None:
+    global _sendgrid_client, _sendgrid_api_key, _firestore_client
+    with _lock:
+        if _firestore_client is not None:
+            _firestore_client.close()
+        _sendgrid_client = None
+        _sendgrid_api_key = None
+        _firestore_client = None
@@ -1,5 +1,140 @@
-def get_welcome_email_html(user_id: str) -> str:
-    return f'''
+import html
+import os
+import threading
+from collections import OrderedDict
+from string import Formatter
+from typing import Callable, Dict, NamedTuple, Optional, Tuple
+
+DEFAULT_LOCALE = 'en'
+RENDER_CACHE_SIZE = int(os.getenv('EMAIL_TEMPLATE_CACHE_SIZE', '10000'))
+
+
+class TemplateNotFoundError(KeyError):
+    pass
+
+
+class RenderedEmail(NamedTuple):
+    subject: str
+    html: str
+    text: str
+
+
+def _escape_header(value: str) -> str:
+    return value.replace('\r', ' ').replace('\n', ' ')
+
+
+class CompiledTemplate:
+    def __init__(self, source: str, escape: Optional[Callable[[str], str]] = None):
+        self.escape = escape
+        self.fields: Tuple[str, ...] = ()
+        chunks = []
+        for literal, field, _, _ in Formatter().parse(source):
+            chunks.append(literal.replace('%', '%%'))
+            if field is not None:
+                chunks.append('%s')
+                self.fields += (field,)
+        self._template = ''.join(chunks)
+    
+    def render(self, values: Dict[str, str]) -> str:
+        escape = self.escape
+        if escape is None:
+            return self._template % tuple([values[field] for field in self.fields])
+        return self._template % tuple([escape(str(values[field])) for field in self.fields])
+    
+    def render_placeholders(self, part: str) -> str:
+        return self._template % tuple([_placeholder(part, field) for field in self.fields])
+    
+    def substitutions(self, part: str, values: Dict[str, str]) -> Dict[str, str]:
+        escape = self.escape or str
+        return {_placeholder(part, field): escape(str(values[field])) for field in self.fields}
+
+
+def _placeholder(part: str, field: str) -> str:
+    return f'-{part}.{field}-'
+
+
+class EmailTemplate(NamedTuple):
+    subject: CompiledTemplate
+    html: CompiledTemplate
+    text: CompiledTemplate
+
+    def render(self, values: Dict[str, str]) -> RenderedEmail:
+        return RenderedEmail(self.subject.render(values), self.html.render(values), self.text.render(values))
+
+    def render_placeholders(self) -> RenderedEmail:
+        return RenderedEmail(
+            self.subject.render_placeholders('subject'),
+            self.html.render_placeholders('html'),
+            self.text.render_placeholders('text')
+        )
+
+    def substitutions(self, values: Dict[str, str]) -> Dict[str, str]:
+        return {
+            **self.subject.substitutions('subject', values),
+            **self.html.substitutions('html', values),
+            **self.text.substitutions('text', values),
+        }
+
+
+class TemplateRegistry:
+    def __init__(self, cache_size: int = RENDER_CACHE_SIZE, default_locale: str = DEFAULT_LOCALE):
+        self.cache_size = cache_size
+        self.default_locale = default_locale
+        self.hits = 0
+        self.misses = 0
+        self._templates: Dict[Tuple[str, str], EmailTemplate] = {}
+        self._cache: 'OrderedDict[tuple, RenderedEmail]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def register(self, name: str, locale: str, subject: str, html_source: str, text: str) -> None:
+        self._templates[(name, locale)] = EmailTemplate(
+            subject=CompiledTemplate(subject, _escape_header),
+            html=CompiledTemplate(html_source, html.escape),
+            text=CompiledTemplate(text)
+        )
+        with self._lock:
+            self._cache.clear()
+
+    def get(self, name: str, locale: Optional[str] = None) -> EmailTemplate:
+        locale = locale or self.default_locale
+        template = self._templates.get((name, locale))
+        if template is None and '-' in locale:
+            template = self._templates.get((name, locale.split('-', 1)[0]))
+        if template is None:
+            template = self._templates.get((name, self.default_locale))
+        if template is None:
+            raise TemplateNotFoundError(f"Email template not found: {name}")
+        return template
+
+    def render(self, name: str, locale: Optional[str] = None, /, **values: str) -> RenderedEmail:
+        if self.cache_size <= 0:
+            self.misses += 1
+            return self.get(name, locale).render(values)
+        key = (name, locale, tuple(sorted(values.items())))
+        with self._lock:
+            rendered = self._cache.get(key)
+            if rendered is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return rendered
+        rendered = self.get(name, locale).render(values)
+        with self._lock:
+            self.misses += 1
+            self._cache[key] = rendered
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return rendered
+
+    def stats(self) -> Dict[str, int]:
+        return {'templates': len(self._templates), 'cached': len(self._cache), 'hits': self.hits, 'misses': self.misses}
+
+
+registry = TemplateRegistry()
+
+registry.register(
+    'welcome', 'en',
+    subject='Welcome to Our App!',
+    html_source='''
     <html>
         <body>
             <h1>Welcome!</h1>
@@ -8,5 +143,44 @@ def get_welcome_email_html(user_id: str) -> str:
             <p>We're excited to have you on board.</p>
         </body>
     </html>
-    '''
+    ''',
+    text='''Welcome!
+
+Thank you for registering with us!
+Your user ID: {user_id}
+We're excited to have you on board.
+'''
+)
 
+registry.register(
+    'welcome', 'es',
+    subject='¡Bienvenido a nuestra app!',
+    html_source='''
+    <html lang="es">
+        <body>
+            <h1>¡Bienvenido!</h1>
+            <p>¡Gracias por registrarte!</p>
+            <p>Tu ID de usuario: {user_id}</p>
+            <p>Nos alegra tenerte con nosotros.</p>
+        </body>
+    </html>
+    ''',
+    text='''¡Bienvenido!
+
+¡Gracias por registrarte!
+Tu ID de usuario: {user_id}
+Nos alegra tenerte con nosotros.
+'''
+)
+
+
+def render_email(name: str, locale: Optional[str] = None, /, **values: str) -> RenderedEmail:
+    return registry.render(name, locale, **values)
+
+
+def get_template(name: str, locale: Optional[str] = None) -> EmailTemplate:
+    return registry.get(name, locale)
+
+
+def get_welcome_email_html(user_id: str) -> str:
+    return render_email('welcome', user_id=user_id).html
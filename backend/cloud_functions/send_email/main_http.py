@@ -2,9 +2,10 @@
 import os
 import functions_framework
 from google.cloud import firestore
-from sendgrid import SendGridAPIClient
 from sendgrid.helpers.mail import Mail
-from email_template import get_welcome_email_html
+from email_template import render_email
+from clients import get_firestore_client, get_sendgrid_client
+from batch import send_email_batch
 
 
 @functions_framework.http
@@ -16,6 +17,13 @@ def send_email(request):
         if not payload:
             return {'error': 'No payload provided'}, 400
         
+        if isinstance(payload, list):
+            sendgrid_api_key = os.environ.get('SENDGRID_API_KEY')
+            if not sendgrid_api_key:
+                return {'error': 'SENDGRID_API_KEY not configured'}, 500
+            retry_count = int(request.headers.get('X-CloudTasks-TaskRetryCount', '0'))
+            return send_email_batch(payload, sendgrid_api_key, retry_count)
+        
         user_id = payload.get('userId')
         email = payload.get('email')
         
@@ -30,19 +38,22 @@ def send_email(request):
         # Prepare email
         from_email = os.environ.get('SENDGRID_FROM_EMAIL', 'noreply@yourapp.com')
         
+        rendered = render_email('welcome', payload.get('locale'), user_id=user_id)
+        
         message = Mail(
             from_email=from_email,
             to_emails=email,
-            subject='Welcome to Our App!',
-            html_content=get_welcome_email_html(user_id)
+            subject=rendered.subject,
+            plain_text_content=rendered.text,
+            html_content=rendered.html
         )
         
         # Send email
-        sg = SendGridAPIClient(sendgrid_api_key)
+        sg = get_sendgrid_client(sendgrid_api_key)
         response = sg.send(message)
         
         # Update Firestore
-        db = firestore.Client()
+        db = get_firestore_client()
         user_ref = db.collection('users').document(user_id)
         user_ref.update({
             'emailSent': True,
@@ -0,0 +1,44 @@
+from typing import Any, Dict, Optional, Type, TypeVar
+from fastapi import Request
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, ValidationError
+
+Model = TypeVar('Model', bound=BaseModel)
+
+
+class ModelResponse(ORJSONResponse):
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, BaseModel):
+            return content.__pydantic_serializer__.to_json(content)
+        return super().render(content)
+
+
+def request_body(model: Type[BaseModel]) -> Dict[str, Any]:
+    return {
+        'requestBody': {
+            'content': {'application/json': {'schema': model.model_json_schema()}},
+            'required': True,
+        }
+    }
+
+
+def _is_json(content_type: Optional[str]) -> bool:
+    if not content_type:
+        return True
+    media_type = content_type.split(';', 1)[0].strip().lower()
+    return media_type == 'application/json' or (media_type.startswith('application/') and media_type.endswith('+json'))
+
+
+async def parse_body(request: Request, model: Type[Model]) -> Model:
+    body = await request.body()
+    if not body:
+        raise RequestValidationError([{'type': 'missing', 'loc': ('body',), 'msg': 'Field required', 'input': None}])
+    try:
+        if _is_json(request.headers.get('content-type')):
+            return model.model_validate_json(body)
+        return model.model_validate(body)
+    except ValidationError as e:
+        raise RequestValidationError(
+            [{**error, 'loc': ('body', *error['loc'])} for error in e.errors()], body=body
+        ) from None
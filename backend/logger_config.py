@@ -1,37 +1,115 @@
+import atexit
+import json
 import logging
+import queue
+import random
 import sys
 import os
+import threading
+import time
 from pathlib import Path
-from logging.handlers import RotatingFileHandler
+from typing import Any, Dict, List, Tuple
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from request_timing import current_timings
 
-LOG_DIR = Path(__file__).parent / "logs"
-LOG_DIR.mkdir(exist_ok=True)
+LOG_DIR = Path(os.getenv('LOG_DIR', str(Path(__file__).parent / "logs")))
+LOG_DIR.mkdir(parents=True, exist_ok=True)
 
-LOG_FILE = LOG_DIR / "app.log"
-ERROR_LOG_FILE = LOG_DIR / "error.log"
+_LOG_FILE_SUFFIX = f"-{os.getpid()}" if os.getenv('LOG_FILE_PER_PROCESS', 'false').lower() == 'true' else ""
+LOG_FILE = LOG_DIR / f"app{_LOG_FILE_SUFFIX}.log"
+ERROR_LOG_FILE = LOG_DIR / f"error{_LOG_FILE_SUFFIX}.log"
 
 LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
 DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
 
+EVENT_SAMPLE_RATE = float(os.getenv('LOG_EVENT_SAMPLE_RATE', '1.0'))
 
-def setup_logger(name: str = "user_registration_app", level: str = None) -> logging.Logger:
-    logger = logging.getLogger(name)
+_listeners: Dict[str, Tuple[QueueListener, 'BoundedQueueHandler']] = {}
+
+
+class LogEvent:
+    __slots__ = ('fields',)
     
-    if logger.handlers:
-        return logger
+    def __init__(self, fields: Dict[str, Any]):
+        self.fields = fields
     
-    if level is None:
-        level = os.getenv('LOG_LEVEL', 'INFO')
+    def __str__(self) -> str:
+        return json.dumps(self.fields, default=str, separators=(',', ':'))
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            'ts': self.formatTime(record, DATE_FORMAT),
+            'level': record.levelname,
+            'logger': record.name,
+        }
+        if isinstance(record.msg, LogEvent):
+            data.update(record.msg.fields)
+        else:
+            data['message'] = record.getMessage()
+        if record.exc_info:
+            data['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(data, default=str, separators=(',', ':'))
+
+
+class BoundedQueueHandler(QueueHandler):
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self._unreported = 0
+        self._dropped_lock = threading.Lock()
     
-    log_level = getattr(logging, level.upper(), logging.INFO)
-    logger.setLevel(log_level)
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if not isinstance(record.msg, LogEvent):
+            record.msg = record.getMessage()
+            record.args = None
+        return record
     
-    formatter = logging.Formatter(LOG_FORMAT, DATE_FORMAT)
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._dropped_lock:
+                self.dropped += 1
+                self._unreported += 1
+            return
+        if self._unreported:
+            self._report_dropped(record.name)
+    
+    def _report_dropped(self, name: str) -> None:
+        with self._dropped_lock:
+            unreported, self._unreported = self._unreported, 0
+        if not unreported:
+            return
+        record = logging.LogRecord(
+            name, logging.WARNING, __file__, 0,
+            f"Log queue full, dropped {unreported} log records", None, None
+        )
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._dropped_lock:
+                self._unreported += unreported
+
+
+def async_logging_enabled() -> bool:
+    return os.getenv('LOG_ASYNC', 'false').lower() == 'true'
+
+
+def json_logging_enabled() -> bool:
+    return os.getenv('LOG_JSON', 'false').lower() == 'true'
+
+
+def _build_handlers(log_level: int) -> List[logging.Handler]:
+    if json_logging_enabled():
+        formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter(LOG_FORMAT, DATE_FORMAT)
     
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setLevel(log_level)
     console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
     
     file_handler = RotatingFileHandler(
         LOG_FILE,
@@ -40,7 +118,6 @@ def setup_logger(name: str = "user_registration_app", level: str = None) -> logg
     )
     file_handler.setLevel(logging.DEBUG)
     file_handler.setFormatter(formatter)
-    logger.addHandler(file_handler)
     
     error_handler = RotatingFileHandler(
         ERROR_LOG_FILE,
@@ -49,10 +126,75 @@ def setup_logger(name: str = "user_registration_app", level: str = None) -> logg
     )
     error_handler.setLevel(logging.ERROR)
     error_handler.setFormatter(formatter)
-    logger.addHandler(error_handler)
+    
+    return [console_handler, file_handler, error_handler]
+
+
+def setup_logger(name: str = "user_registration_app", level: str = None, use_queue: bool = None) -> logging.Logger:
+    logger = logging.getLogger(name)
+    
+    if logger.handlers:
+        return logger
+    
+    if level is None:
+        level = os.getenv('LOG_LEVEL', 'INFO')
+    if use_queue is None:
+        use_queue = async_logging_enabled()
+    
+    log_level = getattr(logging, level.upper(), logging.INFO)
+    logger.setLevel(log_level)
+    
+    handlers = _build_handlers(log_level)
+    
+    if not use_queue:
+        for handler in handlers:
+            logger.addHandler(handler)
+        return logger
+    
+    log_queue = queue.Queue(maxsize=int(os.getenv('LOG_QUEUE_SIZE', '10000')))
+    queue_handler = BoundedQueueHandler(log_queue)
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    _listeners[name] = (listener, queue_handler)
+    logger.addHandler(queue_handler)
     
     return logger
 
 
+def dropped_log_records() -> int:
+    return sum(queue_handler.dropped for _, queue_handler in _listeners.values())
+
+
+def shutdown_logging() -> None:
+    for name, (listener, queue_handler) in list(_listeners.items()):
+        listener.stop()
+        logger = logging.getLogger(name)
+        logger.removeHandler(queue_handler)
+        for handler in listener.handlers:
+            logger.addHandler(handler)
+        if queue_handler._unreported:
+            logger.warning(f"Log queue full, dropped {queue_handler._unreported} log records")
+        for handler in listener.handlers:
+            handler.flush()
+        del _listeners[name]
+
+
+atexit.register(shutdown_logging)
+
 logger = setup_logger()
 
+
+def log_event(stage: str, level: int = logging.INFO, exc_info: bool = False, **fields: Any) -> None:
+    if level < logging.WARNING and EVENT_SAMPLE_RATE < 1.0:
+        if random.random() >= EVENT_SAMPLE_RATE:
+            return
+        fields['sample_rate'] = EVENT_SAMPLE_RATE
+    if not logger.isEnabledFor(level):
+        return
+    timings = current_timings()
+    if timings is None:
+        logger.log(level, LogEvent({'event': 'email', 'stage': stage, **fields}), exc_info=exc_info, stacklevel=2)
+        return
+    started = time.perf_counter()
+    logger.log(level, LogEvent({'event': 'email', 'stage': stage, **fields}), exc_info=exc_info, stacklevel=2)
+    timings.add('log', time.perf_counter() - started)
@@ -1,10 +1,43 @@
-from pydantic import BaseModel, EmailStr
-from typing import Optional
+import re
+from datetime import datetime
+from email_validator import SPECIAL_USE_DOMAIN_NAMES
+from pydantic import BaseModel, EmailStr, Field, ValidatorFunctionWrapHandler, WrapValidator
+from typing import Annotated, Any, Dict, List, Optional
+
+MAX_BATCH_SIZE = 10000
+
+# A strict subset of the addresses email-validator accepts: an ASCII dot-atom local part and an
+# ASCII hostname with an alphabetic TLD. Everything else goes through EmailStr's full validation.
+_PLAIN_EMAIL = re.compile(
+    r"[A-Za-z0-9!#$%&'*+/=?^_`{|}~-]+(?:\.[A-Za-z0-9!#$%&'*+/=?^_`{|}~-]+)*"
+    r"@((?:[A-Za-z0-9](?:[A-Za-z0-9-]{0,61}[A-Za-z0-9])?\.)+[A-Za-z]{2,63})"
+)
+
+
+def _is_special_use(domain: str) -> bool:
+    return any(domain == name or domain.endswith('.' + name) for name in SPECIAL_USE_DOMAIN_NAMES)
+
+
+def _validate_plain_email(value: Any, handler: ValidatorFunctionWrapHandler) -> str:
+    if isinstance(value, str) and len(value) <= 254:
+        match = _PLAIN_EMAIL.fullmatch(value)
+        if match is not None and match.start(1) <= 65:
+            domain = match.group(1).lower()
+            if '--' not in domain and not _is_special_use(domain):
+                return value[:match.start(1)] + domain
+    return handler(value)
+
+
+PlainEmailStr = Annotated[EmailStr, WrapValidator(_validate_plain_email)]
 
 
 class SendEmailRequest(BaseModel):
     userId: str
-    email: EmailStr
+    email: PlainEmailStr
+
+
+class SendEmailBatchRequest(BaseModel):
+    items: List[Dict[str, Any]] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE)
 
 
 class SendEmailResponse(BaseModel):
@@ -19,9 +52,45 @@ class HealthResponse(BaseModel):
 
 
 class EmailTaskResult(BaseModel):
-    success: bool
+    taskId: Optional[str] = None
+    status: Optional[str] = None
+    success: Optional[bool] = None
     messageId: Optional[str] = None
     email: str
     userId: str
+    statusCode: Optional[int] = None
+    mode: Optional[str] = None
     error: Optional[str] = None
+    queuedAt: Optional[datetime] = None
+    completedAt: Optional[datetime] = None
+
 
+class QueueStatsResponse(BaseModel):
+    mode: str
+    queueDepth: int = 0
+    inFlight: int = 0
+    capacity: int = 0
+    concurrency: int = 0
+    processed: int = 0
+    failed: int = 0
+    avgLatencyMs: Optional[float] = None
+    shed: int = 0
+    shedByReason: Dict[str, int] = {}
+    deduplicated: int = 0
+    retries: int = 0
+    retryBudgetExhausted: int = 0
+    circuitState: Optional[str] = None
+    circuitOpened: int = 0
+    circuitRejected: int = 0
+    rateLimited: int = 0
+    rateLimitWaitSeconds: float = 0.0
+    rateLimitDomains: int = 0
+    queueBackend: Optional[str] = None
+    queueCommits: int = 0
+    queueAvgCommitSize: Optional[float] = None
+    sendBatches: int = 0
+    avgSendBatchSize: Optional[float] = None
+    domainLookups: int = 0
+    domainCacheHits: int = 0
+    domainRejected: int = 0
+    domainCheckTimeouts: int = 0
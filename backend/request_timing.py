@@ -0,0 +1,151 @@
+import asyncio
+import cProfile
+import hmac
+import os
+import random
+import re
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+
+
+class RequestTimings:
+    __slots__ = ('started', 'stages')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+
+    def add(self, name: str, seconds: float) -> None:
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def header(self, total: float) -> bytes:
+        parts = [f'{name};dur={seconds * 1000:.2f}' for name, seconds in self.stages.items()]
+        parts.append(f'total;dur={total * 1000:.2f}')
+        return ', '.join(parts).encode()
+
+
+_current: ContextVar[Optional[RequestTimings]] = ContextVar('request_timings', default=None)
+
+
+def current_timings() -> Optional[RequestTimings]:
+    return _current.get()
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, time.perf_counter() - started)
+
+
+def mark_since_start(name: str) -> None:
+    timings = _current.get()
+    if timings is not None:
+        timings.add(name, time.perf_counter() - timings.started)
+
+
+def _profile_name(scope) -> str:
+    path = re.sub(r'[^A-Za-z0-9]+', '-', scope.get('path', '')).strip('-')[:60] or 'root'
+    method = scope.get('method', 'GET').lower()
+    return f"{time.strftime('%Y%m%dT%H%M%S')}-{method}-{path}-{uuid.uuid4().hex[:8]}.prof"
+
+
+class ServerTimingMiddleware:
+    def __init__(
+        self,
+        app,
+        server_timing: bool = True,
+        profile_sample_rate: float = 0.0,
+        profile_token: Optional[str] = None,
+        profile_dir: Path = Path('profiles'),
+        profile_max_files: int = 100
+    ):
+        self.app = app
+        self.server_timing = server_timing
+        self.profile_sample_rate = profile_sample_rate
+        self.profile_token = profile_token.encode() if profile_token else None
+        self.profile_dir = Path(profile_dir)
+        self.profile_max_files = profile_max_files
+        self.profiles_written = 0
+        self._profiling = False
+
+    @staticmethod
+    def settings_from_env() -> Dict[str, Any]:
+        from logger_config import LOG_DIR
+        return dict(
+            server_timing=os.getenv('SERVER_TIMING_ENABLED', 'false').lower() == 'true',
+            profile_sample_rate=float(os.getenv('PROFILE_SAMPLE_RATE', '0')),
+            profile_token=os.getenv('PROFILE_TOKEN') or None,
+            profile_dir=Path(os.getenv('PROFILE_DIR', str(LOG_DIR / 'profiles'))),
+            profile_max_files=int(os.getenv('PROFILE_MAX_FILES', '100'))
+        )
+
+    def _should_profile(self, scope) -> bool:
+        if self._profiling or self.profiles_written >= self.profile_max_files:
+            return False
+        if self.profile_token is not None:
+            for name, value in scope.get('headers', ()):
+                if name == b'x-profile' and hmac.compare_digest(value, self.profile_token):
+                    return True
+        return self.profile_sample_rate > 0 and random.random() < self.profile_sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        profile = self._should_profile(scope)
+        if not self.server_timing and not profile:
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        token = _current.set(timings)
+        profile_name = _profile_name(scope) if profile else None
+
+        async def send_with_timing(message):
+            if message['type'] == 'http.response.start':
+                headers = list(message.get('headers', ()))
+                if self.server_timing:
+                    headers.append((b'server-timing', timings.header(time.perf_counter() - timings.started)))
+                if profile_name is not None:
+                    headers.append((b'x-profile-file', profile_name.encode()))
+                message = {**message, 'headers': headers}
+            await send(message)
+
+        profiler = None
+        if profile:
+            self._profiling = True
+            profiler = cProfile.Profile()
+            profiler.enable()
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            if profiler is not None:
+                profiler.disable()
+                self._profiling = False
+                await self._write_profile(profiler, profile_name)
+
+    async def _write_profile(self, profiler: cProfile.Profile, name: str) -> None:
+        from logger_config import logger
+        path = self.profile_dir / name
+        try:
+            await asyncio.to_thread(self._dump, profiler, path)
+            self.profiles_written += 1
+            logger.info(f"Request profile written to {path}")
+        except Exception as e:
+            logger.warning(f"Could not write request profile: {str(e)}")
+
+    def _dump(self, profiler: cProfile.Profile, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        profiler.dump_stats(str(path))
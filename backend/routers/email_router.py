@@ -1,44 +1,166 @@
-from fastapi import APIRouter, HTTPException, status
-from models import SendEmailRequest, SendEmailResponse, HealthResponse
+import json
+import time
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from models import (
+    SendEmailRequest, SendEmailBatchRequest, SendEmailResponse, HealthResponse, QueueStatsResponse, EmailTaskResult
+)
 from services.email_service import EmailService
-from logger_config import logger
+from services.admission import AdmissionDecision
+from services.worker_pool import QueueFullError
+from services.metrics import REQUEST_SECONDS, labelled
+from request_timing import mark_since_start, stage
+from json_api import ModelResponse, parse_body, request_body
+from logger_config import log_event
 
 router = APIRouter(prefix="/api", tags=["email"])
-email_service = EmailService()
+email_service: Optional[EmailService] = None
 
+UNDELIVERABLE = "Recipient domain does not accept email"
+# Batch items are checked and queued this many at a time, so results stream before the whole batch is checked.
+BATCH_CHUNK_SIZE = 100
 
-@router.post("/send-email", response_model=SendEmailResponse, status_code=status.HTTP_202_ACCEPTED)
-async def send_email(request: SendEmailRequest) -> SendEmailResponse:
-    logger.info("=" * 60)
-    logger.info(f"EMAIL TRIGGERED - User registered: {request.userId}, Email: {request.email}")
-    logger.info(f"User registration completed, initiating email job creation...")
-    logger.info("=" * 60)
-    
+HEALTHY = HealthResponse(status="healthy")
+READY = HealthResponse(status="ready")
+
+
+def get_email_service() -> EmailService:
+    global email_service
+    if email_service is None:
+        email_service = EmailService()
+    return email_service
+
+
+def _shed(decision: AdmissionDecision) -> HTTPException:
+    return HTTPException(
+        status_code=decision.status_code,
+        detail=f"Email service overloaded ({decision.reason}), retry later",
+        headers={'Retry-After': str(decision.retry_after)}
+    )
+
+
+@router.post("/send-email", response_model=SendEmailResponse, status_code=status.HTTP_202_ACCEPTED,
+             openapi_extra=request_body(SendEmailRequest))
+async def send_email(http_request: Request) -> ModelResponse:
+    request = await parse_body(http_request, SendEmailRequest)
+    mark_since_start('parse')
+    started = time.perf_counter()
+    outcome = 'error'
     try:
-        logger.info(f"🔄 Creating email job for user: {request.userId}")
-        task_id = await email_service.queue_email(request.userId, request.email)
-        logger.info(f"Email job created successfully")
-        logger.info(f"Job ID: {task_id}")
-        logger.info(f"User ID: {request.userId}")
-        logger.info(f"Email: {request.email}")
-        logger.info("=" * 60)
-        return SendEmailResponse(
+        service = get_email_service()
+        with stage('admit'):
+            decision = service.admit()
+        if not decision.admitted:
+            outcome = 'shed'
+            raise _shed(decision)
+        
+        with stage('domain'):
+            deliverable = await service.accepts_recipient(request.email)
+        if not deliverable:
+            outcome = 'rejected'
+            raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=UNDELIVERABLE)
+        
+        try:
+            with stage('queue'):
+                task_id = await service.queue_email(request.userId, request.email)
+        except QueueFullError:
+            outcome = 'shed'
+            raise _shed(service.shed_queue_full())
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Failed to queue email: {str(e)}"
+            )
+        outcome = 'accepted'
+        return ModelResponse(SendEmailResponse(
             success=True,
             taskId=task_id,
             message="Email queued successfully"
-        )
-    except Exception as e:
-        logger.error("=" * 60)
-        logger.error(f"FAILED to create email job for user: {request.userId}")
-        logger.error(f"Error: {str(e)}", exc_info=True)
-        logger.error("=" * 60)
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to queue email: {str(e)}"
-        )
+        ), status_code=status.HTTP_202_ACCEPTED)
+    finally:
+        labelled(REQUEST_SECONDS, 'send_email', outcome).observe(time.perf_counter() - started)
+
+
+def _ndjson(record: dict) -> str:
+    return json.dumps(record) + "\n"
+
+
+def _validation_error(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}" for err in error.errors()
+    )
+
+
+async def _stream_batch_results(service: EmailService, batch: SendEmailBatchRequest):
+    started = time.perf_counter()
+    queued = 0
+    for offset in range(0, len(batch.items), BATCH_CHUNK_SIZE):
+        requests = []
+        for index, item in enumerate(batch.items[offset:offset + BATCH_CHUNK_SIZE], offset):
+            try:
+                request = SendEmailRequest.model_validate(item)
+            except ValidationError as e:
+                yield _ndjson({'index': index, 'success': False, 'error': _validation_error(e)})
+                continue
+            requests.append((index, request))
+        
+        jobs = []
+        deliverable = await service.accepts_recipients([request.email for _, request in requests])
+        for (index, request), accepted in zip(requests, deliverable):
+            if not accepted:
+                yield _ndjson({'index': index, 'success': False, 'error': UNDELIVERABLE})
+                continue
+            jobs.append((index, request.userId, request.email))
+        
+        async for index, task_id, error in service.queue_email_batch(jobs):
+            if error is None:
+                queued += 1
+                yield _ndjson({'index': index, 'success': True, 'taskId': task_id})
+            else:
+                yield _ndjson({'index': index, 'success': False, 'error': error})
+    labelled(REQUEST_SECONDS, 'send_email_batch', 'accepted').observe(time.perf_counter() - started)
+    log_event('batch_completed', items=len(batch.items), queued=queued,
+              duration_ms=round((time.perf_counter() - started) * 1000, 2))
+
+
+@router.post("/send-email/batch", status_code=status.HTTP_202_ACCEPTED)
+async def send_email_batch(batch: SendEmailBatchRequest) -> StreamingResponse:
+    started = time.perf_counter()
+    service = get_email_service()
+    decision = service.admit()
+    if not decision.admitted:
+        labelled(REQUEST_SECONDS, 'send_email_batch', 'shed').observe(time.perf_counter() - started)
+        raise _shed(decision)
+    
+    return StreamingResponse(
+        _stream_batch_results(service, batch),
+        status_code=status.HTTP_202_ACCEPTED,
+        media_type="application/x-ndjson"
+    )
 
 
 @router.get("/health", response_model=HealthResponse)
-async def health() -> HealthResponse:
-    return HealthResponse(status="healthy")
+async def health() -> ModelResponse:
+    return ModelResponse(HEALTHY)
+
+
+@router.get("/ready", response_model=HealthResponse)
+async def ready(request: Request) -> ModelResponse:
+    if not getattr(request.app.state, 'ready', False):
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="starting")
+    return ModelResponse(READY)
+
+
+@router.get("/tasks/{task_id:path}", response_model=EmailTaskResult)
+async def get_task(task_id: str) -> ModelResponse:
+    result = get_email_service().get_task(task_id)
+    if result is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found")
+    return ModelResponse(result)
+
 
+@router.get("/queue/stats", response_model=QueueStatsResponse)
+async def queue_stats() -> QueueStatsResponse:
+    return QueueStatsResponse(**get_email_service().stats())
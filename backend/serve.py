@@ -0,0 +1,166 @@
+import asyncio
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+BACKEND_DIR = Path(__file__).parent
+
+
+def _settings() -> Dict[str, object]:
+    return {
+        'host': os.getenv('HOST', '0.0.0.0'),
+        'port': int(os.getenv('PORT', '5001')),
+        'api_workers': int(os.getenv('API_WORKERS', '1')),
+        'email_worker_processes': int(os.getenv('EMAIL_WORKER_PROCESSES', '0')),
+    }
+
+
+def process_env(role: str, base: Dict[str, str], email_worker_processes: int) -> Dict[str, str]:
+    env = dict(base)
+    if email_worker_processes > 0:
+        env['EMAIL_WORKERS_ENABLED'] = 'true' if role == 'email-worker' else 'false'
+    return env
+
+
+def run_api(host: str, port: int, workers: int) -> None:
+    import uvicorn
+    from logger_config import logger
+
+    logger.info(f"Starting server on {host}:{port}")
+    uvicorn.run("app:app", host=host, port=port, workers=workers, reload=False, log_config=None)
+
+
+async def _email_worker(stop: asyncio.Event) -> None:
+    from logger_config import logger
+    from services.email_service import EmailService
+    from services.metrics import refresh_gauges
+
+    service = EmailService()
+    if not hasattr(service, 'worker_pool'):
+        raise SystemExit("Email worker processes need local mode (USE_GCP=false)")
+    await service.start()
+    await service.warm_up()
+    logger.info(f"Email worker process {os.getpid()} started")
+    while not stop.is_set():
+        refresh_gauges()
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=1.0)
+        except asyncio.TimeoutError:
+            pass
+    await service.stop()
+    logger.info(f"Email worker process {os.getpid()} stopped")
+
+
+def run_email_worker() -> None:
+    from logger_config import shutdown_logging
+
+    async def main() -> None:
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(signum, stop.set)
+        await _email_worker(stop)
+
+    try:
+        asyncio.run(main())
+    finally:
+        shutdown_logging()
+
+
+def _release_leases(queue_path: Path, pid: int) -> None:
+    from logger_config import logger
+    from services.durable_queue import lease_owner, release_owner_leases
+
+    try:
+        released = release_owner_leases(queue_path, lease_owner(pid))
+    except Exception as e:
+        logger.warning(f"Could not release jobs leased by email worker process {pid}: {str(e)}")
+        return
+    if released:
+        logger.info(f"Released {released} jobs leased by email worker process {pid}")
+
+
+def supervise(host: str, port: int, api_workers: int, email_worker_processes: int) -> int:
+    from logger_config import logger
+    from prometheus_client import multiprocess
+
+    env = dict(os.environ)
+    if email_worker_processes > 0 and env.get('EMAIL_QUEUE_BACKEND', 'memory').lower() != 'sqlite':
+        raise SystemExit("EMAIL_WORKER_PROCESSES needs EMAIL_QUEUE_BACKEND=sqlite")
+    created_metrics_dir = not env.get('PROMETHEUS_MULTIPROC_DIR')
+    if created_metrics_dir:
+        env['PROMETHEUS_MULTIPROC_DIR'] = tempfile.mkdtemp(prefix='prometheus-')
+    metrics_dir = env['PROMETHEUS_MULTIPROC_DIR']
+    env['HOST'], env['PORT'], env['API_WORKERS'] = host, str(port), str(api_workers)
+    env.setdefault('LOG_FILE_PER_PROCESS', 'true')
+    queue_path = BACKEND_DIR / env.get('EMAIL_QUEUE_PATH', 'data/email-queue.db')
+
+    def spawn(role: str) -> subprocess.Popen:
+        return subprocess.Popen([sys.executable, str(BACKEND_DIR / 'serve.py'), role], cwd=BACKEND_DIR,
+                                env=process_env(role, env, email_worker_processes))
+
+    stopping = False
+
+    def stop(signum, frame) -> None:
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    api = spawn('api')
+    workers: List[subprocess.Popen] = [spawn('email-worker') for _ in range(email_worker_processes)]
+    logger.info(f"Serving on {host}:{port} - API workers: {api_workers}, "
+                f"email worker processes: {email_worker_processes}")
+    try:
+        while not stopping and api.poll() is None:
+            for i, worker in enumerate(workers):
+                if worker.poll() is not None:
+                    logger.warning(f"Email worker process {worker.pid} exited with {worker.returncode}, restarting")
+                    multiprocess.mark_process_dead(worker.pid, metrics_dir)
+                    _release_leases(queue_path, worker.pid)
+                    workers[i] = spawn('email-worker')
+            time.sleep(0.5)
+    finally:
+        for process in [api, *workers]:
+            if process.poll() is None:
+                process.terminate()
+        timeout = float(os.getenv('EMAIL_SHUTDOWN_TIMEOUT_SECONDS', '10')) + 5
+        for process in [api, *workers]:
+            try:
+                process.wait(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+        if created_metrics_dir:
+            shutil.rmtree(metrics_dir, ignore_errors=True)
+    return api.returncode or 0
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    argv = sys.argv[1:] if argv is None else argv
+    if str(BACKEND_DIR) not in sys.path:
+        sys.path.insert(0, str(BACKEND_DIR))
+    settings = _settings()
+    role = argv[0] if argv else None
+
+    if role == 'email-worker':
+        run_email_worker()
+    elif role == 'api':
+        run_api(settings['host'], settings['port'], settings['api_workers'])
+    elif role is not None:
+        raise SystemExit(f"Unknown role: {role} (expected 'api' or 'email-worker')")
+    elif settings['email_worker_processes'] > 0 or settings['api_workers'] > 1:
+        sys.exit(supervise(**settings))
+    else:
+        run_api(settings['host'], settings['port'], settings['api_workers'])
+
+
+if __name__ == '__main__':
+    main()
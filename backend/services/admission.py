@@ -0,0 +1,76 @@
+import math
+from typing import Any, Dict, NamedTuple, Optional
+
+STATUS_TOO_MANY_REQUESTS = 429
+STATUS_SERVICE_UNAVAILABLE = 503
+
+
+class AdmissionDecision(NamedTuple):
+    admitted: bool
+    status_code: int = 202
+    retry_after: int = 0
+    reason: Optional[str] = None
+
+
+ADMITTED = AdmissionDecision(admitted=True)
+
+
+class AdmissionController:
+    def __init__(
+        self,
+        high_watermark: int,
+        max_wait_seconds: float = 30.0,
+        min_retry_after: int = 1,
+        max_retry_after: int = 120
+    ):
+        self.high_watermark = high_watermark
+        self.max_wait_seconds = max_wait_seconds
+        self.min_retry_after = min_retry_after
+        self.max_retry_after = max_retry_after
+        self.shed = 0
+        self.shed_by_reason: Dict[str, int] = {}
+
+    def check(self, stats: Dict[str, Any]) -> AdmissionDecision:
+        depth = stats.get('queueDepth', 0)
+        capacity = stats.get('capacity', 0)
+        concurrency = max(stats.get('concurrency', 1), 1)
+        avg_latency_ms = stats.get('avgLatencyMs')
+        avg_latency = avg_latency_ms / 1000 if avg_latency_ms is not None else None
+
+        if capacity and depth >= capacity:
+            return self.reject(STATUS_SERVICE_UNAVAILABLE, 'queue_full', self.retry_after(depth, concurrency, avg_latency))
+
+        if depth >= self.high_watermark:
+            excess = depth - self.high_watermark + 1
+            return self.reject(STATUS_TOO_MANY_REQUESTS, 'high_watermark', self.retry_after(excess, concurrency, avg_latency))
+
+        if avg_latency is not None:
+            backlog = depth + stats.get('inFlight', 0)
+            estimated_wait = backlog / concurrency * avg_latency
+            if estimated_wait > self.max_wait_seconds:
+                excess_wait = estimated_wait - self.max_wait_seconds
+                return self.reject(STATUS_TOO_MANY_REQUESTS, 'latency', self._clamp(excess_wait))
+
+        return ADMITTED
+
+    def reject(self, status_code: int, reason: str, retry_after: int) -> AdmissionDecision:
+        self.shed += 1
+        self.shed_by_reason[reason] = self.shed_by_reason.get(reason, 0) + 1
+        return AdmissionDecision(admitted=False, status_code=status_code, retry_after=retry_after, reason=reason)
+
+    def shed_open_circuit(self, retry_after: float) -> AdmissionDecision:
+        return self.reject(STATUS_SERVICE_UNAVAILABLE, 'circuit_open', self._clamp(retry_after))
+
+    def retry_after(self, jobs: int, concurrency: int, avg_latency: Optional[float]) -> int:
+        if avg_latency is None:
+            return self.min_retry_after
+        return self._clamp(jobs / concurrency * avg_latency)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'shed': self.shed,
+            'shedByReason': dict(self.shed_by_reason),
+        }
+
+    def _clamp(self, seconds: float) -> int:
+        return max(self.min_retry_after, min(self.max_retry_after, math.ceil(seconds)))
@@ -0,0 +1,173 @@
+import asyncio
+import hashlib
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from logger_config import logger
+
+
+def dedupe_key(user_id: str, email: str) -> str:
+    return hashlib.sha256(f'{user_id}\n{email.strip().lower()}'.encode()).hexdigest()
+
+
+class DedupeCache:
+    def __init__(self, maxsize: int = 100000, ttl: float = 3600.0, clock: Callable[[], float] = time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self._entries: 'OrderedDict[str, Tuple[str, float]]' = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        task_id, expires_at = entry
+        if expires_at <= self.clock():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return task_id
+
+    def put(self, key: str, task_id: str) -> None:
+        self._entries[key] = (task_id, self.clock() + self.ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def discard(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+
+def _default_client_factory():
+    from google.cloud import firestore
+    return firestore.AsyncClient(project=os.getenv('GCP_PROJECT_ID', 'demo-project'))
+
+
+class FirestoreDedupeStore:
+    def __init__(
+        self,
+        client_factory: Callable[[], Any] = _default_client_factory,
+        collection: str = 'emailDedupe',
+        ttl: float = 3600.0,
+        clock: Callable[[], float] = time.time
+    ):
+        self.client_factory = client_factory
+        self.collection = collection
+        self.ttl = ttl
+        self.clock = clock
+        self.client = None
+
+    def _document(self, key: str):
+        if self.client is None:
+            self.client = self.client_factory()
+        return self.client.collection(self.collection).document(key)
+
+    async def claim(self, key: str, task_id: str) -> Optional[str]:
+        from google.api_core.exceptions import AlreadyExists
+
+        document = self._document(key)
+        now = self.clock()
+        entry = {'taskId': task_id, 'expiresAt': datetime.fromtimestamp(now + self.ttl, tz=timezone.utc)}
+        try:
+            await document.create(entry)
+            return None
+        except AlreadyExists:
+            snapshot = await document.get()
+            existing = snapshot.to_dict() or {}
+            expires_at = existing.get('expiresAt')
+            if expires_at is not None and expires_at.timestamp() > now:
+                return existing.get('taskId')
+            await document.set(entry)
+            return None
+
+    async def release(self, key: str) -> None:
+        await self._document(key).delete()
+
+    def close(self) -> None:
+        if self.client is not None:
+            self.client.close()
+            self.client = None
+
+
+class Deduplicator:
+    def __init__(self, cache: DedupeCache, shared: Optional[FirestoreDedupeStore] = None):
+        self.cache = cache
+        self.shared = shared
+        self.hits = 0
+        self._pending: Dict[str, asyncio.Future] = {}
+
+    @property
+    def ttl(self) -> float:
+        return self.cache.ttl
+
+    @classmethod
+    def from_env(cls) -> Optional['Deduplicator']:
+        ttl = float(os.getenv('EMAIL_DEDUPE_TTL_SECONDS', '3600'))
+        if ttl <= 0:
+            return None
+        cache = DedupeCache(maxsize=int(os.getenv('EMAIL_DEDUPE_MAXSIZE', '100000')), ttl=ttl)
+        shared = None
+        store = os.getenv('EMAIL_DEDUPE_STORE', 'memory').lower()
+        if store == 'firestore':
+            shared = FirestoreDedupeStore(ttl=ttl)
+        elif store != 'memory':
+            logger.warning(f"Unknown EMAIL_DEDUPE_STORE '{store}', using in-process dedupe only")
+        logger.info(f"Enqueue dedupe enabled - TTL: {ttl}s, Store: {'firestore' if shared else 'memory'}")
+        return cls(cache, shared)
+
+    async def run(self, key: str, task_id: Optional[str], enqueue: Callable[[], Awaitable[str]]) -> Tuple[str, bool]:
+        cached = self.cache.get(key)
+        if cached is not None:
+            self.hits += 1
+            return cached, True
+        pending = self._pending.get(key)
+        if pending is not None:
+            self.hits += 1
+            return await asyncio.shield(pending), True
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending[key] = future
+        claimed = False
+        try:
+            if self.shared is not None and task_id is not None:
+                existing = await self.shared.claim(key, task_id)
+                if existing is not None:
+                    self.hits += 1
+                    self.cache.put(key, existing)
+                    future.set_result(existing)
+                    return existing, True
+                claimed = True
+            result = await enqueue()
+            self.cache.put(key, result)
+            future.set_result(result)
+            return result, False
+        except BaseException as e:
+            if claimed:
+                await self._release(key)
+            if isinstance(e, asyncio.CancelledError):
+                e = RuntimeError("Enqueue of the same email was cancelled")
+            future.set_exception(e)
+            future.exception()
+            raise
+        finally:
+            self._pending.pop(key, None)
+
+    async def forget(self, key: str) -> None:
+        self.cache.discard(key)
+        if self.shared is not None:
+            await self._release(key)
+
+    async def _release(self, key: str) -> None:
+        try:
+            await self.shared.release(key)
+        except Exception as e:
+            logger.warning(f"Could not release dedupe claim: {str(e)}")
+
+    def close(self) -> None:
+        if self.shared is not None:
+            self.shared.close()
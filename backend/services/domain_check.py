@@ -0,0 +1,174 @@
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from logger_config import logger
+from services.metrics import DOMAIN_CHECKS, labelled
+from services.rate_limit import recipient_domain
+
+
+def parse_nameservers(value: str) -> List[Tuple[str, Optional[int]]]:
+    nameservers = []
+    for item in value.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        host, port = item, None
+        if item.count(':') == 1:
+            host, _, port_text = item.partition(':')
+            port = int(port_text)
+        nameservers.append((host, port))
+    return nameservers
+
+
+def _default_resolver(nameservers: List[Tuple[str, Optional[int]]], lifetime: float):
+    import dns.asyncresolver
+
+    resolver = dns.asyncresolver.Resolver(configure=not nameservers)
+    if nameservers:
+        resolver.nameserver_ports = {host: port for host, port in nameservers if port is not None}
+        resolver.nameservers = [host for host, _ in nameservers]
+    resolver.lifetime = lifetime
+    return resolver
+
+
+class DomainChecker:
+    def __init__(
+        self,
+        resolver: Any,
+        ttl: float = 3600.0,
+        negative_ttl: float = 300.0,
+        timeout: float = 0.05,
+        maxsize: int = 10000,
+        concurrency: int = 32,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.resolver = resolver
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.timeout = timeout
+        self.maxsize = maxsize
+        self.concurrency = concurrency
+        self.clock = clock
+        self.lookups = 0
+        self.cache_hits = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self._entries: 'OrderedDict[str, Tuple[bool, float]]' = OrderedDict()
+        self._pending: Dict[str, asyncio.Task] = {}
+        self._slots = asyncio.Semaphore(concurrency)
+
+    @classmethod
+    def from_env(cls) -> Optional['DomainChecker']:
+        if os.getenv('EMAIL_DOMAIN_CHECK', 'false').lower() != 'true':
+            return None
+        nameservers = parse_nameservers(os.getenv('EMAIL_DOMAIN_CHECK_NAMESERVERS', ''))
+        resolver = _default_resolver(
+            nameservers, float(os.getenv('EMAIL_DOMAIN_CHECK_RESOLVE_TIMEOUT_SECONDS', '2'))
+        )
+        checker = cls(
+            resolver,
+            ttl=float(os.getenv('EMAIL_DOMAIN_CHECK_TTL_SECONDS', '3600')),
+            negative_ttl=float(os.getenv('EMAIL_DOMAIN_CHECK_NEGATIVE_TTL_SECONDS', '300')),
+            timeout=float(os.getenv('EMAIL_DOMAIN_CHECK_TIMEOUT_SECONDS', '0.05')),
+            maxsize=int(os.getenv('EMAIL_DOMAIN_CHECK_MAXSIZE', '10000')),
+            concurrency=int(os.getenv('EMAIL_DOMAIN_CHECK_CONCURRENCY', '32'))
+        )
+        logger.info(f"Recipient domain check enabled - Budget: {checker.timeout}s, TTL: {checker.ttl}s, "
+                    f"Negative TTL: {checker.negative_ttl}s")
+        return checker
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def cached(self, domain: str) -> Optional[bool]:
+        entry = self._entries.get(domain)
+        if entry is None:
+            return None
+        accepts, expires_at = entry
+        if expires_at <= self.clock():
+            del self._entries[domain]
+            return None
+        self._entries.move_to_end(domain)
+        return accepts
+
+    async def accepts(self, email: str) -> bool:
+        domain = recipient_domain(email)
+        accepts = self.cached(domain)
+        if accepts is not None:
+            self.cache_hits += 1
+            return self._record(accepts)
+        lookup = self._pending.get(domain)
+        if lookup is None:
+            lookup = asyncio.get_running_loop().create_task(self._lookup(domain))
+            self._pending[domain] = lookup
+            lookup.add_done_callback(lambda _: self._pending.pop(domain, None))
+        try:
+            accepts = await asyncio.wait_for(asyncio.shield(lookup), self.timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            labelled(DOMAIN_CHECKS, 'timeout').inc()
+            return True
+        return self._record(accepts)
+
+    async def accepts_many(self, emails: List[str]) -> List[bool]:
+        async def check(email: str) -> bool:
+            async with self._slots:
+                return await self.accepts(email)
+
+        return list(await asyncio.gather(*(check(email) for email in emails)))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'domainLookups': self.lookups,
+            'domainCacheHits': self.cache_hits,
+            'domainRejected': self.rejected,
+            'domainCheckTimeouts': self.timeouts,
+        }
+
+    def close(self) -> None:
+        for lookup in list(self._pending.values()):
+            lookup.cancel()
+
+    def _record(self, accepts: bool) -> bool:
+        if not accepts:
+            self.rejected += 1
+        labelled(DOMAIN_CHECKS, 'accepted' if accepts else 'rejected').inc()
+        return accepts
+
+    def _put(self, domain: str, accepts: bool, ttl: float) -> None:
+        self._entries[domain] = (accepts, self.clock() + ttl)
+        self._entries.move_to_end(domain)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    async def _lookup(self, domain: str) -> bool:
+        self.lookups += 1
+        try:
+            accepts = await self._resolve(domain)
+        except Exception as e:
+            logger.warning(f"Recipient domain lookup failed for {domain}, accepting: {str(e)}")
+            self._put(domain, True, self.negative_ttl)
+            return True
+        self._put(domain, accepts, self.ttl if accepts else self.negative_ttl)
+        return accepts
+
+    async def _resolve(self, domain: str) -> bool:
+        import dns.name
+        import dns.resolver
+
+        try:
+            answer = await self.resolver.resolve(domain, 'MX', search=False)
+            return not (len(answer) == 1 and answer[0].exchange == dns.name.root)
+        except dns.resolver.NXDOMAIN:
+            return False
+        except dns.resolver.NoAnswer:
+            pass
+        for rdtype in ('A', 'AAAA'):
+            try:
+                await self.resolver.resolve(domain, rdtype, search=False)
+                return True
+            except dns.resolver.NoAnswer:
+                continue
+        return False
@@ -0,0 +1,398 @@
+import asyncio
+import json
+import logging
+import os
+import socket
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from logger_config import logger, log_event
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS email_jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    payload TEXT NOT NULL,
+    enqueued_at REAL NOT NULL,
+    lease_owner TEXT,
+    leased_until REAL NOT NULL DEFAULT 0,
+    attempts INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS email_jobs_available ON email_jobs (leased_until, id);
+CREATE TABLE IF NOT EXISTS email_jobs_dead (
+    id INTEGER PRIMARY KEY,
+    payload TEXT NOT NULL,
+    enqueued_at REAL NOT NULL,
+    attempts INTEGER NOT NULL,
+    dead_at REAL NOT NULL
+);
+"""
+
+CLAIMABLE = 'leased_until <= ? AND (lease_owner IS NULL OR lease_owner != ?)'
+
+
+def lease_owner(pid: int) -> str:
+    return f'{socket.gethostname()}:{pid}'
+
+
+def release_owner_leases(path: Path, owner: str) -> int:
+    with sqlite3.connect(str(path), timeout=5) as db:
+        return db.execute(
+            'UPDATE email_jobs SET lease_owner = NULL, leased_until = 0 WHERE lease_owner = ?', (owner,)
+        ).rowcount
+
+
+class LeasedJob:
+    __slots__ = ('id', 'args', 'attempts')
+
+    def __init__(self, job_id: int, args: Tuple[Any, ...], attempts: int):
+        self.id = job_id
+        self.args = args
+        self.attempts = attempts
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self.args)
+
+
+class SQLiteJobQueue:
+    durable = True
+
+    def __init__(
+        self,
+        path: Path,
+        maxsize: int = 0,
+        lease_seconds: float = 60.0,
+        max_attempts: int = 5,
+        commit_interval: float = 0.0,
+        max_batch_size: int = 1000,
+        poll_interval: float = 0.05,
+        synchronous: str = 'FULL',
+        owner: Optional[str] = None,
+        clock: Callable[[], float] = time.time
+    ):
+        self.path = Path(path)
+        self.maxsize = maxsize
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.commit_interval = commit_interval
+        self.max_batch_size = max_batch_size
+        self.poll_interval = poll_interval
+        self.owner = owner or lease_owner(os.getpid())
+        self.clock = clock
+        self.commits = 0
+        self.committed_jobs = 0
+        self.recovered = 0
+        self.lease_renewals = 0
+        self.dead_lettered = 0
+        self._renewed_at = clock()
+        self._inserts: List[Tuple[str, asyncio.Future]] = []
+        self._acks: List[int] = []
+        self._releases: List[int] = []
+        self._unclaims: List[int] = []
+        self._ready: asyncio.Queue = asyncio.Queue()
+        self._waiting = 0
+        self._claimable = True
+        self._closing = False
+        self._draining = False
+        self._in_progress = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._data_version: Optional[int] = None
+        self._wake = asyncio.Event()
+        self._empty = asyncio.Event()
+        self._pump: Optional[asyncio.Task] = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='email-queue-db')
+        self._db = self._open(synchronous)
+        self._rows = self._recover()
+        if self._rows == 0:
+            self._empty.set()
+
+    @classmethod
+    def from_env(cls, maxsize: int = 0) -> 'SQLiteJobQueue':
+        return cls(
+            Path(os.getenv('EMAIL_QUEUE_PATH', 'data/email-queue.db')),
+            maxsize=maxsize,
+            lease_seconds=float(os.getenv('EMAIL_QUEUE_LEASE_SECONDS', '60')),
+            max_attempts=int(os.getenv('EMAIL_QUEUE_MAX_ATTEMPTS', '5')),
+            commit_interval=float(os.getenv('EMAIL_QUEUE_COMMIT_INTERVAL_SECONDS', '0')),
+            max_batch_size=int(os.getenv('EMAIL_QUEUE_COMMIT_BATCH_SIZE', '1000')),
+            poll_interval=float(os.getenv('EMAIL_QUEUE_POLL_SECONDS', '0.05')),
+            synchronous=os.getenv('EMAIL_QUEUE_SYNCHRONOUS', 'FULL').upper()
+        )
+
+    def _open(self, synchronous: str) -> sqlite3.Connection:
+        if synchronous not in ('OFF', 'NORMAL', 'FULL', 'EXTRA'):
+            raise ValueError(f"Invalid SQLite synchronous mode: {synchronous}")
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        db = sqlite3.connect(str(self.path), isolation_level=None, check_same_thread=False)
+        db.execute('PRAGMA journal_mode=WAL')
+        db.execute(f'PRAGMA synchronous={synchronous}')
+        db.execute('PRAGMA busy_timeout=5000')
+        db.executescript(SCHEMA)
+        return db
+
+    def _recover(self) -> int:
+        released = self._db.execute(
+            'UPDATE email_jobs SET lease_owner = NULL, leased_until = 0 WHERE lease_owner = ?', (self.owner,)
+        ).rowcount
+        rows = self._db.execute('SELECT COUNT(*) FROM email_jobs').fetchone()[0]
+        self.recovered = rows
+        if rows:
+            log_event('queue_recovered', path=str(self.path), jobs=rows, released_leases=released)
+        return rows
+
+    def qsize(self) -> int:
+        return max(self._rows - self._in_progress, 0)
+
+    def put_nowait(self, args: Tuple[Any, ...]) -> asyncio.Future:
+        if self.maxsize > 0 and self.qsize() >= self.maxsize:
+            raise asyncio.QueueFull
+        committed = asyncio.get_running_loop().create_future()
+        self._inserts.append((json.dumps(args), committed))
+        self._rows += 1
+        self._empty.clear()
+        self._schedule()
+        return committed
+
+    async def put(self, args: Tuple[Any, ...]) -> None:
+        while self.maxsize > 0 and self.qsize() >= self.maxsize:
+            await asyncio.sleep(0.01)
+        await self.put_nowait(args)
+
+    async def get(self) -> LeasedJob:
+        if self._ready.empty():
+            self._waiting += 1
+            self._schedule()
+            try:
+                job = await self._ready.get()
+            finally:
+                self._waiting -= 1
+        else:
+            job = self._ready.get_nowait()
+        self._in_progress += 1
+        self._idle.clear()
+        return job
+
+    def ack(self, job: LeasedJob) -> None:
+        self._finished()
+        self._rows = max(self._rows - 1, 0)
+        self._acks.append(job.id)
+        if self._rows <= 0:
+            self._empty.set()
+        self._schedule()
+
+    def release(self, job: LeasedJob) -> None:
+        self._finished()
+        self._releases.append(job.id)
+        self._schedule()
+
+    def _finished(self) -> None:
+        self._in_progress -= 1
+        if self._in_progress <= 0:
+            self._idle.set()
+
+    async def join(self) -> None:
+        await self._empty.wait()
+
+    async def finish_in_flight(self) -> None:
+        self._draining = True
+        await self._idle.wait()
+
+    async def close(self) -> None:
+        self._closing = True
+        if self._pump is not None:
+            self._wake.set()
+            await self._pump
+            self._pump = None
+        while not self._ready.empty():
+            self._unclaims.append(self._ready.get_nowait().id)
+        if self._inserts or self._acks or self._releases or self._unclaims:
+            await self._flush(claim=False)
+        await asyncio.get_running_loop().run_in_executor(self._executor, self._db.close)
+        self._executor.shutdown(wait=True)
+        logger.info(f"Email queue closed - Commits: {self.commits}, Jobs committed: {self.committed_jobs}, "
+                    f"Jobs left: {self._rows}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'queueBackend': 'sqlite',
+            'queueCommits': self.commits,
+            'queueAvgCommitSize': round(self.committed_jobs / self.commits, 2) if self.commits else None,
+            'queueDeadLettered': self.dead_lettered,
+        }
+
+    def _schedule(self) -> None:
+        if self._pump is None or self._pump.done():
+            self._pump = asyncio.get_running_loop().create_task(self._run(), name='email-queue-commit')
+        self._wake.set()
+
+    def _claim_wanted(self) -> int:
+        return max(self._waiting - self._ready.qsize(), 0)
+
+    def _has_work(self) -> bool:
+        if self._inserts or self._releases or len(self._acks) >= self.max_batch_size:
+            return True
+        return not (self._closing or self._draining) and self._claimable and self._claim_wanted() > 0
+
+    async def _run(self) -> None:
+        while True:
+            if self._renewal_due():
+                await self._renew_leases()
+            if not self._has_work():
+                if self._closing:
+                    return
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    await self._poll()
+                    if self._acks:
+                        await self._flush_safely()
+                continue
+            if self.commit_interval > 0:
+                await asyncio.sleep(self.commit_interval)
+            if not await self._flush_safely() and self._closing:
+                return
+
+    async def _flush_safely(self) -> bool:
+        try:
+            await self._flush()
+            return True
+        except Exception as e:
+            logger.error(f"Email queue commit failed: {str(e)}", exc_info=True)
+            if not self._closing:
+                await asyncio.sleep(self.poll_interval)
+            return False
+
+    def _renewal_due(self) -> bool:
+        if self._in_progress <= 0 and self._ready.empty():
+            return False
+        return self.clock() - self._renewed_at >= self.lease_seconds / 3
+
+    async def _renew_leases(self) -> None:
+        self._renewed_at = self.clock()
+        try:
+            await asyncio.get_running_loop().run_in_executor(self._executor, self._extend_leases)
+        except Exception as e:
+            logger.warning(f"Email queue lease renewal failed: {str(e)}")
+            return
+        self.lease_renewals += 1
+
+    def _extend_leases(self) -> None:
+        self._db.execute(
+            'UPDATE email_jobs SET leased_until = ? WHERE lease_owner = ?',
+            (self.clock() + self.lease_seconds, self.owner)
+        )
+
+    async def _poll(self) -> None:
+        try:
+            rows = await asyncio.get_running_loop().run_in_executor(self._executor, self._rows_if_changed)
+        except Exception as e:
+            logger.warning(f"Email queue poll failed: {str(e)}")
+            return
+        if rows is not None:
+            self._rows = max(rows + len(self._inserts) - len(self._acks), 0)
+            if self._rows == 0:
+                self._empty.set()
+            else:
+                self._empty.clear()
+        self._claimable = True
+
+    def _rows_if_changed(self) -> Optional[int]:
+        version = self._db.execute('PRAGMA data_version').fetchone()[0]
+        if version == self._data_version:
+            return None
+        self._data_version = version
+        return self._db.execute('SELECT COUNT(*) FROM email_jobs').fetchone()[0]
+
+    async def _flush(self, claim: bool = True) -> None:
+        inserts, self._inserts = self._inserts[:self.max_batch_size], self._inserts[self.max_batch_size:]
+        acks, self._acks = self._acks, []
+        releases, self._releases = self._releases, []
+        unclaims, self._unclaims = self._unclaims, []
+        claiming = claim and not (self._closing or self._draining) and (self._claimable or inserts)
+        wanted = self._claim_wanted() if claiming else 0
+        try:
+            claimed, dead = await asyncio.get_running_loop().run_in_executor(
+                self._executor, self._commit, [payload for payload, _ in inserts], acks, releases, unclaims, wanted
+            )
+        except Exception as e:
+            self._acks[:0] = acks
+            self._releases[:0] = releases
+            self._unclaims[:0] = unclaims
+            self._rows -= len(inserts)
+            if self._rows <= 0:
+                self._empty.set()
+            for _, committed in inserts:
+                if not committed.done():
+                    committed.set_exception(e)
+            raise
+        if inserts:
+            self.commits += 1
+            self.committed_jobs += len(inserts)
+        for _, committed in inserts:
+            if not committed.done():
+                committed.set_result(None)
+        if dead:
+            self.dead_lettered += dead
+            self._rows = max(self._rows - dead, 0)
+            if self._rows == 0:
+                self._empty.set()
+            log_event('queue_dead_lettered', logging.ERROR, jobs=dead, max_attempts=self.max_attempts)
+        self._claimable = len(claimed) >= wanted
+        for job in claimed:
+            self._ready.put_nowait(job)
+
+    def _commit(
+        self, inserts: List[str], acks: List[int], releases: List[int], unclaims: List[int], claim: int
+    ) -> Tuple[List[LeasedJob], int]:
+        now = self.clock()
+        if not (inserts or acks or releases or unclaims) and (claim <= 0 or not self._claimable_rows(now)):
+            return [], 0
+        self._db.execute('BEGIN IMMEDIATE')
+        try:
+            self._db.executemany(
+                'INSERT INTO email_jobs (payload, enqueued_at) VALUES (?, ?)', [(payload, now) for payload in inserts]
+            )
+            self._db.executemany('DELETE FROM email_jobs WHERE id = ?', [(job_id,) for job_id in acks])
+            self._db.executemany(
+                'UPDATE email_jobs SET lease_owner = NULL, leased_until = 0 WHERE id = ?',
+                [(job_id,) for job_id in releases]
+            )
+            self._db.executemany(
+                'UPDATE email_jobs SET lease_owner = NULL, leased_until = 0, attempts = attempts - 1 WHERE id = ?',
+                [(job_id,) for job_id in unclaims]
+            )
+            claimed, dead = [], 0
+            if claim > 0:
+                dead = self._dead_letter(now)
+                rows = self._db.execute(
+                    f'SELECT id, payload, attempts FROM email_jobs WHERE {CLAIMABLE} ORDER BY id LIMIT ?',
+                    (now, self.owner, claim)
+                ).fetchall()
+                self._db.executemany(
+                    'UPDATE email_jobs SET lease_owner = ?, leased_until = ?, attempts = attempts + 1 WHERE id = ?',
+                    [(self.owner, now + self.lease_seconds, job_id) for job_id, _, _ in rows]
+                )
+                claimed = [LeasedJob(job_id, tuple(json.loads(payload)), attempts + 1)
+                           for job_id, payload, attempts in rows]
+            self._db.execute('COMMIT')
+        except BaseException:
+            self._db.execute('ROLLBACK')
+            raise
+        return claimed, dead
+
+    def _dead_letter(self, now: float) -> int:
+        exhausted = f'{CLAIMABLE} AND attempts >= ?'
+        params = (now, self.owner, self.max_attempts)
+        self._db.execute(
+            'INSERT INTO email_jobs_dead (id, payload, enqueued_at, attempts, dead_at) '
+            f'SELECT id, payload, enqueued_at, attempts, ? FROM email_jobs WHERE {exhausted}', (now, *params)
+        )
+        return self._db.execute(f'DELETE FROM email_jobs WHERE {exhausted}', params).rowcount
+
+    def _claimable_rows(self, now: float) -> bool:
+        return self._db.execute(
+            f'SELECT 1 FROM email_jobs WHERE {CLAIMABLE} LIMIT 1', (now, self.owner)
+        ).fetchone() is not None
@@ -1,42 +1,93 @@
 import os
 import json
+import time
 import asyncio
-from typing import Dict, Any
+import logging
+import functools
+import itertools
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
 from dotenv import load_dotenv
-from logger_config import logger
+from logger_config import logger, log_event
+from services.worker_pool import EmailWorkerPool, QueueFullError
+from services.durable_queue import SQLiteJobQueue
+from services.admission import AdmissionController, AdmissionDecision, ADMITTED, STATUS_SERVICE_UNAVAILABLE
+from services.sendgrid_client import SendGridError, SendGridTransport, build_batch_payload, build_mail_payload
+from services.send_batcher import SendBatcher
+from services.firestore_writer import FirestoreWriteBehind
+from services.dedupe import Deduplicator, dedupe_key
+from services.task_store import TaskStore
+from services.resilience import CircuitOpenError, ResilientSender, STATE_OPEN
+from services.rate_limit import OutboundRateLimiter
+from services.domain_check import DomainChecker
+from request_timing import stage
+from services.metrics import (
+    ENQUEUE_SECONDS, ENQUEUED, SEND_BATCH_SIZE, SEND_SECONDS, SENDS, labelled,
+    track_worker_pool
+)
+from models import EmailTaskResult
+from cloud_functions.send_email.email_template import get_template, render_email
 
 load_dotenv()
 
 USE_GCP = os.getenv('USE_GCP', 'false').lower() == 'true'
 LOCAL_MODE = not USE_GCP
 
-if USE_GCP:
-    from google.cloud import tasks_v2
-    from google.cloud.firestore import Client as FirestoreClient
-    from sendgrid import SendGridAPIClient
-    from sendgrid.helpers.mail import Mail
+tasks_v2 = None
 
 
-async def send_email_task(user_id: str, email: str) -> Dict[str, Any]:
-    logger.info("-" * 60)
-    logger.info(f"EMAIL JOB STARTED - Processing email for registered user")
-    logger.info(f"User ID: {user_id}")
-    logger.info(f"Email: {email}")
-    logger.info(f"Job execution started")
-    
+def _load_tasks_v2():
+    global tasks_v2
+    if tasks_v2 is None:
+        from google.cloud import tasks_v2 as tasks_module
+        tasks_v2 = tasks_module
+    return tasks_v2
+
+
+def firestore_status_updates_enabled() -> bool:
+    default = 'true' if USE_GCP or os.getenv('FIRESTORE_EMULATOR_HOST') else 'false'
+    return os.getenv('FIRESTORE_STATUS_UPDATES', default).lower() == 'true'
+
+
+async def _record_email_sent(status_writer: FirestoreWriteBehind, user_id: str, message_id: str) -> None:
+    try:
+        await status_writer.record_email_sent(user_id, message_id)
+    except Exception as e:
+        log_event('status_update_failed', logging.WARNING, exc_info=True, user_id=user_id, error=str(e))
+
+
+def _local_task_id(user_id: str, email: str) -> str:
+    return f'task-{user_id}-{email}'
+
+
+def _elapsed_ms(started: float) -> float:
+    return round((time.perf_counter() - started) * 1000, 2)
+
+
+async def _send(transport: SendGridTransport, payload: Dict[str, Any], resilience: Optional[ResilientSender]):
+    if resilience is None:
+        return await transport.send(payload)
+    return await resilience.call(lambda: transport.send(payload))
+
+
+async def send_email_task(
+    user_id: str,
+    email: str,
+    transport: Optional[SendGridTransport] = None,
+    status_writer: Optional[FirestoreWriteBehind] = None,
+    resilience: Optional[ResilientSender] = None
+) -> Dict[str, Any]:
+    started = time.perf_counter()
+    sendgrid_api_key = os.getenv('SENDGRID_API_KEY')
+    if not sendgrid_api_key:
+        mode = 'local-simulated'
+    else:
+        mode = 'gcp-sendgrid' if USE_GCP else 'local-sendgrid'
     try:
-        sendgrid_api_key = os.getenv('SENDGRID_API_KEY')
-        
         if not sendgrid_api_key:
-            logger.info(f"[LOCAL MODE] Simulating email send")
-            logger.info(f"Recipient: {email}")
-            logger.info(f"User ID: {user_id}")
-            logger.info(f"Processing (simulated delay)...")
             await asyncio.sleep(1)
-            logger.info(f"Email simulation completed successfully")
-            logger.info(f"User ID: {user_id}")
-            logger.info(f"Email: {email}")
-            logger.info("-" * 60)
+            labelled(SEND_SECONDS, mode).observe(time.perf_counter() - started)
+            labelled(SENDS, mode, 'success').inc()
+            log_event('sent', user_id=user_id, mode=mode, duration_ms=_elapsed_ms(started))
             return {
                 'success': True,
                 'messageId': f'msg-{user_id}',
@@ -46,71 +97,52 @@ async def send_email_task(user_id: str, email: str) -> Dict[str, Any]:
             }
         
         from_email = os.getenv('SENDGRID_FROM_EMAIL', 'noreply@yourapp.com')
-        logger.info(f"[SENDGRID] Sending email via SendGrid")
-        logger.info(f"From: {from_email}")
-        logger.info(f"To: {email}")
-        logger.info(f"User ID: {user_id}")
+        rendered = render_email('welcome', os.getenv('EMAIL_TEMPLATE_LOCALE'), user_id=user_id)
         
-        html_content = f'''
-        <html>
-            <body>
-                <h1>Welcome!</h1>
-                <p>Thank you for registering with us!</p>
-                <p>Your user ID: {user_id}</p>
-                <p>We're excited to have you on board.</p>
-            </body>
-        </html>
-        '''
-        
-        message = Mail(
+        payload = build_mail_payload(
             from_email=from_email,
-            to_emails=email,
-            subject='Welcome to Our App!',
-            html_content=html_content
+            to_email=email,
+            subject=rendered.subject,
+            html_content=rendered.html,
+            text_content=rendered.text
         )
         
-        loop = asyncio.get_event_loop()
-        sg = SendGridAPIClient(sendgrid_api_key)
-        logger.info(f"   → Sending email through SendGrid API...")
-        response = await loop.run_in_executor(None, sg.send, message)
-        logger.info(f"Email sent successfully via SendGrid")
-        logger.info(f"Status Code: {response.status_code}")
-        logger.info(f"User ID: {user_id}")
-        logger.info(f"Email: {email}")
-        logger.info("-" * 60)
+        send_started = time.perf_counter()
+        if transport is None:
+            async with SendGridTransport.from_env(sendgrid_api_key) as one_off_transport:
+                response = await _send(one_off_transport, payload, resilience)
+        else:
+            response = await _send(transport, payload, resilience)
+        labelled(SEND_SECONDS, mode).observe(time.perf_counter() - send_started)
         
-        if USE_GCP:
-            try:
-                logger.info(f"Updating Firestore with email status")
-                logger.info(f"User ID: {user_id}")
-                db = FirestoreClient()
-                user_ref = db.collection('users').document(user_id)
-                user_ref.update({
-                    'emailSent': True,
-                    'emailSentAt': FirestoreClient.SERVER_TIMESTAMP,
-                    'emailMessageId': str(response.status_code)
-                })
-                logger.info(f"Firestore updated successfully")
-                logger.info(f"User ID: {user_id}")
-                logger.info(f"Email sent status: True")
-            except Exception as e:
-                logger.warning(f"Could not update Firestore: {str(e)}", exc_info=True)
+        if status_writer is not None:
+            await _record_email_sent(status_writer, user_id, response.message_id)
         
-        mode = 'gcp-sendgrid' if USE_GCP else 'local-sendgrid'
+        labelled(SENDS, mode, 'success').inc()
+        log_event('sent', user_id=user_id, mode=mode, status_code=response.status_code,
+                  duration_ms=_elapsed_ms(started))
         return {
             'success': True,
-            'messageId': f'msg-{user_id}',
+            'messageId': response.message_id,
             'email': email,
             'userId': user_id,
             'statusCode': response.status_code,
             'mode': mode
         }
+    except CircuitOpenError as e:
+        labelled(SENDS, mode, 'circuit_open').inc()
+        log_event('send_failed', logging.WARNING, user_id=user_id, email=email, error=str(e), reason='circuit_open',
+                  duration_ms=_elapsed_ms(started))
+        return {
+            'success': False,
+            'error': str(e),
+            'email': email,
+            'userId': user_id
+        }
     except Exception as e:
-        logger.error(f"ERROR in email job execution")
-        logger.error(f"User ID: {user_id}")
-        logger.error(f"Email: {email}")
-        logger.error(f"Error: {str(e)}", exc_info=True)
-        logger.info("-" * 60)
+        labelled(SENDS, mode, 'failure').inc()
+        log_event('send_failed', logging.ERROR, exc_info=True, user_id=user_id, email=email, error=str(e),
+                  duration_ms=_elapsed_ms(started))
         return {
             'success': False,
             'error': str(e),
@@ -119,9 +151,94 @@ async def send_email_task(user_id: str, email: str) -> Dict[str, Any]:
         }
 
 
+async def send_email_batch_task(
+    template: str,
+    locale: Optional[str],
+    jobs: List[Tuple[str, str]],
+    transport: Optional[SendGridTransport] = None,
+    status_writer: Optional[FirestoreWriteBehind] = None,
+    resilience: Optional[ResilientSender] = None
+) -> List[Dict[str, Any]]:
+    sendgrid_api_key = os.getenv('SENDGRID_API_KEY')
+    if not sendgrid_api_key or len(jobs) == 1:
+        return list(await asyncio.gather(*(
+            send_email_task(user_id, email, transport, status_writer, resilience) for user_id, email in jobs
+        )))
+
+    started = time.perf_counter()
+    mode = 'gcp-sendgrid' if USE_GCP else 'local-sendgrid'
+    try:
+        email_template = get_template(template, locale)
+        rendered = email_template.render_placeholders()
+        payload = build_batch_payload(
+            from_email=os.getenv('SENDGRID_FROM_EMAIL', 'noreply@yourapp.com'),
+            recipients=[(email, email_template.substitutions({'user_id': user_id})) for user_id, email in jobs],
+            subject=rendered.subject,
+            html_content=rendered.html,
+            text_content=rendered.text
+        )
+        if transport is None:
+            async with SendGridTransport.from_env(sendgrid_api_key) as one_off_transport:
+                response = await _send(one_off_transport, payload, resilience)
+        else:
+            response = await _send(transport, payload, resilience)
+        labelled(SEND_SECONDS, mode).observe(time.perf_counter() - started)
+        SEND_BATCH_SIZE.observe(len(jobs))
+    except SendGridError as e:
+        if e.status_code != 400:
+            return _batch_failed(jobs, mode, e, started)
+        log_event('batch_rejected', logging.WARNING, batch_size=len(jobs), error=str(e))
+        return list(await asyncio.gather(*(
+            send_email_task(user_id, email, transport, status_writer, resilience) for user_id, email in jobs
+        )))
+    except CircuitOpenError as e:
+        return _batch_failed(jobs, mode, e, started, reason='circuit_open')
+    except Exception as e:
+        return _batch_failed(jobs, mode, e, started)
+
+    results = []
+    for user_id, email in jobs:
+        if status_writer is not None:
+            await _record_email_sent(status_writer, user_id, response.message_id)
+        labelled(SENDS, mode, 'success').inc()
+        log_event('sent', user_id=user_id, mode=mode, status_code=response.status_code, batch_size=len(jobs),
+                  duration_ms=_elapsed_ms(started))
+        results.append({
+            'success': True,
+            'messageId': response.message_id,
+            'email': email,
+            'userId': user_id,
+            'statusCode': response.status_code,
+            'mode': mode
+        })
+    return results
+
+
+def _batch_failed(
+    jobs: List[Tuple[str, str]], mode: str, error: Exception, started: float, reason: str = 'failure'
+) -> List[Dict[str, Any]]:
+    labelled(SENDS, mode, reason).inc(len(jobs))
+    level = logging.WARNING if reason == 'circuit_open' else logging.ERROR
+    for user_id, email in jobs:
+        log_event('send_failed', level, user_id=user_id, email=email, error=str(error), reason=reason,
+                  batch_size=len(jobs), duration_ms=_elapsed_ms(started))
+    return [{'success': False, 'error': str(error), 'email': email, 'userId': user_id} for user_id, email in jobs]
+
+
+# The send_email Cloud Function updates Firestore in one batch, which allows 500 writes.
+GCP_TASKS_MAX_BATCH_SIZE = 500
+
+
 class EmailService:
     def __init__(self):
         logger.info(f"Initializing EmailService ({'GCP' if USE_GCP else 'Local'})")
+        self.sendgrid_transport: Optional[SendGridTransport] = None
+        self.status_writer: Optional[FirestoreWriteBehind] = None
+        if firestore_status_updates_enabled():
+            self.status_writer = FirestoreWriteBehind.from_env()
+        self.dedupe = Deduplicator.from_env()
+        self.task_store = TaskStore.from_env()
+        self.domain_check = DomainChecker.from_env()
         if USE_GCP:
             self._init_gcp()
         else:
@@ -129,14 +246,28 @@ class EmailService:
     
     def _init_gcp(self):
         try:
-            self.tasks_client = tasks_v2.CloudTasksClient()
+            self._credentials = self._load_gcp_credentials()
+            self.tasks_client = None
             self.project_id = os.getenv('GCP_PROJECT_ID', 'demo-project')
             self.location = os.getenv('GCP_LOCATION', 'us-central1')
             self.queue_name = os.getenv('GCP_QUEUE_NAME', 'email-queue')
+            self.tasks_timeout = float(os.getenv('GCP_TASKS_TIMEOUT_SECONDS', '10'))
+            self._tasks_in_flight = asyncio.Semaphore(int(os.getenv('GCP_TASKS_MAX_IN_FLIGHT', '100')))
+            self.task_batcher = None
+            tasks_batch_size = int(os.getenv('GCP_TASKS_BATCH_SIZE', '1'))
+            if tasks_batch_size > 1 and self.dedupe is not None:
+                logger.warning("GCP_TASKS_BATCH_SIZE ignored: packed Cloud Tasks are not named per job, so they "
+                               "cannot be deduplicated; set EMAIL_DEDUPE_TTL_SECONDS=0 to pack tasks")
+            elif tasks_batch_size > 1:
+                self.task_batcher = SendBatcher(
+                    self._create_batch_task,
+                    max_batch_size=min(tasks_batch_size, GCP_TASKS_MAX_BATCH_SIZE),
+                    max_wait=float(os.getenv('GCP_TASKS_BATCH_WINDOW_SECONDS', '0.05'))
+                )
             
             logger.info(f"GCP config - Project: {self.project_id}, Location: {self.location}, Queue: {self.queue_name}")
             
-            parent = self.tasks_client.queue_path(
+            parent = _load_tasks_v2().CloudTasksAsyncClient.queue_path(
                 self.project_id, 
                 self.location, 
                 self.queue_name
@@ -155,39 +286,338 @@ class EmailService:
             USE_GCP = False
             LOCAL_MODE = True
     
+    def _load_gcp_credentials(self):
+        if os.getenv('CLOUD_TASKS_EMULATOR_HOST'):
+            from google.auth.credentials import AnonymousCredentials
+            return AnonymousCredentials()
+        import google.auth
+        credentials, _ = google.auth.default()
+        return credentials
+    
+    def _get_tasks_client(self):
+        if self.tasks_client is None:
+            emulator_host = os.getenv('CLOUD_TASKS_EMULATOR_HOST')
+            if emulator_host:
+                import grpc
+                from google.cloud.tasks_v2.services.cloud_tasks.transports import CloudTasksGrpcAsyncIOTransport
+                logger.info(f"Using Cloud Tasks emulator at {emulator_host}")
+                channel = grpc.aio.insecure_channel(emulator_host)
+                self.tasks_client = _load_tasks_v2().CloudTasksAsyncClient(
+                    transport=CloudTasksGrpcAsyncIOTransport(channel=channel)
+                )
+            else:
+                self.tasks_client = _load_tasks_v2().CloudTasksAsyncClient(credentials=self._credentials)
+        return self.tasks_client
+    
     def _init_local(self):
-        self.task_queue = asyncio.Queue()
-        self._background_task = None
-        logger.info("Local mode initialized")
+        concurrency = int(os.getenv('EMAIL_WORKER_CONCURRENCY', '4'))
+        maxsize = int(os.getenv('EMAIL_QUEUE_MAXSIZE', '1000'))
+        backend = os.getenv('EMAIL_QUEUE_BACKEND', 'memory').lower()
+        if backend == 'sqlite':
+            self.job_queue = SQLiteJobQueue.from_env(maxsize)
+        elif backend == 'memory':
+            self.job_queue = None
+        else:
+            raise ValueError(f"Unknown EMAIL_QUEUE_BACKEND: {backend}")
+        self.run_workers = os.getenv('EMAIL_WORKERS_ENABLED', 'true').lower() == 'true'
+        if not self.run_workers and self.job_queue is None:
+            raise ValueError("EMAIL_WORKERS_ENABLED=false needs EMAIL_QUEUE_BACKEND=sqlite so other processes can send")
+        self.send_batcher = SendBatcher.from_env(self._send_batch)
+        if self.send_batcher is not None and concurrency < 2 * self.send_batcher.max_batch_size:
+            # Each worker waits for its job's batch, so batches can only fill with enough workers; twice the
+            # batch size lets the next batch fill while the previous one is being sent.
+            concurrency = 2 * self.send_batcher.max_batch_size
+            logger.info(f"Send batching enabled, raising email workers to {concurrency}")
+        self.worker_pool = EmailWorkerPool(
+            self._process_job, concurrency=concurrency, maxsize=maxsize, queue=self.job_queue
+        )
+        self.task_queue = self.worker_pool.queue
+        self.resilience = ResilientSender.from_env()
+        self.rate_limiter = OutboundRateLimiter.from_env()
+        track_worker_pool(lambda: self.worker_pool.queue_depth, lambda: self.worker_pool.in_flight)
+        self.admission = AdmissionController(
+            high_watermark=int(os.getenv('EMAIL_ADMISSION_HIGH_WATERMARK', str(int(maxsize * 0.8)))),
+            max_wait_seconds=float(os.getenv('EMAIL_ADMISSION_MAX_WAIT_SECONDS', '30')),
+            max_retry_after=int(os.getenv('EMAIL_ADMISSION_MAX_RETRY_AFTER', '120'))
+        )
+        logger.info(f"Local mode initialized - Workers: {concurrency if self.run_workers else 0}, "
+                    f"Queue capacity: {maxsize}, Queue: {backend}")
+    
+    async def start(self):
+        if hasattr(self, 'worker_pool'):
+            self._ensure_workers()
+        if self.status_writer is not None:
+            self.status_writer.start()
+    
+    async def warm_up(self):
+        timeout = float(os.getenv('EMAIL_WARMUP_TIMEOUT_SECONDS', '5'))
+        if USE_GCP and hasattr(self, 'tasks_client'):
+            try:
+                client = self._get_tasks_client()
+                await asyncio.wait_for(client.transport.grpc_channel.channel_ready(), timeout=timeout)
+                logger.info("Cloud Tasks channel ready")
+            except Exception as e:
+                logger.warning(f"Cloud Tasks warm-up failed, connecting on first request: {str(e)}")
+        if hasattr(self, 'worker_pool'):
+            self._get_sendgrid_transport()
+        if self.status_writer is not None and self.status_writer.client is None:
+            try:
+                self.status_writer.client = self.status_writer.client_factory()
+            except Exception as e:
+                logger.warning(f"Firestore warm-up failed, connecting on first write: {str(e)}")
+    
+    async def stop(self):
+        if hasattr(self, 'worker_pool'):
+            timeout = float(os.getenv('EMAIL_SHUTDOWN_TIMEOUT_SECONDS', '10'))
+            await self.worker_pool.stop(timeout=timeout)
+            if self.job_queue is not None:
+                await self.job_queue.close()
+        if self.status_writer is not None:
+            await self.status_writer.stop()
+        if getattr(self, 'tasks_client', None) is not None:
+            await self.tasks_client.transport.close()
+            self.tasks_client = None
+        if self.sendgrid_transport is not None:
+            await self.sendgrid_transport.aclose()
+            self.sendgrid_transport = None
+        if self.dedupe is not None:
+            self.dedupe.close()
+        if self.domain_check is not None:
+            self.domain_check.close()
+    
+    def stats(self) -> Dict[str, Any]:
+        deduplicated = self.dedupe.hits if self.dedupe is not None else 0
+        domain_stats = self.domain_check.stats() if self.domain_check is not None else {}
+        if hasattr(self, 'worker_pool'):
+            rate_limit_stats = self.rate_limiter.stats() if self.rate_limiter is not None else {}
+            batch_stats = self.send_batcher.stats() if self.send_batcher is not None else {}
+            queue_stats = self.job_queue.stats() if self.job_queue is not None else {'queueBackend': 'memory'}
+            return {
+                'mode': 'local',
+                **self.worker_pool.stats(),
+                **queue_stats,
+                **self.admission.stats(),
+                **self.resilience.stats(),
+                **rate_limit_stats,
+                **batch_stats,
+                **domain_stats,
+                'deduplicated': deduplicated
+            }
+        return {'mode': 'gcp', **domain_stats, 'deduplicated': deduplicated}
+    
+    def admit(self) -> AdmissionDecision:
+        if not hasattr(self, 'worker_pool'):
+            return ADMITTED
+        if self.resilience.breaker.state == STATE_OPEN:
+            decision = self.admission.shed_open_circuit(self.resilience.breaker.retry_after())
+        else:
+            decision = self.admission.check(self.worker_pool.stats())
+        if not decision.admitted:
+            log_event('shed', logging.WARNING, reason=decision.reason, retry_after=decision.retry_after)
+        return decision
+    
+    def shed_queue_full(self) -> AdmissionDecision:
+        stats = self.worker_pool.stats()
+        retry_after = self.admission.retry_after(stats['queueDepth'], stats['concurrency'], self.worker_pool.avg_latency)
+        decision = self.admission.reject(STATUS_SERVICE_UNAVAILABLE, 'queue_full', retry_after)
+        log_event('shed', logging.WARNING, reason=decision.reason, retry_after=decision.retry_after)
+        return decision
+    
+    async def accepts_recipient(self, email: str) -> bool:
+        if self.domain_check is None:
+            return True
+        return await self.domain_check.accepts(email)
+    
+    async def accepts_recipients(self, emails: List[str]) -> List[bool]:
+        if self.domain_check is None:
+            return [True] * len(emails)
+        return await self.domain_check.accepts_many(emails)
+    
+    def _ensure_workers(self) -> None:
+        if self.run_workers and not self.worker_pool.running:
+            self.worker_pool.start()
+    
+    def _get_sendgrid_transport(self) -> Optional[SendGridTransport]:
+        sendgrid_api_key = os.getenv('SENDGRID_API_KEY')
+        if not sendgrid_api_key:
+            return None
+        if self.sendgrid_transport is None or self.sendgrid_transport.closed:
+            self.sendgrid_transport = SendGridTransport.from_env(sendgrid_api_key)
+        return self.sendgrid_transport
+    
+    def _record_queued(self, task_id: str, user_id: str, email: str, mode: str) -> None:
+        if self.task_store is not None:
+            self.task_store.record_queued(task_id, user_id, email, mode)
+    
+    def get_task(self, task_id: str) -> Optional[EmailTaskResult]:
+        if self.task_store is None:
+            return None
+        return self.task_store.get(task_id)
+    
+    async def _process_job(self, user_id: str, email: str) -> Dict[str, Any]:
+        try:
+            result = await self._send_job(user_id, email)
+        except Exception:
+            await self._forget_enqueue(user_id, email)
+            raise
+        if not result.get('success'):
+            await self._forget_enqueue(user_id, email)
+        if self.task_store is not None:
+            self.task_store.record_result(_local_task_id(user_id, email), result)
+        return result
+    
+    async def _send_job(self, user_id: str, email: str) -> Dict[str, Any]:
+        if self.rate_limiter is not None:
+            await self.rate_limiter.acquire(email)
+        if self.send_batcher is not None:
+            return await self.send_batcher.submit(('welcome', os.getenv('EMAIL_TEMPLATE_LOCALE')), (user_id, email))
+        return await send_email_task(
+            user_id,
+            email,
+            transport=self._get_sendgrid_transport(),
+            status_writer=self.status_writer,
+            resilience=self.resilience
+        )
+    
+    async def _forget_enqueue(self, user_id: str, email: str) -> None:
+        # A failed send must not be remembered as queued, or a retry would be dropped as a duplicate.
+        if self.dedupe is not None:
+            await self.dedupe.forget(dedupe_key(user_id, email))
+    
+    async def _send_batch(self, key: Tuple[str, Optional[str]], jobs: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+        template, locale = key
+        return await send_email_batch_task(
+            template,
+            locale,
+            jobs,
+            transport=self._get_sendgrid_transport(),
+            status_writer=self.status_writer,
+            resilience=self.resilience
+        )
+    
+    async def _queue_once(
+        self, user_id: str, email: str, task_id: Optional[str], enqueue: Callable[[], Awaitable[str]]
+    ) -> Tuple[str, bool]:
+        if self.dedupe is None:
+            return await enqueue(), False
+        return await self.dedupe.run(dedupe_key(user_id, email), task_id, enqueue)
+    
+    def _gcp_task_name(self, user_id: str, email: str) -> Optional[str]:
+        if self.dedupe is None:
+            return None
+        window = int(time.time() // self.dedupe.ttl)
+        return f'{self.queue_path}/tasks/email-{dedupe_key(user_id, email)}-{window}'
+    
+    def _queue_gcp_once(self, user_id: str, email: str) -> Awaitable[Tuple[str, bool]]:
+        task_name = self._gcp_task_name(user_id, email)
+        return self._queue_once(user_id, email, task_name, lambda: self._queue_gcp_task(user_id, email, task_name))
     
     async def queue_email(self, user_id: str, email: str) -> str:
-        logger.info(f"Queueing email job - User: {user_id}, Email: {email}")
+        started = time.perf_counter()
         try:
             if USE_GCP and hasattr(self, 'tasks_client'):
-                logger.info(f"Using GCP Cloud Tasks for job creation")
-                return self._queue_gcp_task(user_id, email)
+                mode = 'gcp'
+                task_id, duplicate = await self._queue_gcp_once(user_id, email)
             else:
-                logger.info(f"Using local asyncio for job creation")
-                return await self._queue_local_task(user_id, email)
+                mode = 'local'
+                task_id, duplicate = await self._queue_once(
+                    user_id, email, _local_task_id(user_id, email), lambda: self._queue_local_task(user_id, email)
+                )
+        except QueueFullError:
+            labelled(ENQUEUED, 'local', 'queue_full').inc()
+            raise
         except Exception as e:
-            logger.error(f"Failed to queue email job for {user_id}: {str(e)}", exc_info=True)
+            labelled(ENQUEUED, mode, 'failure').inc()
+            log_event('enqueue_failed', logging.ERROR, exc_info=True, user_id=user_id, email=email, error=str(e),
+                      duration_ms=_elapsed_ms(started))
             raise Exception(f"Failed to queue email task: {str(e)}")
+        labelled(ENQUEUE_SECONDS, mode).observe(time.perf_counter() - started)
+        labelled(ENQUEUED, mode, 'duplicate' if duplicate else 'queued').inc()
+        log_event('duplicate' if duplicate else 'queued', task_id=task_id, user_id=user_id, mode=mode,
+                  duration_ms=_elapsed_ms(started))
+        return task_id
+    
+    async def queue_email_batch(
+        self, jobs: Iterable[Tuple[Any, str, str]]
+    ) -> AsyncIterator[Tuple[Any, Optional[str], Optional[str]]]:
+        if USE_GCP and hasattr(self, 'tasks_client'):
+            mode = 'gcp'
+            results = self._queue_gcp_batch(jobs)
+        else:
+            mode = 'local'
+            results = self._queue_local_batch(jobs)
+        async for key, task_id, error, duplicate in results:
+            if error is None:
+                labelled(ENQUEUED, mode, 'duplicate' if duplicate else 'queued').inc()
+                log_event('duplicate' if duplicate else 'queued', task_id=task_id, mode=mode, batch_item=key)
+            else:
+                labelled(ENQUEUED, mode, 'failure').inc()
+                log_event('enqueue_failed', logging.ERROR, mode=mode, batch_item=key, error=error)
+            yield key, task_id, error
     
-    def _queue_gcp_task(self, user_id: str, email: str) -> str:
-        logger.info(f"Creating GCP Cloud Task job")
-        logger.info(f"User ID: {user_id}")
-        logger.info(f"Email: {email}")
-        logger.info(f"Queue: {self.queue_name}")
-        logger.info(f"Handler URL: {self.email_handler_url}")
+    async def _queue_gcp_batch(self, jobs: Iterable[Tuple[Any, str, str]]):
+        concurrency = int(os.getenv('EMAIL_BATCH_GCP_CONCURRENCY', '16'))
+        jobs = iter(jobs)
+        pending: Dict[asyncio.Future, Any] = {}
         
-        task_payload = {
-            'userId': user_id,
-            'email': email
-        }
+        def schedule(job: Tuple[Any, str, str]) -> None:
+            key, user_id, email = job
+            pending[asyncio.ensure_future(self._queue_gcp_once(user_id, email))] = key
+        
+        for job in itertools.islice(jobs, concurrency):
+            schedule(job)
         
+        while pending:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for future in done:
+                key = pending.pop(future)
+                try:
+                    task_id, duplicate = future.result()
+                    yield key, task_id, None, duplicate
+                except Exception as e:
+                    yield key, None, f"Failed to queue email task: {str(e)}", False
+                next_job = next(jobs, None)
+                if next_job is not None:
+                    schedule(next_job)
+    
+    async def _queue_local_batch(self, jobs: Iterable[Tuple[Any, str, str]]):
+        self._ensure_workers()
+        for key, user_id, email in jobs:
+            task_id = _local_task_id(user_id, email)
+            task_id, duplicate = await self._queue_once(
+                user_id, email, task_id, functools.partial(self._put_local_task, user_id, email, task_id)
+            )
+            yield key, task_id, None, duplicate
+    
+    async def _put_local_task(self, user_id: str, email: str, task_id: str) -> str:
+        await self.worker_pool.put(user_id, email)
+        self._record_queued(task_id, user_id, email, 'local')
+        return task_id
+    
+    async def _queue_gcp_task(self, user_id: str, email: str, task_name: Optional[str] = None) -> str:
+        with stage('cloud_tasks'):
+            if self.task_batcher is not None:
+                task_id = await self.task_batcher.submit(None, (user_id, email))
+            else:
+                try:
+                    task_id = await self._create_task({'userId': user_id, 'email': email}, task_name)
+                except Exception as e:
+                    from google.api_core.exceptions import AlreadyExists
+                    if task_name is None or not isinstance(e, AlreadyExists):
+                        raise
+                    log_event('duplicate', task_id=task_name, user_id=user_id, mode='gcp', source='cloud_tasks')
+                    task_id = task_name
+        self._record_queued(task_id, user_id, email, 'gcp')
+        return task_id
+    
+    async def _create_batch_task(self, key: Any, jobs: List[Tuple[str, str]]) -> List[str]:
+        task_name = await self._create_task([{'userId': user_id, 'email': email} for user_id, email in jobs])
+        return [f'{task_name}/jobs/{i}' for i in range(len(jobs))]
+    
+    async def _create_task(self, task_payload: Any, task_name: Optional[str] = None) -> str:
         task = {
             'http_request': {
-                'http_method': tasks_v2.HttpMethod.POST,
+                'http_method': _load_tasks_v2().HttpMethod.POST,
                 'url': self.email_handler_url,
                 'headers': {
                     'Content-Type': 'application/json',
@@ -195,41 +625,36 @@ class EmailService:
                 'body': json.dumps(task_payload).encode(),
             }
         }
+        if task_name is not None:
+            task['name'] = task_name
         
-        response = self.tasks_client.create_task(
-            request={
-                'parent': self.queue_path,
-                'task': task
-            }
-        )
-        
-        logger.info(f"GCP Cloud Task job created successfully")
-        logger.info(f"Task ID: {response.name}")
-        logger.info(f"User ID: {user_id}")
+        client = self._get_tasks_client()
+        async with self._tasks_in_flight:
+            response = await client.create_task(
+                request={
+                    'parent': self.queue_path,
+                    'task': task
+                },
+                timeout=self.tasks_timeout
+            )
         return response.name
     
     async def _queue_local_task(self, user_id: str, email: str) -> str:
-        import time
-        
-        logger.info(f"Creating local async email job")
-        logger.info(f"User ID: {user_id}")
-        logger.info(f"Email: {email}")
-        
         start_time = time.time()
         min_delay = float(os.getenv('EMAIL_MIN_DELAY_SECONDS', '1.0'))
         
-        task_id = f'task-{user_id}-{email}'
-        logger.info(f"Task ID: {task_id}")
-        logger.info(f"Starting background email processing...")
+        task_id = _local_task_id(user_id, email)
         
-        asyncio.create_task(send_email_task(user_id, email))
+        self._ensure_workers()
+        with stage('enqueue'):
+            committed = self.worker_pool.submit(user_id, email)
+            if committed is not None:
+                await committed
+            self._record_queued(task_id, user_id, email, 'local')
         
         elapsed_time = time.time() - start_time
         if elapsed_time < min_delay:
-            await asyncio.sleep(min_delay - elapsed_time)
+            with stage('pad'):
+                await asyncio.sleep(min_delay - elapsed_time)
         
-        logger.info(f"Local email job created and queued successfully")
-        logger.info(f"Task ID: {task_id}")
-        logger.info(f"User ID: {user_id}")
-        logger.info(f"Job is now processing in background")
         return task_id
@@ -0,0 +1,139 @@
+import asyncio
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from logger_config import logger
+from services.metrics import FIRESTORE_UPDATE_SECONDS, labelled
+
+FIRESTORE_MAX_BATCH_SIZE = 500
+
+
+def _default_client_factory():
+    from google.cloud import firestore
+    return firestore.AsyncClient(project=os.getenv('GCP_PROJECT_ID', 'demo-project'))
+
+
+def _server_timestamp():
+    from google.cloud import firestore
+    return firestore.SERVER_TIMESTAMP
+
+
+class FirestoreWriteBehind:
+    def __init__(
+        self,
+        client_factory: Callable[[], Any] = _default_client_factory,
+        collection: str = 'users',
+        max_batch_size: int = FIRESTORE_MAX_BATCH_SIZE,
+        flush_interval: float = 1.0,
+        max_pending: int = 5000,
+        server_timestamp: Callable[[], Any] = _server_timestamp
+    ):
+        self.client_factory = client_factory
+        self.collection = collection
+        self.max_batch_size = min(max_batch_size, FIRESTORE_MAX_BATCH_SIZE)
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.server_timestamp = server_timestamp
+        self.client = None
+        self.writes = 0
+        self.commits = 0
+        self.coalesced = 0
+        self.failed = 0
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._wake = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._flusher: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_env(cls) -> 'FirestoreWriteBehind':
+        return cls(
+            max_batch_size=int(os.getenv('FIRESTORE_WRITE_BATCH_SIZE', str(FIRESTORE_MAX_BATCH_SIZE))),
+            flush_interval=float(os.getenv('FIRESTORE_FLUSH_INTERVAL_SECONDS', '1.0')),
+            max_pending=int(os.getenv('FIRESTORE_MAX_PENDING_WRITES', '5000'))
+        )
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def start(self) -> None:
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self._run(), name='firestore-write-behind')
+
+    async def stop(self) -> None:
+        if self._flusher is not None:
+            async with self._flush_lock:
+                self._flusher.cancel()
+                await asyncio.gather(self._flusher, return_exceptions=True)
+            self._flusher = None
+        while self._pending:
+            await self.flush()
+        if self.client is not None:
+            self.client.close()
+            self.client = None
+        logger.info(f"Firestore write-behind stopped - Writes: {self.writes}, Commits: {self.commits}")
+
+    async def record_email_sent(self, user_id: str, message_id: str) -> None:
+        while user_id not in self._pending and len(self._pending) >= self.max_pending:
+            await self.flush()
+        if user_id in self._pending:
+            self.coalesced += 1
+        self._pending[user_id] = {
+            'emailSent': True,
+            'emailSentAt': self.server_timestamp(),
+            'emailMessageId': message_id,
+        }
+        if self._flusher is None:
+            self.start()
+        if len(self._pending) >= self.max_batch_size:
+            self._wake.set()
+
+    async def flush(self) -> None:
+        async with self._flush_lock:
+            if not self._pending:
+                return
+            user_ids = list(self._pending)[:self.max_batch_size]
+            updates = [(user_id, self._pending.pop(user_id)) for user_id in user_ids]
+            await self._commit(updates)
+
+    async def _commit(self, updates: List[Tuple[str, Dict[str, Any]]]) -> None:
+        try:
+            if self.client is None:
+                self.client = self.client_factory()
+        except Exception as e:
+            self.failed += len(updates)
+            logger.warning(f"Could not create Firestore client, dropping {len(updates)} updates: {str(e)}")
+            return
+        collection = self.client.collection(self.collection)
+        batch = self.client.batch()
+        for user_id, data in updates:
+            batch.update(collection.document(user_id), data)
+        try:
+            started = time.perf_counter()
+            await batch.commit()
+            labelled(FIRESTORE_UPDATE_SECONDS, 'batch').observe(time.perf_counter() - started)
+            self.commits += 1
+            self.writes += len(updates)
+            logger.info(f"Firestore batch committed - Updates: {len(updates)}")
+        except Exception as e:
+            logger.warning(f"Firestore batch commit failed, retrying updates individually: {str(e)}")
+            for user_id, data in updates:
+                try:
+                    await collection.document(user_id).update(data)
+                    self.writes += 1
+                except Exception as e:
+                    self.failed += 1
+                    logger.warning(f"Could not update Firestore for user {user_id}: {str(e)}")
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                while self._pending:
+                    await self.flush()
+            except Exception as e:
+                logger.error(f"Firestore write-behind flush failed: {str(e)}", exc_info=True)
@@ -0,0 +1,67 @@
+import functools
+import os
+from typing import Callable, List, Tuple
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+)
+
+MULTIPROCESS = bool(os.getenv('PROMETHEUS_MULTIPROC_DIR'))
+
+FAST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+REQUEST_SECONDS = Histogram(
+    'email_api_request_duration_seconds', 'Time spent handling email API requests',
+    ['endpoint', 'outcome'], buckets=FAST_BUCKETS
+)
+ENQUEUE_SECONDS = Histogram(
+    'email_enqueue_duration_seconds', 'Time to enqueue one email job',
+    ['mode'], buckets=FAST_BUCKETS
+)
+SEND_SECONDS = Histogram(
+    'email_provider_send_duration_seconds', 'Time spent in the email provider send call, including retries',
+    ['mode'], buckets=FAST_BUCKETS
+)
+SEND_BATCH_SIZE = Histogram(
+    'email_provider_send_batch_size', 'Recipients per email provider request when sends are batched',
+    buckets=(1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)
+)
+FIRESTORE_UPDATE_SECONDS = Histogram(
+    'email_firestore_update_duration_seconds', 'Time to record emails as sent in Firestore',
+    ['kind'], buckets=FAST_BUCKETS
+)
+ENQUEUED = Counter('email_enqueued_total', 'Email jobs by enqueue outcome', ['mode', 'outcome'])
+SENDS = Counter('email_sends_total', 'Email sends by mode and outcome', ['mode', 'outcome'])
+DOMAIN_CHECKS = Counter('email_domain_checks_total', 'Recipient domain checks by outcome', ['outcome'])
+QUEUE_DEPTH = Gauge('email_queue_depth', 'Jobs waiting in the local email queue', multiprocess_mode='livemax')
+IN_FLIGHT = Gauge('email_workers_in_flight', 'Local email workers currently processing a job',
+                  multiprocess_mode='livesum')
+
+_tracked: List[Tuple[Gauge, Callable[[], float]]] = []
+
+
+@functools.lru_cache(maxsize=None)
+def labelled(metric, *values: str):
+    return metric.labels(*values)
+
+
+def track_worker_pool(queue_depth: Callable[[], float], in_flight: Callable[[], float]) -> None:
+    if MULTIPROCESS:
+        _tracked[:] = [(QUEUE_DEPTH, queue_depth), (IN_FLIGHT, in_flight)]
+        refresh_gauges()
+        return
+    QUEUE_DEPTH.set_function(queue_depth)
+    IN_FLIGHT.set_function(in_flight)
+
+
+def refresh_gauges() -> None:
+    for gauge, read in _tracked:
+        gauge.set(read())
+
+
+def render_latest() -> bytes:
+    if not MULTIPROCESS:
+        return generate_latest(REGISTRY)
+    refresh_gauges()
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return generate_latest(registry)
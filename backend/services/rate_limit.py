@@ -0,0 +1,135 @@
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional
+from logger_config import logger, log_event
+
+
+def recipient_domain(email: str) -> str:
+    return email.rpartition('@')[2].strip().lower()
+
+
+def parse_domain_rates(value: str) -> Dict[str, float]:
+    rates = {}
+    for item in value.split(','):
+        domain, _, rate = item.partition('=')
+        if domain.strip() and rate.strip():
+            rates[domain.strip().lower()] = float(rate)
+    return rates
+
+
+class TokenBucket:
+    __slots__ = ('rate', 'capacity', 'tokens', 'updated')
+
+    def __init__(self, rate: float, capacity: float, now: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = now
+
+    def wait_time(self, now: float) -> float:
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def take(self) -> None:
+        self.tokens -= 1
+
+
+class OutboundRateLimiter:
+    def __init__(
+        self,
+        rate: float = 0.0,
+        burst: Optional[float] = None,
+        domain_rate: float = 0.0,
+        domain_burst: Optional[float] = None,
+        domain_rates: Optional[Dict[str, float]] = None,
+        max_domains: int = 10000,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], Awaitable[Any]] = asyncio.sleep
+    ):
+        self.clock = clock
+        self.sleep = sleep
+        self.domain_rate = domain_rate
+        self.domain_burst = domain_burst
+        self.domain_rates = domain_rates or {}
+        self.max_domains = max_domains
+        self.global_bucket = TokenBucket(rate, burst or max(rate, 1.0), clock()) if rate > 0 else None
+        self.delayed = 0
+        self.delayed_seconds = 0.0
+        self._domains: 'OrderedDict[str, TokenBucket]' = OrderedDict()
+
+    @classmethod
+    def from_env(cls) -> Optional['OutboundRateLimiter']:
+        rate = float(os.getenv('EMAIL_RATE_LIMIT_PER_SECOND', '0'))
+        domain_rate = float(os.getenv('EMAIL_DOMAIN_RATE_LIMIT_PER_SECOND', '0'))
+        domain_rates = parse_domain_rates(os.getenv('EMAIL_DOMAIN_RATE_LIMITS', ''))
+        if rate <= 0 and domain_rate <= 0 and not domain_rates:
+            return None
+        burst = os.getenv('EMAIL_RATE_LIMIT_BURST')
+        domain_burst = os.getenv('EMAIL_DOMAIN_RATE_LIMIT_BURST')
+        limiter = cls(
+            rate=rate,
+            burst=float(burst) if burst else None,
+            domain_rate=domain_rate,
+            domain_burst=float(domain_burst) if domain_burst else None,
+            domain_rates=domain_rates,
+            max_domains=int(os.getenv('EMAIL_DOMAIN_RATE_LIMIT_MAX_DOMAINS', '10000'))
+        )
+        logger.info(f"Outbound rate limit - Global: {rate or 'off'}/s, Per domain: {domain_rate or 'off'}/s, "
+                    f"Overrides: {len(domain_rates)}")
+        return limiter
+
+    def _domain_bucket(self, domain: str, now: float) -> Optional[TokenBucket]:
+        bucket = self._domains.get(domain)
+        if bucket is not None:
+            self._domains.move_to_end(domain)
+            return bucket
+        rate = self.domain_rates.get(domain, self.domain_rate)
+        if rate <= 0:
+            return None
+        bucket = TokenBucket(rate, self.domain_burst or max(rate, 1.0), now)
+        self._domains[domain] = bucket
+        while len(self._domains) > self.max_domains:
+            self._domains.popitem(last=False)
+        return bucket
+
+    def try_acquire(self, email: str) -> float:
+        now = self.clock()
+        domain_bucket = self._domain_bucket(recipient_domain(email), now)
+        wait = 0.0
+        if self.global_bucket is not None:
+            wait = self.global_bucket.wait_time(now)
+        if domain_bucket is not None:
+            wait = max(wait, domain_bucket.wait_time(now))
+        if wait > 0:
+            return wait
+        if self.global_bucket is not None:
+            self.global_bucket.take()
+        if domain_bucket is not None:
+            domain_bucket.take()
+        return 0.0
+
+    async def acquire(self, email: str) -> float:
+        waited = 0.0
+        wait = self.try_acquire(email)
+        while wait > 0:
+            await self.sleep(wait)
+            waited += wait
+            wait = self.try_acquire(email)
+        if waited:
+            self.delayed += 1
+            self.delayed_seconds += waited
+            log_event('rate_limited', domain=recipient_domain(email), wait_ms=round(waited * 1000, 1))
+        return waited
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'rateLimited': self.delayed,
+            'rateLimitWaitSeconds': round(self.delayed_seconds, 3),
+            'rateLimitDomains': len(self._domains),
+        }
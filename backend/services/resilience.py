@@ -0,0 +1,208 @@
+import asyncio
+import logging
+import os
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+from logger_config import logger, log_event
+from services.sendgrid_client import SendGridError
+
+T = TypeVar('T')
+
+STATE_CLOSED = 'closed'
+STATE_OPEN = 'open'
+STATE_HALF_OPEN = 'half_open'
+
+RETRYABLE_STATUS_CODES = frozenset({408, 429})
+
+
+class CircuitOpenError(Exception):
+    def __init__(self, retry_after: float):
+        super().__init__(f"Email provider circuit open, retry in {retry_after:.1f}s")
+        self.retry_after = retry_after
+
+
+def is_retryable(error: BaseException) -> bool:
+    if isinstance(error, SendGridError):
+        return error.status_code in RETRYABLE_STATUS_CODES or error.status_code >= 500
+    if isinstance(error, asyncio.TimeoutError):
+        return True
+    import httpx
+    return isinstance(error, httpx.TransportError)
+
+
+class RetryPolicy:
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        base_delay: float = 0.5,
+        max_delay: float = 10.0,
+        rng: Callable[[], float] = random.random
+    ):
+        if max_attempts < 1:
+            raise ValueError("max_attempts must be at least 1")
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.rng = rng
+
+    def backoff(self, attempt: int) -> float:
+        ceiling = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        return ceiling * self.rng()
+
+
+class RetryBudget:
+    def __init__(self, ratio: float = 0.2, max_tokens: float = 10.0):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self.tokens = max_tokens
+        self.exhausted = 0
+
+    def deposit(self) -> None:
+        self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        if self.tokens < 1:
+            self.exhausted += 1
+            return False
+        self.tokens -= 1
+        return True
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 30.0,
+        half_open_max_calls: int = 1,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.clock = clock
+        self.consecutive_failures = 0
+        self.opened = 0
+        self.rejected = 0
+        self._state = STATE_CLOSED
+        self._opened_at = 0.0
+        self._half_open_calls = 0
+
+    @property
+    def state(self) -> str:
+        if self._state == STATE_OPEN and self.clock() >= self._opened_at + self.recovery_timeout:
+            self._state = STATE_HALF_OPEN
+            self._half_open_calls = 0
+            log_event('circuit_half_open', logging.WARNING)
+        return self._state
+
+    def retry_after(self) -> float:
+        if self.state != STATE_OPEN:
+            return 0.0
+        return max(0.0, self._opened_at + self.recovery_timeout - self.clock())
+
+    def before_call(self) -> None:
+        state = self.state
+        if state == STATE_CLOSED:
+            return
+        if state == STATE_HALF_OPEN and self._half_open_calls < self.half_open_max_calls:
+            self._half_open_calls += 1
+            return
+        self.rejected += 1
+        raise CircuitOpenError(self.retry_after() or self.recovery_timeout)
+
+    def release(self) -> None:
+        if self._state == STATE_HALF_OPEN and self._half_open_calls > 0:
+            self._half_open_calls -= 1
+
+    def record_success(self) -> None:
+        self.consecutive_failures = 0
+        if self._state == STATE_HALF_OPEN:
+            self._state = STATE_CLOSED
+            log_event('circuit_closed', logging.WARNING)
+
+    def record_failure(self) -> None:
+        self.consecutive_failures += 1
+        if self._state == STATE_HALF_OPEN or (
+            self._state == STATE_CLOSED and 0 < self.failure_threshold <= self.consecutive_failures
+        ):
+            self._state = STATE_OPEN
+            self._opened_at = self.clock()
+            self.opened += 1
+            log_event('circuit_opened', logging.WARNING, failures=self.consecutive_failures,
+                      recovery_seconds=self.recovery_timeout)
+
+
+class ResilientSender:
+    def __init__(
+        self,
+        policy: Optional[RetryPolicy] = None,
+        budget: Optional[RetryBudget] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        sleep: Callable[[float], Awaitable[Any]] = asyncio.sleep
+    ):
+        self.policy = policy or RetryPolicy()
+        self.budget = budget or RetryBudget()
+        self.breaker = breaker or CircuitBreaker()
+        self.sleep = sleep
+        self.retries = 0
+
+    @classmethod
+    def from_env(cls) -> 'ResilientSender':
+        sender = cls(
+            policy=RetryPolicy(
+                max_attempts=int(os.getenv('EMAIL_RETRY_MAX_ATTEMPTS', '3')),
+                base_delay=float(os.getenv('EMAIL_RETRY_BASE_DELAY_SECONDS', '0.5')),
+                max_delay=float(os.getenv('EMAIL_RETRY_MAX_DELAY_SECONDS', '10'))
+            ),
+            budget=RetryBudget(
+                ratio=float(os.getenv('EMAIL_RETRY_BUDGET_RATIO', '0.2')),
+                max_tokens=float(os.getenv('EMAIL_RETRY_BUDGET_MAX_TOKENS', '10'))
+            ),
+            breaker=CircuitBreaker(
+                failure_threshold=int(os.getenv('EMAIL_BREAKER_FAILURE_THRESHOLD', '5')),
+                recovery_timeout=float(os.getenv('EMAIL_BREAKER_RECOVERY_SECONDS', '30')),
+                half_open_max_calls=int(os.getenv('EMAIL_BREAKER_HALF_OPEN_CALLS', '1'))
+            )
+        )
+        logger.info(f"Email provider resilience - Attempts: {sender.policy.max_attempts}, "
+                    f"Breaker threshold: {sender.breaker.failure_threshold}")
+        return sender
+
+    async def call(self, operation: Callable[[], Awaitable[T]]) -> T:
+        self.budget.deposit()
+        attempt = 1
+        while True:
+            self.breaker.before_call()
+            try:
+                result = await operation()
+            except asyncio.CancelledError:
+                self.breaker.release()
+                raise
+            except Exception as e:
+                if not is_retryable(e):
+                    self.breaker.record_success()
+                    raise
+                self.breaker.record_failure()
+                retry_after = getattr(e, 'retry_after', None) or 0.0
+                if (attempt >= self.policy.max_attempts or self.breaker.state == STATE_OPEN
+                        or retry_after > self.policy.max_delay or not self.budget.withdraw()):
+                    raise
+                delay = max(self.policy.backoff(attempt), retry_after)
+                self.retries += 1
+                log_event('retry', logging.WARNING, attempt=attempt, delay_ms=round(delay * 1000, 1),
+                          retry_after=retry_after or None, error=str(e))
+                await self.sleep(delay)
+                attempt += 1
+                continue
+            self.breaker.record_success()
+            return result
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'retries': self.retries,
+            'retryBudgetExhausted': self.budget.exhausted,
+            'circuitState': self.breaker.state,
+            'circuitOpened': self.breaker.opened,
+            'circuitRejected': self.breaker.rejected,
+        }
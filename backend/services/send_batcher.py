@@ -0,0 +1,77 @@
+import asyncio
+import os
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+from logger_config import logger
+from services.sendgrid_client import SENDGRID_MAX_PERSONALIZATIONS
+
+BatchSender = Callable[[Hashable, List[Any]], Awaitable[List[Any]]]
+
+
+class SendBatcher:
+    def __init__(self, send_batch: BatchSender, max_batch_size: int = 100, max_wait: float = 0.05):
+        if not 1 <= max_batch_size <= SENDGRID_MAX_PERSONALIZATIONS:
+            raise ValueError(f"max_batch_size must be between 1 and {SENDGRID_MAX_PERSONALIZATIONS}")
+        self.send_batch = send_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.batches = 0
+        self.batched_items = 0
+        self._pending: Dict[Hashable, List[Tuple[Any, asyncio.Future]]] = {}
+        self._timers: Dict[Hashable, asyncio.TimerHandle] = {}
+        self._sending: set = set()
+
+    @classmethod
+    def from_env(cls, send_batch: BatchSender) -> Optional['SendBatcher']:
+        max_batch_size = int(os.getenv('EMAIL_SEND_BATCH_SIZE', '1'))
+        if max_batch_size <= 1:
+            return None
+        return cls(
+            send_batch,
+            max_batch_size=min(max_batch_size, SENDGRID_MAX_PERSONALIZATIONS),
+            max_wait=float(os.getenv('EMAIL_SEND_BATCH_WINDOW_SECONDS', '0.05'))
+        )
+
+    async def submit(self, key: Hashable, item: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        batch = self._pending.setdefault(key, [])
+        batch.append((item, future))
+        if len(batch) >= self.max_batch_size:
+            self._flush(key)
+        elif len(batch) == 1:
+            self._timers[key] = loop.call_later(self.max_wait, self._flush, key)
+        return await future
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'sendBatches': self.batches,
+            'avgSendBatchSize': round(self.batched_items / self.batches, 2) if self.batches else None,
+        }
+
+    def _flush(self, key: Hashable) -> None:
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self._pending.pop(key, None)
+        if not batch:
+            return
+        task = asyncio.get_running_loop().create_task(self._send(key, batch))
+        self._sending.add(task)
+        task.add_done_callback(self._sending.discard)
+
+    async def _send(self, key: Hashable, batch: List[Tuple[Any, asyncio.Future]]) -> None:
+        self.batches += 1
+        self.batched_items += len(batch)
+        try:
+            results = await self.send_batch(key, [item for item, _ in batch])
+            if len(results) != len(batch):
+                raise RuntimeError(f"Batch sender returned {len(results)} results for {len(batch)} items")
+        except Exception as e:
+            logger.error(f"Batch send failed for {key!r}: {str(e)}", exc_info=True)
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
@@ -0,0 +1,134 @@
+import os
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import TYPE_CHECKING, Any, Dict, List, NamedTuple, Optional, Tuple
+from logger_config import logger
+
+if TYPE_CHECKING:
+    import httpx
+
+SENDGRID_API_BASE_URL = 'https://api.sendgrid.com'
+SENDGRID_MAIL_SEND_PATH = '/v3/mail/send'
+SENDGRID_MAX_PERSONALIZATIONS = 1000
+
+
+class SendGridResponse(NamedTuple):
+    status_code: int
+    message_id: Optional[str] = None
+
+
+class SendGridError(Exception):
+    def __init__(self, status_code: int, body: str, retry_after: Optional[float] = None):
+        super().__init__(f"SendGrid returned HTTP {status_code}: {body[:500]}")
+        self.status_code = status_code
+        self.body = body
+        self.retry_after = retry_after
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+def build_mail_payload(
+    from_email: str, to_email: str, subject: str, html_content: str, text_content: Optional[str] = None
+) -> Dict[str, Any]:
+    content = [{'type': 'text/html', 'value': html_content}]
+    if text_content is not None:
+        content.insert(0, {'type': 'text/plain', 'value': text_content})
+    return {
+        'personalizations': [{'to': [{'email': to_email}]}],
+        'from': {'email': from_email},
+        'subject': subject,
+        'content': content,
+    }
+
+
+def build_batch_payload(
+    from_email: str, recipients: List[Tuple[str, Dict[str, str]]], subject: str, html_content: str,
+    text_content: Optional[str] = None
+) -> Dict[str, Any]:
+    if len(recipients) > SENDGRID_MAX_PERSONALIZATIONS:
+        raise ValueError(f"SendGrid accepts at most {SENDGRID_MAX_PERSONALIZATIONS} personalizations per request")
+    payload = build_mail_payload(from_email, '', subject, html_content, text_content)
+    payload['personalizations'] = [
+        {'to': [{'email': to_email}], 'substitutions': substitutions} for to_email, substitutions in recipients
+    ]
+    return payload
+
+
+class SendGridTransport:
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str = SENDGRID_API_BASE_URL,
+        max_connections: int = 20,
+        max_keepalive_connections: int = 10,
+        keepalive_expiry: float = 30.0,
+        timeout: float = 10.0,
+        connect_timeout: float = 5.0,
+        http_transport: Optional['httpx.AsyncBaseTransport'] = None
+    ):
+        import httpx
+        
+        self.base_url = base_url
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry
+        )
+        self._client = httpx.AsyncClient(
+            base_url=base_url,
+            headers={
+                'Authorization': f'Bearer {api_key}',
+                'Content-Type': 'application/json',
+            },
+            limits=self.limits,
+            timeout=httpx.Timeout(timeout, connect=connect_timeout),
+            transport=http_transport
+        )
+
+    @classmethod
+    def from_env(cls, api_key: str) -> 'SendGridTransport':
+        transport = cls(
+            api_key,
+            base_url=os.getenv('SENDGRID_API_BASE_URL', SENDGRID_API_BASE_URL),
+            max_connections=int(os.getenv('SENDGRID_MAX_CONNECTIONS', '20')),
+            max_keepalive_connections=int(os.getenv('SENDGRID_MAX_KEEPALIVE_CONNECTIONS', '10')),
+            keepalive_expiry=float(os.getenv('SENDGRID_KEEPALIVE_EXPIRY_SECONDS', '30')),
+            timeout=float(os.getenv('SENDGRID_TIMEOUT_SECONDS', '10')),
+            connect_timeout=float(os.getenv('SENDGRID_CONNECT_TIMEOUT_SECONDS', '5'))
+        )
+        logger.info(f"SendGrid transport initialized - Base URL: {transport.base_url}")
+        return transport
+
+    @property
+    def closed(self) -> bool:
+        return self._client.is_closed
+
+    async def send(self, payload: Dict[str, Any]) -> SendGridResponse:
+        response = await self._client.post(SENDGRID_MAIL_SEND_PATH, json=payload)
+        if response.status_code >= 400:
+            retry_after = parse_retry_after(response.headers.get('Retry-After'))
+            raise SendGridError(response.status_code, response.text, retry_after)
+        return SendGridResponse(
+            status_code=response.status_code,
+            message_id=response.headers.get('X-Message-Id')
+        )
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+    async def __aenter__(self) -> 'SendGridTransport':
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        await self.aclose()
@@ -0,0 +1,97 @@
+import os
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+from models import EmailTaskResult
+
+STATUS_QUEUED = 'queued'
+STATUS_SENT = 'sent'
+STATUS_FAILED = 'failed'
+
+
+class _TaskRecord:
+    __slots__ = ('user_id', 'email', 'mode', 'status', 'queued_at', 'completed_at',
+                 'message_id', 'status_code', 'error')
+
+    def __init__(self, user_id: str, email: str, mode: str, queued_at: float):
+        self.user_id = user_id
+        self.email = email
+        self.mode = mode
+        self.status = STATUS_QUEUED
+        self.queued_at = queued_at
+        self.completed_at: Optional[float] = None
+        self.message_id: Optional[str] = None
+        self.status_code: Optional[int] = None
+        self.error: Optional[str] = None
+
+
+def _to_datetime(timestamp: Optional[float]) -> Optional[datetime]:
+    if timestamp is None:
+        return None
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc)
+
+
+class TaskStore:
+    def __init__(self, capacity: int = 100000):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self.evicted = 0
+        self._ring: List[Optional[str]] = [None] * capacity
+        self._next = 0
+        self._index: Dict[str, _TaskRecord] = {}
+
+    @classmethod
+    def from_env(cls) -> Optional['TaskStore']:
+        capacity = int(os.getenv('TASK_STORE_CAPACITY', '100000'))
+        if capacity <= 0:
+            return None
+        return cls(capacity)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def record_queued(self, task_id: str, user_id: str, email: str, mode: str) -> None:
+        record = _TaskRecord(user_id, email, mode, time.time())
+        if task_id in self._index:
+            self._index[task_id] = record
+            return
+        evicted = self._ring[self._next]
+        if evicted is not None:
+            del self._index[evicted]
+            self.evicted += 1
+        self._ring[self._next] = task_id
+        self._next = (self._next + 1) % self.capacity
+        self._index[task_id] = record
+
+    def record_result(self, task_id: str, result: Dict[str, Any]) -> None:
+        record = self._index.get(task_id)
+        if record is None:
+            return
+        record.status = STATUS_SENT if result.get('success') else STATUS_FAILED
+        record.completed_at = time.time()
+        record.message_id = result.get('messageId')
+        record.status_code = result.get('statusCode')
+        record.error = result.get('error')
+        record.mode = result.get('mode', record.mode)
+
+    def get(self, task_id: str) -> Optional[EmailTaskResult]:
+        record = self._index.get(task_id)
+        if record is None:
+            return None
+        return EmailTaskResult(
+            taskId=task_id,
+            status=record.status,
+            success=None if record.status == STATUS_QUEUED else record.status == STATUS_SENT,
+            messageId=record.message_id,
+            email=record.email,
+            userId=record.user_id,
+            statusCode=record.status_code,
+            mode=record.mode,
+            error=record.error,
+            queuedAt=_to_datetime(record.queued_at),
+            completedAt=_to_datetime(record.completed_at)
+        )
+
+    def stats(self) -> Dict[str, int]:
+        return {'tracked': len(self._index), 'capacity': self.capacity, 'evicted': self.evicted}
@@ -0,0 +1,125 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from logger_config import logger
+
+
+class QueueFullError(Exception):
+    pass
+
+
+class EmailWorkerPool:
+    def __init__(
+        self,
+        handler: Callable[..., Awaitable[Any]],
+        concurrency: int = 4,
+        maxsize: int = 1000,
+        name: str = "email-worker",
+        queue: Optional[Any] = None
+    ):
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        self.handler = handler
+        self.concurrency = concurrency
+        self.maxsize = maxsize
+        self.name = name
+        self.queue = queue if queue is not None else asyncio.Queue(maxsize=maxsize)
+        self.durable = getattr(self.queue, 'durable', False)
+        self.in_flight = 0
+        self.processed = 0
+        self.failed = 0
+        self.avg_latency: Optional[float] = None
+        self.latency_alpha = 0.2
+        self._workers: List[asyncio.Task] = []
+
+    @property
+    def running(self) -> bool:
+        return any(not worker.done() for worker in self._workers)
+
+    @property
+    def queue_depth(self) -> int:
+        return self.queue.qsize()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._workers = [
+            asyncio.create_task(self._run(), name=f"{self.name}-{i}")
+            for i in range(self.concurrency)
+        ]
+        logger.info(f"Started {self.concurrency} email workers (queue capacity: {self.maxsize})")
+
+    async def stop(self, timeout: Optional[float] = None) -> None:
+        if not self._workers:
+            return
+        try:
+            if self.durable:
+                await asyncio.wait_for(self.queue.finish_in_flight(), timeout=timeout)
+            else:
+                await asyncio.wait_for(self.queue.join(), timeout=timeout)
+        except asyncio.TimeoutError:
+            if self.durable:
+                logger.warning(f"Email sends still running at shutdown, {self.in_flight} jobs released for restart")
+            else:
+                logger.warning(f"Email queue not drained before shutdown, {self.queue_depth} jobs dropped")
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        logger.info("Email workers stopped")
+
+    def submit(self, *args: Any) -> Optional[Awaitable[None]]:
+        try:
+            return self.queue.put_nowait(args)
+        except asyncio.QueueFull:
+            raise QueueFullError(f"Email queue is full ({self.maxsize} jobs pending)")
+
+    async def put(self, *args: Any) -> None:
+        await self.queue.put(args)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'queueDepth': self.queue_depth,
+            'inFlight': self.in_flight,
+            'capacity': self.maxsize,
+            'concurrency': self.concurrency,
+            'processed': self.processed,
+            'failed': self.failed,
+            'avgLatencyMs': round(self.avg_latency * 1000, 2) if self.avg_latency is not None else None,
+        }
+
+    async def _run(self) -> None:
+        while True:
+            job: Tuple[Any, ...] = await self.queue.get()
+            self.in_flight += 1
+            started = time.monotonic()
+            cancelled = False
+            try:
+                result = await self.handler(*job)
+                if isinstance(result, dict) and not result.get('success', True):
+                    self.failed += 1
+            except asyncio.CancelledError:
+                cancelled = True
+                raise
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"Email worker crashed on job: {str(e)}", exc_info=True)
+            finally:
+                self._record_latency(time.monotonic() - started)
+                self.in_flight -= 1
+                self.processed += 1
+                self._task_done(job, cancelled)
+
+    def _task_done(self, job: Any, cancelled: bool) -> None:
+        if not self.durable:
+            self.queue.task_done()
+        elif cancelled:
+            self.queue.release(job)
+        else:
+            self.queue.ack(job)
+
+    def _record_latency(self, elapsed: float) -> None:
+        if self.avg_latency is None:
+            self.avg_latency = elapsed
+        else:
+            self.avg_latency += self.latency_alpha * (elapsed - self.avg_latency)
@@ -0,0 +1,124 @@
+import sys
+from pathlib import Path
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from services.admission import AdmissionController, AdmissionDecision
+from services.email_service import EmailService
+from services.worker_pool import QueueFullError
+from routers import email_router
+from app import app
+
+client = TestClient(app)
+
+
+def make_stats(depth=0, in_flight=0, capacity=100, concurrency=4, avg_latency_ms=None):
+    return {
+        'queueDepth': depth,
+        'inFlight': in_flight,
+        'capacity': capacity,
+        'concurrency': concurrency,
+        'avgLatencyMs': avg_latency_ms,
+    }
+
+
+class TestAdmissionController:
+    def test_admits_below_watermark(self):
+        controller = AdmissionController(high_watermark=80)
+        decision = controller.check(make_stats(depth=10, avg_latency_ms=100))
+
+        assert decision.admitted is True
+        assert controller.shed == 0
+
+    def test_sheds_with_429_above_watermark(self):
+        controller = AdmissionController(high_watermark=80)
+        decision = controller.check(make_stats(depth=90, concurrency=4, avg_latency_ms=1000))
+
+        assert decision.admitted is False
+        assert decision.status_code == 429
+        assert decision.reason == 'high_watermark'
+        assert decision.retry_after == 3
+        assert controller.shed == 1
+
+    def test_sheds_with_503_when_queue_full(self):
+        controller = AdmissionController(high_watermark=80)
+        decision = controller.check(make_stats(depth=100, capacity=100, concurrency=10, avg_latency_ms=500))
+
+        assert decision.status_code == 503
+        assert decision.reason == 'queue_full'
+        assert decision.retry_after == 5
+
+    def test_sheds_on_estimated_wait(self):
+        controller = AdmissionController(high_watermark=80, max_wait_seconds=5)
+        decision = controller.check(make_stats(depth=30, in_flight=4, concurrency=4, avg_latency_ms=1000))
+
+        assert decision.admitted is False
+        assert decision.status_code == 429
+        assert decision.reason == 'latency'
+        assert decision.retry_after == 4
+
+    def test_retry_after_is_clamped(self):
+        controller = AdmissionController(high_watermark=1, max_retry_after=10)
+        decision = controller.check(make_stats(depth=99, concurrency=1, avg_latency_ms=60000))
+
+        assert decision.retry_after == 10
+
+    def test_retry_after_defaults_without_latency_samples(self):
+        controller = AdmissionController(high_watermark=1)
+        decision = controller.check(make_stats(depth=50))
+
+        assert decision.retry_after == 1
+
+    def test_shed_counts_by_reason(self):
+        controller = AdmissionController(high_watermark=80)
+        controller.check(make_stats(depth=90))
+        controller.check(make_stats(depth=100))
+        controller.check(make_stats(depth=95))
+
+        assert controller.stats() == {'shed': 3, 'shedByReason': {'high_watermark': 2, 'queue_full': 1}}
+
+
+class TestSendEmailAdmission:
+    def test_rejected_request_returns_retry_after(self):
+        decision = AdmissionDecision(admitted=False, status_code=429, retry_after=7, reason='high_watermark')
+
+        with patch.object(email_router.get_email_service(), 'admit', return_value=decision):
+            with patch.object(EmailService, 'queue_email') as mock_queue:
+                response = client.post(
+                    '/api/send-email',
+                    json={'userId': 'user-123', 'email': 'test@example.com'}
+                )
+
+        assert response.status_code == 429
+        assert response.headers['Retry-After'] == '7'
+        mock_queue.assert_not_called()
+
+    def test_queue_full_returns_503(self):
+        async def mock_queue_email(user_id, email):
+            raise QueueFullError('Email queue is full')
+
+        with patch.object(email_router.get_email_service(), 'admit', return_value=AdmissionDecision(admitted=True)):
+            with patch.object(EmailService, 'queue_email', side_effect=mock_queue_email):
+                response = client.post(
+                    '/api/send-email',
+                    json={'userId': 'user-123', 'email': 'test@example.com'}
+                )
+
+        assert response.status_code == 503
+        assert int(response.headers['Retry-After']) >= 1
+
+    def test_queue_stats_reports_shed_requests(self):
+        stats = {'mode': 'local', 'queueDepth': 3, 'inFlight': 2, 'capacity': 10, 'concurrency': 2,
+                 'processed': 40, 'failed': 1, 'avgLatencyMs': 12.5, 'shed': 4, 'shedByReason': {'queue_full': 4}}
+
+        with patch.object(email_router.get_email_service(), 'stats', return_value=stats):
+            response = client.get('/api/queue/stats')
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data['shed'] == 4
+        assert data['queueDepth'] == 3
+        assert data['shedByReason'] == {'queue_full': 4}
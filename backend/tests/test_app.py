@@ -17,6 +17,7 @@ app_module = importlib.util.module_from_spec(spec)
 spec.loader.exec_module(app_module)
 
 from services.email_service import EmailService, send_email_task
+from services.sendgrid_client import SendGridResponse
 
 app = app_module.app
 client = TestClient(app)
@@ -86,12 +87,74 @@ class TestSendEmailEndpoint:
             assert 'detail' in data
 
 
+class TestSendEmailBodyParsing:
+    def test_error_locations_match_fastapi(self):
+        response = client.post('/api/send-email', json={'userId': 'user-123', 'email': 'invalid-email'})
+
+        assert response.status_code == 422
+        assert response.json()['detail'][0]['loc'] == ['body', 'email']
+
+    def test_invalid_json(self):
+        response = client.post('/api/send-email', content='{bad', headers={'Content-Type': 'application/json'})
+
+        assert response.status_code == 422
+        assert response.json()['detail'][0]['type'] == 'json_invalid'
+
+    def test_missing_body(self):
+        response = client.post('/api/send-email')
+
+        assert response.status_code == 422
+        assert response.json()['detail'][0]['loc'] == ['body']
+
+    def test_non_json_content_type_is_rejected(self):
+        response = client.post('/api/send-email', content='{"userId": "u", "email": "a@example.com"}',
+                               headers={'Content-Type': 'text/plain'})
+
+        assert response.status_code == 422
+
+    def test_response_body_is_unchanged(self):
+        async def mock_queue_email(user_id, email):
+            return 'test-task-id'
+
+        with patch.object(EmailService, 'queue_email', side_effect=mock_queue_email):
+            response = client.post('/api/send-email', json={'userId': 'user-123', 'email': 'test@example.com'})
+
+        assert response.headers['content-type'] == 'application/json'
+        assert response.content == (b'{"success":true,"taskId":"test-task-id",'
+                                    b'"message":"Email queued successfully","error":null}')
+
+    def test_request_schema_is_documented(self):
+        schema = client.get('/openapi.json').json()['paths']['/api/send-email']['post']
+        body_schema = schema['requestBody']['content']['application/json']['schema']
+
+        assert body_schema['required'] == ['userId', 'email']
+        assert '202' in schema['responses']
+
+
 class TestHealthEndpoint:
     def test_health_check(self):
         response = client.get('/api/health')
         assert response.status_code == 200
         data = response.json()
         assert data['status'] == 'healthy'
+        assert response.content == b'{"status":"healthy"}'
+
+
+class TestReadyEndpoint:
+    def test_not_ready_before_startup(self):
+        app.state.ready = False
+        response = client.get('/api/ready')
+        assert response.status_code == 503
+        assert response.json()['detail'] == 'starting'
+
+    def test_ready_after_lifespan_startup(self):
+        with patch.object(EmailService, 'warm_up', new_callable=AsyncMock) as mock_warm_up:
+            with TestClient(app) as started_client:
+                response = started_client.get('/api/ready')
+        assert response.status_code == 200
+        assert response.json()['status'] == 'ready'
+        mock_warm_up.assert_awaited_once()
+        assert app.state.ready is False
 
 
 class TestRootEndpoint:
@@ -119,31 +182,21 @@ class TestSendEmailTask:
 
     @pytest.mark.asyncio
     async def test_send_email_task_with_sendgrid(self):
-        mock_response = MagicMock()
-        mock_response.status_code = 202
+        mock_transport = MagicMock()
+        mock_transport.send = AsyncMock(return_value=SendGridResponse(status_code=202, message_id='sg-msg-1'))
         
-        mock_sg_instance = MagicMock()
-        mock_sg_instance.send.return_value = mock_response
-        
-        with patch('services.email_service.SendGridAPIClient', return_value=mock_sg_instance, create=True):
-            with patch('services.email_service.Mail', create=True):
-                with patch.dict(os.environ, {'SENDGRID_API_KEY': 'test-key', 'SENDGRID_FROM_EMAIL': 'test@example.com'}, clear=False):
-                    with patch('asyncio.get_event_loop') as mock_loop:
-                        mock_loop_instance = MagicMock()
-                        mock_loop_instance.run_in_executor = AsyncMock(return_value=mock_response)
-                        mock_loop.return_value = mock_loop_instance
-                        
-                        import services.email_service as es_module
-                        es_module.SendGridAPIClient = MagicMock(return_value=mock_sg_instance)
-                        es_module.Mail = MagicMock()
-                        
-                        result = await send_email_task('user-123', 'test@example.com')
-                        
-                        assert result['success'] is True
-                        assert result['email'] == 'test@example.com'
-                        assert result['userId'] == 'user-123'
-                        assert result['statusCode'] == 202
-                        assert result['mode'] == 'local-sendgrid'
+        with patch.dict(os.environ, {'SENDGRID_API_KEY': 'test-key', 'SENDGRID_FROM_EMAIL': 'test@example.com'}, clear=False):
+            result = await send_email_task('user-123', 'test@example.com', transport=mock_transport)
+            
+            assert result['success'] is True
+            assert result['email'] == 'test@example.com'
+            assert result['userId'] == 'user-123'
+            assert result['statusCode'] == 202
+            assert result['messageId'] == 'sg-msg-1'
+            assert result['mode'] == 'local-sendgrid'
+            payload = mock_transport.send.call_args.args[0]
+            assert payload['personalizations'] == [{'to': [{'email': 'test@example.com'}]}]
+            assert payload['from'] == {'email': 'test@example.com'}
 
     @pytest.mark.asyncio
     async def test_send_email_task_with_firestore_update(self):
@@ -188,27 +241,16 @@ class TestSendEmailTask:
     @pytest.mark.asyncio
     async def test_send_email_task_sendgrid_error(self):
         
-        mock_sg_instance = MagicMock()
-        mock_sg_instance.send.side_effect = Exception('SendGrid API error')
+        mock_transport = MagicMock()
+        mock_transport.send = AsyncMock(side_effect=Exception('SendGrid API error'))
         
-        with patch('services.email_service.SendGridAPIClient', return_value=mock_sg_instance, create=True):
-            with patch('services.email_service.Mail', create=True):
-                with patch.dict(os.environ, {'SENDGRID_API_KEY': 'test-key'}, clear=False):
-                    with patch('asyncio.get_event_loop') as mock_loop:
-                        mock_loop_instance = MagicMock()
-                        mock_loop_instance.run_in_executor = AsyncMock(side_effect=Exception('SendGrid API error'))
-                        mock_loop.return_value = mock_loop_instance
-                        
-                        import services.email_service as es_module
-                        es_module.SendGridAPIClient = MagicMock(return_value=mock_sg_instance)
-                        es_module.Mail = MagicMock()
-                        
-                        result = await send_email_task('user-123', 'test@example.com')
-                        
-                        assert result['success'] is False
-                        assert 'error' in result
-                        assert result['email'] == 'test@example.com'
-                        assert result['userId'] == 'user-123'
+        with patch.dict(os.environ, {'SENDGRID_API_KEY': 'test-key'}, clear=False):
+            result = await send_email_task('user-123', 'test@example.com', transport=mock_transport)
+            
+            assert result['success'] is False
+            assert 'error' in result
+            assert result['email'] == 'test@example.com'
+            assert result['userId'] == 'user-123'
 
     @pytest.mark.asyncio
     async def test_send_email_task_firestore_update_error(self):
@@ -271,15 +313,19 @@ class TestEmailService:
         
         service = EmailService()
         service.tasks_client = MagicMock()
+        service.queue_path = 'projects/p/locations/l/queues/q'
         
         with patch('services.email_service.USE_GCP', True):
-            with patch.object(service, '_queue_gcp_task') as mock_gcp_queue:
+            with patch.object(service, '_queue_gcp_task', new_callable=AsyncMock) as mock_gcp_queue:
                 mock_gcp_queue.return_value = 'gcp-task-id'
                 
                 task_id = await service.queue_email('user-123', 'test@example.com')
                 
                 assert task_id == 'gcp-task-id'
-                mock_gcp_queue.assert_called_once_with('user-123', 'test@example.com')
+                mock_gcp_queue.assert_called_once()
+                user_id, email, task_name = mock_gcp_queue.call_args[0]
+                assert (user_id, email) == ('user-123', 'test@example.com')
+                assert task_name.startswith('projects/p/locations/l/queues/q/tasks/email-')
 
     @pytest.mark.asyncio
     async def test_queue_email_failure(self):
@@ -304,17 +350,17 @@ class TestEmailService:
             'EMAIL_HANDLER_URL': 'https://test-url.com'
         }, clear=False):
             with patch('services.email_service.tasks_v2', create=True) as mock_tasks_v2:
-                mock_client = MagicMock()
-                mock_client.queue_path.return_value = 'projects/test-project/locations/us-central1/queues/test-queue'
-                mock_tasks_v2.CloudTasksClient.return_value = mock_client
+                mock_tasks_v2.CloudTasksAsyncClient.queue_path.return_value = 'projects/test-project/locations/us-central1/queues/test-queue'
                 
                 import services.email_service as es_module
                 es_module.tasks_v2 = mock_tasks_v2
                 es_module.USE_GCP = True
                 
-                service = EmailService()
+                with patch.object(EmailService, '_load_gcp_credentials', return_value=MagicMock()):
+                    service = EmailService()
                 
                 assert hasattr(service, 'tasks_client')
+                assert service.queue_path == 'projects/test-project/locations/us-central1/queues/test-queue'
                 assert service.project_id == 'test-project'
                 assert service.location == 'us-central1'
                 assert service.queue_name == 'test-queue'
@@ -323,13 +369,12 @@ class TestEmailService:
        
         with patch.dict(os.environ, {'USE_GCP': 'true'}, clear=False):
             with patch('services.email_service.tasks_v2', create=True) as mock_tasks_v2:
-                mock_tasks_v2.CloudTasksClient.side_effect = Exception('GCP init error')
-                
                 import services.email_service as es_module
                 es_module.tasks_v2 = mock_tasks_v2
                 es_module.USE_GCP = True
                 
-                service = EmailService()
+                with patch.object(EmailService, '_load_gcp_credentials', side_effect=Exception('GCP init error')):
+                    service = EmailService()
                 
                 assert hasattr(service, 'task_queue')
 
@@ -351,7 +396,8 @@ class TestEmailService:
                             if mock_sleep.called:
                                 mock_sleep.assert_called_once()
 
-    def test_queue_gcp_task(self):
+    @pytest.mark.asyncio
+    async def test_queue_gcp_task(self):
         
         with patch.dict(os.environ, {
             'USE_GCP': 'true',
@@ -364,21 +410,21 @@ class TestEmailService:
                 mock_client = MagicMock()
                 mock_response = MagicMock()
                 mock_response.name = 'projects/test-project/locations/us-central1/queues/test-queue/tasks/task-123'
-                mock_client.create_task.return_value = mock_response
-                mock_client.queue_path.return_value = 'projects/test-project/locations/us-central1/queues/test-queue'
-                mock_tasks_v2.CloudTasksClient.return_value = mock_client
+                mock_client.create_task = AsyncMock(return_value=mock_response)
+                mock_tasks_v2.CloudTasksAsyncClient.return_value = mock_client
                 mock_tasks_v2.HttpMethod.POST = 'POST'
                 
                 import services.email_service as es_module
                 es_module.tasks_v2 = mock_tasks_v2
                 es_module.USE_GCP = True
                 
-                service = EmailService()
-                service.tasks_client = mock_client
+                with patch.object(EmailService, '_load_gcp_credentials', return_value=MagicMock()):
+                    service = EmailService()
                 service.queue_path = 'projects/test-project/locations/us-central1/queues/test-queue'
                 service.email_handler_url = 'https://test-url.com'
                 
-                task_id = service._queue_gcp_task('user-123', 'test@example.com')
+                task_id = await service._queue_gcp_task('user-123', 'test@example.com')
                 
                 assert task_id == mock_response.name
                 mock_client.create_task.assert_called_once()
+                assert mock_client.create_task.call_args.kwargs['timeout'] == service.tasks_timeout
@@ -0,0 +1,106 @@
+import pytest
+import sys
+import os
+import json
+import time
+import asyncio
+from pathlib import Path
+from unittest.mock import patch, MagicMock
+from fastapi.testclient import TestClient
+
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from services.email_service import EmailService
+from app import app
+
+client = TestClient(app)
+
+
+def parse_ndjson(response):
+    return [json.loads(line) for line in response.text.splitlines() if line]
+
+
+class TestSendEmailBatchEndpoint:
+    def test_batch_streams_task_ids_and_errors(self):
+        async def mock_queue_email_batch(self, jobs):
+            for index, user_id, email in jobs:
+                if user_id == 'user-fail':
+                    yield index, None, 'Failed to queue email task: boom'
+                else:
+                    yield index, f'task-{user_id}', None
+
+        items = [
+            {'userId': 'user-1', 'email': 'one@example.com'},
+            {'userId': 'user-2', 'email': 'not-an-email'},
+            {'userId': 'user-fail', 'email': 'fail@example.com'},
+            {'email': 'missing@example.com'},
+        ]
+        with patch.object(EmailService, 'queue_email_batch', mock_queue_email_batch):
+            response = client.post('/api/send-email/batch', json={'items': items})
+
+        assert response.status_code == 202
+        assert response.headers['content-type'].startswith('application/x-ndjson')
+        results = {record['index']: record for record in parse_ndjson(response)}
+        assert len(results) == 4
+        assert results[0] == {'index': 0, 'success': True, 'taskId': 'task-user-1'}
+        assert results[1]['success'] is False
+        assert 'email' in results[1]['error']
+        assert results[2] == {'index': 2, 'success': False, 'error': 'Failed to queue email task: boom'}
+        assert 'userId' in results[3]['error']
+
+    def test_batch_rejects_empty_items(self):
+        response = client.post('/api/send-email/batch', json={'items': []})
+
+        assert response.status_code == 422
+
+
+class TestEmailServiceBatch:
+    @pytest.mark.asyncio
+    async def test_local_batch_enqueues_without_min_delay(self):
+        with patch('services.email_service.USE_GCP', False):
+            service = EmailService()
+
+        jobs = [(i, f'user-{i}', f'user{i}@example.com') for i in range(50)]
+        with patch.object(service.worker_pool, 'start'):
+            with patch.dict(os.environ, {'EMAIL_MIN_DELAY_SECONDS': '5'}, clear=False):
+                started = time.monotonic()
+                results = [result async for result in service.queue_email_batch(jobs)]
+
+        assert time.monotonic() - started < 1
+        assert len(results) == 50
+        assert results[0] == (0, 'task-user-0-user0@example.com', None)
+        assert service.task_queue.qsize() == 50
+
+    @pytest.mark.asyncio
+    async def test_gcp_batch_uses_bounded_parallelism(self):
+        with patch('services.email_service.USE_GCP', False):
+            service = EmailService()
+        service.tasks_client = MagicMock()
+        service.queue_path = 'projects/p/locations/l/queues/q'
+
+        active = 0
+        peak = 0
+
+        async def fake_queue_gcp_task(user_id, email, task_name=None):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.02)
+            active -= 1
+            if user_id == 'user-7':
+                raise Exception('Cloud Tasks unavailable')
+            return f'projects/p/locations/l/queues/q/tasks/{user_id}'
+
+        jobs = [(i, f'user-{i}', f'user{i}@example.com') for i in range(20)]
+        with patch('services.email_service.USE_GCP', True):
+            with patch.object(service, '_queue_gcp_task', side_effect=fake_queue_gcp_task):
+                with patch.dict(os.environ, {'EMAIL_BATCH_GCP_CONCURRENCY': '4'}, clear=False):
+                    results = [result async for result in service.queue_email_batch(jobs)]
+
+        assert peak <= 4
+        assert len(results) == 20
+        by_index = {key: (task_id, error) for key, task_id, error in results}
+        assert by_index[7][0] is None
+        assert 'Cloud Tasks unavailable' in by_index[7][1]
+        assert by_index[3] == ('projects/p/locations/l/queues/q/tasks/user-3', None)
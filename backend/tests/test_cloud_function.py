@@ -0,0 +1,149 @@
+import pytest
+import sys
+import os
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+functions_framework = pytest.importorskip('functions_framework')
+
+FUNCTION_SOURCE = backend_dir / 'cloud_functions' / 'send_email' / 'main_http.py'
+
+
+class FakeSendGrid:
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.sent = []
+
+    def send(self, message):
+        to = message.personalizations[0].tos[0]['email']
+        if to in self.failing:
+            raise RuntimeError(f'rejected {to}')
+        self.sent.append(to)
+        return SimpleNamespace(status_code=202, headers={'X-Message-Id': f'sg-{to}'})
+
+
+class FakeSnapshot:
+    def __init__(self, id, data):
+        self.id = id
+        self.exists = data is not None
+        self._data = data or {}
+
+    def get(self, field):
+        return self._data.get(field)
+
+
+def fake_firestore(documents=None):
+    documents = documents or {}
+    db = MagicMock()
+    db.collection.return_value.document.side_effect = lambda user_id: MagicMock(id=user_id)
+    db.get_all.side_effect = lambda refs: [FakeSnapshot(ref.id, documents.get(ref.id)) for ref in refs]
+    return db
+
+
+@pytest.fixture
+def client():
+    app = functions_framework.create_app(target='send_email', source=str(FUNCTION_SOURCE))
+    return app.test_client()
+
+
+def invoke(client, payload, sendgrid, db, retry_count=0):
+    import batch
+    with patch.dict(os.environ, {'SENDGRID_API_KEY': 'SG.test'}, clear=False), \
+            patch.object(batch, 'get_sendgrid_client', return_value=sendgrid), \
+            patch.object(batch, 'get_firestore_client', return_value=db):
+        return client.post('/', json=payload, headers={'X-CloudTasks-TaskRetryCount': str(retry_count)})
+
+
+def jobs(count):
+    return [{'userId': f'user-{i}', 'email': f'user{i}@example.com'} for i in range(count)]
+
+
+class TestSendEmailBatch:
+    def test_sends_every_item_and_commits_once(self, client):
+        sendgrid, db = FakeSendGrid(), fake_firestore()
+
+        response = invoke(client, jobs(3), sendgrid, db)
+
+        assert response.status_code == 200
+        body = response.get_json()
+        assert [r['userId'] for r in body['results']] == ['user-0', 'user-1', 'user-2']
+        assert all(r['success'] for r in body['results'])
+        assert body['results'][0]['messageId'] == 'sg-user0@example.com'
+        assert sorted(sendgrid.sent) == ['user0@example.com', 'user1@example.com', 'user2@example.com']
+        assert db.batch.return_value.update.call_count == 3
+        db.batch.return_value.commit.assert_called_once()
+        db.get_all.assert_not_called()
+
+    def test_partial_failure_is_retried(self, client):
+        sendgrid, db = FakeSendGrid(failing={'user1@example.com'}), fake_firestore()
+
+        response = invoke(client, jobs(3), sendgrid, db)
+
+        assert response.status_code == 500
+        body = response.get_json()
+        assert [r['success'] for r in body['results']] == [True, False, True]
+        assert 'rejected' in body['results'][1]['error']
+        assert db.batch.return_value.update.call_count == 2
+
+    def test_retry_skips_users_already_sent(self, client):
+        sendgrid = FakeSendGrid()
+        db = fake_firestore({'user-0': {'emailSent': True}, 'user-1': {'emailSent': False}})
+
+        response = invoke(client, jobs(2), sendgrid, db, retry_count=1)
+
+        assert response.status_code == 200
+        assert response.get_json()['results'][0]['skipped'] == 'already sent'
+        assert sendgrid.sent == ['user1@example.com']
+
+    def test_missing_user_document_fails_only_its_status_update(self, client):
+        from google.api_core.exceptions import NotFound
+        sendgrid, db = FakeSendGrid(failing={'user1@example.com'}), fake_firestore()
+        db.batch.return_value.commit.side_effect = NotFound('No document to update: user-2')
+        documents = {}
+
+        def document(user_id):
+            doc = documents.setdefault(user_id, MagicMock(id=user_id))
+            if user_id == 'user-2':
+                doc.update.side_effect = NotFound(f'No document to update: {user_id}')
+            return doc
+
+        db.collection.return_value.document.side_effect = document
+
+        response = invoke(client, jobs(3), sendgrid, db)
+
+        assert response.status_code == 500
+        results = response.get_json()['results']
+        assert [r['success'] for r in results] == [True, False, True]
+        assert [r.get('statusUpdateFailed') for r in results] == [None, None, True]
+        documents['user-0'].update.assert_called_once()
+        assert documents['user-0'].update.call_args.args[0]['emailMessageId'] == 'sg-user0@example.com'
+
+    def test_invalid_items_fail_without_retry(self, client):
+        sendgrid, db = FakeSendGrid(), fake_firestore()
+
+        response = invoke(client, [{'userId': 'user-0'}, *jobs(2)[1:]], sendgrid, db)
+
+        assert response.status_code == 200
+        assert response.get_json()['results'][0] == {'success': False, 'error': 'userId and email are required'}
+        assert sendgrid.sent == ['user1@example.com']
+
+    def test_oversized_batch_is_rejected(self, client):
+        response = invoke(client, jobs(501), FakeSendGrid(), fake_firestore())
+
+        assert response.status_code == 400
+
+    def test_single_payload_still_works(self, client):
+        import main_http
+        sendgrid, db = FakeSendGrid(), fake_firestore()
+        with patch.object(main_http, 'get_sendgrid_client', return_value=sendgrid), \
+                patch.object(main_http, 'get_firestore_client', return_value=db), \
+                patch.dict(os.environ, {'SENDGRID_API_KEY': 'SG.test'}, clear=False):
+            response = client.post('/', json=jobs(1)[0])
+
+        assert response.status_code == 200
+        assert response.get_json()['messageId'] == 'msg-user-0'
+        assert sendgrid.sent == ['user0@example.com']
@@ -0,0 +1,182 @@
+import pytest
+import sys
+import os
+import json
+import time
+import asyncio
+import threading
+from pathlib import Path
+from unittest.mock import patch
+
+import grpc
+from google.cloud import tasks_v2
+from google.cloud.tasks_v2.types import cloudtasks, task as task_types
+
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from benchmarks.fake_grpc import FakeGrpcServer
+from services.email_service import EmailService
+
+
+class FakeCloudTasksServer(FakeGrpcServer):
+    def __init__(self, delay: float = 0.2):
+        self.delay = delay
+        self.requests = []
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._lock = threading.Lock()
+        super().__init__('google.cloud.tasks.v2.CloudTasks', {
+            'CreateTask': grpc.unary_unary_rpc_method_handler(
+                self.create_task,
+                request_deserializer=cloudtasks.CreateTaskRequest.deserialize,
+                response_serializer=task_types.Task.serialize,
+            ),
+        })
+
+    def create_task(self, request, context):
+        with self._lock:
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        time.sleep(self.delay)
+        with self._lock:
+            self.in_flight -= 1
+            self.requests.append(request)
+            return task_types.Task(name=f'{request.parent}/tasks/{len(self.requests)}')
+
+
+@pytest.fixture
+def fake_server():
+    with FakeCloudTasksServer() as server:
+        yield server
+
+
+@pytest.fixture
+def gcp_service(fake_server):
+    env = {
+        'CLOUD_TASKS_EMULATOR_HOST': fake_server.address,
+        'GCP_PROJECT_ID': 'test-project',
+        'GCP_LOCATION': 'us-central1',
+        'GCP_QUEUE_NAME': 'test-queue',
+        'EMAIL_HANDLER_URL': 'https://test-url.com',
+    }
+    with patch.dict(os.environ, env, clear=False):
+        with patch('services.email_service.tasks_v2', tasks_v2, create=True):
+            with patch('services.email_service.USE_GCP', True):
+                yield EmailService()
+
+
+async def measure_max_loop_gap(stop: asyncio.Event) -> float:
+    max_gap = 0.0
+    last = time.monotonic()
+    while not stop.is_set():
+        await asyncio.sleep(0.005)
+        now = time.monotonic()
+        max_gap = max(max_gap, now - last)
+        last = now
+    return max_gap
+
+
+class TestAsyncCloudTasksEnqueue:
+    @pytest.mark.asyncio
+    async def test_create_task_does_not_block_event_loop(self, fake_server, gcp_service):
+        stop = asyncio.Event()
+        monitor = asyncio.create_task(measure_max_loop_gap(stop))
+
+        task_id = await gcp_service.queue_email('user-123', 'test@example.com')
+
+        stop.set()
+        max_gap = await monitor
+        await gcp_service.stop()
+
+        assert task_id == 'projects/test-project/locations/us-central1/queues/test-queue/tasks/1'
+        assert max_gap < fake_server.delay / 2
+        request = fake_server.requests[0]
+        assert json.loads(request.task.http_request.body) == {'userId': 'user-123', 'email': 'test@example.com'}
+        assert request.task.http_request.url == 'https://test-url.com'
+
+    @pytest.mark.asyncio
+    async def test_creates_run_concurrently_on_shared_client(self, fake_server, gcp_service):
+        from google.cloud.tasks_v2.services.cloud_tasks import transports
+        with patch.object(transports, 'CloudTasksGrpcAsyncIOTransport',
+                          wraps=transports.CloudTasksGrpcAsyncIOTransport) as transport_factory, \
+                patch('grpc.aio.insecure_channel', wraps=grpc.aio.insecure_channel) as channel_factory:
+            started = time.monotonic()
+            task_ids = await asyncio.gather(*[
+                gcp_service.queue_email(f'user-{i}', f'user{i}@example.com') for i in range(10)
+            ])
+            elapsed = time.monotonic() - started
+            await gcp_service.stop()
+
+        assert len(set(task_ids)) == 10
+        assert elapsed < fake_server.delay * 5
+        assert transport_factory.call_count == 1
+        assert channel_factory.call_count == 1
+        assert fake_server.peak_in_flight > 1
+
+    @pytest.mark.asyncio
+    async def test_create_task_honours_deadline(self, fake_server, gcp_service):
+        fake_server.delay = 1.0
+        gcp_service.tasks_timeout = 0.1
+
+        started = time.monotonic()
+        with pytest.raises(Exception) as exc_info:
+            await gcp_service.queue_email('user-123', 'test@example.com')
+        elapsed = time.monotonic() - started
+        await gcp_service.stop()
+
+        assert 'Failed to queue email task' in str(exc_info.value)
+        assert elapsed < fake_server.delay
+
+
+class TestPackedCloudTasks:
+    @pytest.mark.asyncio
+    async def test_jobs_share_one_task(self, fake_server):
+        fake_server.delay = 0.0
+        env = {
+            'CLOUD_TASKS_EMULATOR_HOST': fake_server.address,
+            'GCP_PROJECT_ID': 'test-project',
+            'GCP_LOCATION': 'us-central1',
+            'GCP_QUEUE_NAME': 'test-queue',
+            'GCP_TASKS_BATCH_SIZE': '3',
+            'GCP_TASKS_BATCH_WINDOW_SECONDS': '0.05',
+            'EMAIL_DEDUPE_TTL_SECONDS': '0',
+        }
+        with patch.dict(os.environ, env, clear=False):
+            with patch('services.email_service.tasks_v2', tasks_v2, create=True):
+                with patch('services.email_service.USE_GCP', True):
+                    service = EmailService()
+                    task_ids = await asyncio.gather(*[
+                        service.queue_email(f'user-{i}', f'user{i}@example.com') for i in range(4)
+                    ])
+                    await service.stop()
+
+        assert len(fake_server.requests) == 2
+        assert json.loads(fake_server.requests[0].task.http_request.body) == [
+            {'userId': f'user-{i}', 'email': f'user{i}@example.com'} for i in range(3)
+        ]
+        task = 'projects/test-project/locations/us-central1/queues/test-queue/tasks'
+        assert task_ids == [f'{task}/1/jobs/0', f'{task}/1/jobs/1', f'{task}/1/jobs/2', f'{task}/2/jobs/0']
+        assert service.get_task(task_ids[1]).userId == 'user-1'
+
+    @pytest.mark.asyncio
+    async def test_packing_is_off_while_dedupe_is_on(self, fake_server):
+        fake_server.delay = 0.0
+        env = {
+            'CLOUD_TASKS_EMULATOR_HOST': fake_server.address,
+            'GCP_PROJECT_ID': 'test-project',
+            'GCP_LOCATION': 'us-central1',
+            'GCP_QUEUE_NAME': 'test-queue',
+            'GCP_TASKS_BATCH_SIZE': '3',
+            'EMAIL_DEDUPE_TTL_SECONDS': '3600',
+        }
+        with patch.dict(os.environ, env, clear=False):
+            with patch('services.email_service.tasks_v2', tasks_v2, create=True):
+                with patch('services.email_service.USE_GCP', True):
+                    service = EmailService()
+                    task_id = await service.queue_email('user-1', 'user1@example.com')
+                    await service.stop()
+
+        assert service.task_batcher is None
+        assert '/tasks/email-' in fake_server.requests[0].task.name
+        assert service.get_task(task_id).userId == 'user-1'
@@ -0,0 +1,292 @@
+import pytest
+import sys
+import os
+import asyncio
+from concurrent import futures
+from pathlib import Path
+from unittest.mock import patch, MagicMock
+
+import grpc
+from google.api_core.exceptions import AlreadyExists
+from google.cloud import tasks_v2
+from google.cloud.tasks_v2.types import cloudtasks, task as task_types
+
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from services.dedupe import DedupeCache, Deduplicator, FirestoreDedupeStore, dedupe_key
+from services.email_service import EmailService
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeDocument:
+    def __init__(self, store, key):
+        self.store = store
+        self.key = key
+
+    async def create(self, data):
+        if self.key in self.store.docs:
+            raise AlreadyExists('document exists')
+        self.store.docs[self.key] = dict(data)
+
+    async def get(self):
+        snapshot = MagicMock()
+        snapshot.to_dict.return_value = self.store.docs.get(self.key)
+        return snapshot
+
+    async def set(self, data):
+        self.store.docs[self.key] = dict(data)
+
+    async def delete(self):
+        self.store.docs.pop(self.key, None)
+
+
+class FakeFirestore:
+    def __init__(self):
+        self.docs = {}
+
+    def collection(self, name):
+        collection = MagicMock()
+        collection.document.side_effect = lambda key: FakeDocument(self, key)
+        return collection
+
+    def close(self):
+        pass
+
+
+class FakeNamedTasksServer:
+    def __init__(self):
+        self.names = set()
+        self.requests = 0
+        handler = grpc.method_handlers_generic_handler('google.cloud.tasks.v2.CloudTasks', {
+            'CreateTask': grpc.unary_unary_rpc_method_handler(
+                self.create_task,
+                request_deserializer=cloudtasks.CreateTaskRequest.deserialize,
+                response_serializer=task_types.Task.serialize,
+            ),
+        })
+        self.server = grpc.server(futures.ThreadPoolExecutor(max_workers=4))
+        self.server.add_generic_rpc_handlers((handler,))
+        self.port = self.server.add_insecure_port('127.0.0.1:0')
+
+    def create_task(self, request, context):
+        self.requests += 1
+        if request.task.name in self.names:
+            context.abort(grpc.StatusCode.ALREADY_EXISTS, 'Requested entity already exists')
+        self.names.add(request.task.name)
+        return task_types.Task(name=request.task.name)
+
+
+class TestDedupeCache:
+    def test_entries_expire_after_ttl(self):
+        clock = FakeClock()
+        cache = DedupeCache(ttl=60, clock=clock)
+        cache.put('key', 'task-1')
+
+        clock.now += 59
+        assert cache.get('key') == 'task-1'
+        clock.now += 2
+        assert cache.get('key') is None
+        assert len(cache) == 0
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = DedupeCache(maxsize=2, ttl=60)
+        cache.put('a', 'task-a')
+        cache.put('b', 'task-b')
+        cache.get('a')
+        cache.put('c', 'task-c')
+
+        assert cache.get('a') == 'task-a'
+        assert cache.get('b') is None
+        assert cache.get('c') == 'task-c'
+
+    def test_key_ignores_email_case_and_whitespace(self):
+        assert dedupe_key('user-1', ' User@Example.com ') == dedupe_key('user-1', 'user@example.com')
+        assert dedupe_key('user-1', 'user@example.com') != dedupe_key('user-2', 'user@example.com')
+
+
+class TestLocalIdempotentEnqueue:
+    @pytest.fixture
+    def service(self):
+        with patch('services.email_service.USE_GCP', False):
+            with patch.dict(os.environ, {'EMAIL_MIN_DELAY_SECONDS': '0', 'EMAIL_DEDUPE_TTL_SECONDS': '3600'}, clear=False):
+                yield EmailService()
+
+    @pytest.mark.asyncio
+    async def test_duplicate_returns_original_task_id(self, service):
+        first = await service.queue_email('user-1', 'user@example.com')
+        second = await service.queue_email('user-1', 'USER@example.com')
+
+        assert second == first
+        assert service.worker_pool.queue_depth == 1
+        assert service.stats()['deduplicated'] == 1
+
+    @pytest.mark.asyncio
+    async def test_concurrent_duplicates_enqueue_once(self, service):
+        with patch.dict(os.environ, {'EMAIL_MIN_DELAY_SECONDS': '0.05'}, clear=False):
+            with patch.object(service.worker_pool, 'submit', wraps=service.worker_pool.submit) as submit:
+                task_ids = await asyncio.gather(*[service.queue_email('user-1', 'user@example.com') for _ in range(5)])
+
+        assert len(set(task_ids)) == 1
+        assert submit.call_count == 1
+        await service.stop()
+
+    @pytest.mark.asyncio
+    async def test_failed_enqueue_is_not_remembered(self, service):
+        with patch.object(service.worker_pool, 'submit', side_effect=[RuntimeError('boom'), None]):
+            with pytest.raises(Exception):
+                await service.queue_email('user-1', 'user@example.com')
+            await service.queue_email('user-1', 'user@example.com')
+
+        assert service.stats()['deduplicated'] == 0
+
+    @pytest.mark.asyncio
+    async def test_failed_send_can_be_queued_again(self, service):
+        async def send(user_id, email, **kwargs):
+            return {'success': False, 'error': 'SendGrid unavailable', 'userId': user_id, 'email': email}
+
+        with patch('services.email_service.send_email_task', side_effect=send):
+            first = await service.queue_email('user-1', 'user@example.com')
+            await asyncio.wait_for(service.worker_pool.queue.join(), timeout=2)
+            second = await service.queue_email('user-1', 'user@example.com')
+            await asyncio.wait_for(service.worker_pool.queue.join(), timeout=2)
+            await service.stop()
+
+        assert second == first
+        assert service.stats()['deduplicated'] == 0
+        assert service.worker_pool.processed == 2
+
+    @pytest.mark.asyncio
+    async def test_batch_duplicates_are_skipped(self, service):
+        jobs = [(0, 'user-1', 'a@example.com'), (1, 'user-1', 'a@example.com'), (2, 'user-2', 'b@example.com')]
+        results = [result async for result in service.queue_email_batch(jobs)]
+
+        assert results[1][1] == results[0][1]
+        assert service.worker_pool.queue_depth == 2
+
+    @pytest.mark.asyncio
+    async def test_dedupe_can_be_disabled(self):
+        with patch('services.email_service.USE_GCP', False):
+            with patch.dict(os.environ, {'EMAIL_MIN_DELAY_SECONDS': '0', 'EMAIL_DEDUPE_TTL_SECONDS': '0'}, clear=False):
+                service = EmailService()
+                await service.queue_email('user-1', 'user@example.com')
+                await service.queue_email('user-1', 'user@example.com')
+
+        assert service.worker_pool.queue_depth == 2
+
+
+class TestSharedDedupeStore:
+    @pytest.mark.asyncio
+    async def test_claim_returns_existing_task_until_expired(self):
+        clock = FakeClock()
+        firestore = FakeFirestore()
+        store = FirestoreDedupeStore(client_factory=lambda: firestore, ttl=60, clock=clock)
+
+        assert await store.claim('key', 'task-1') is None
+        assert await store.claim('key', 'task-2') == 'task-1'
+        clock.now += 61
+        assert await store.claim('key', 'task-3') is None
+        assert firestore.docs['key']['taskId'] == 'task-3'
+
+    @pytest.mark.asyncio
+    async def test_instances_share_claims(self):
+        firestore = FakeFirestore()
+        enqueued = []
+
+        async def enqueue():
+            enqueued.append(1)
+            return 'task-1'
+
+        instances = [
+            Deduplicator(DedupeCache(), FirestoreDedupeStore(client_factory=lambda: firestore)) for _ in range(2)
+        ]
+        first = await instances[0].run('key', 'task-1', enqueue)
+        second = await instances[1].run('key', 'task-1', enqueue)
+
+        assert first == ('task-1', False)
+        assert second == ('task-1', True)
+        assert len(enqueued) == 1
+
+    @pytest.mark.asyncio
+    async def test_failed_enqueue_releases_claim(self):
+        firestore = FakeFirestore()
+        deduplicator = Deduplicator(DedupeCache(), FirestoreDedupeStore(client_factory=lambda: firestore))
+
+        async def enqueue():
+            raise RuntimeError('Cloud Tasks unavailable')
+
+        with pytest.raises(RuntimeError):
+            await deduplicator.run('key', 'task-1', enqueue)
+        assert firestore.docs == {}
+
+
+    @pytest.mark.asyncio
+    async def test_forget_releases_claim(self):
+        firestore = FakeFirestore()
+        deduplicator = Deduplicator(DedupeCache(), FirestoreDedupeStore(client_factory=lambda: firestore))
+
+        async def enqueue():
+            return 'task-1'
+
+        await deduplicator.run('key', 'task-1', enqueue)
+        await deduplicator.forget('key')
+
+        assert firestore.docs == {}
+        assert deduplicator.cache.get('key') is None
+
+    @pytest.mark.asyncio
+    async def test_cancelled_enqueue_fails_waiters(self):
+        deduplicator = Deduplicator(DedupeCache())
+        started = asyncio.Event()
+
+        async def enqueue():
+            started.set()
+            await asyncio.sleep(10)
+
+        first = asyncio.ensure_future(deduplicator.run('key', 'task-1', enqueue))
+        await started.wait()
+        waiter = asyncio.ensure_future(deduplicator.run('key', 'task-1', enqueue))
+        await asyncio.sleep(0)
+        first.cancel()
+
+        with pytest.raises(RuntimeError, match='cancelled'):
+            await waiter
+        assert first.cancelled()
+
+
+class TestNamedCloudTasks:
+    @pytest.mark.asyncio
+    async def test_queue_rejects_duplicate_names_across_instances(self):
+        fake_server = FakeNamedTasksServer()
+        fake_server.server.start()
+        env = {
+            'CLOUD_TASKS_EMULATOR_HOST': f'127.0.0.1:{fake_server.port}',
+            'GCP_PROJECT_ID': 'test-project',
+            'GCP_LOCATION': 'us-central1',
+            'GCP_QUEUE_NAME': 'test-queue',
+            'EMAIL_DEDUPE_TTL_SECONDS': '3600',
+        }
+        try:
+            with patch.dict(os.environ, env, clear=False):
+                with patch('services.email_service.tasks_v2', tasks_v2, create=True):
+                    with patch('services.email_service.USE_GCP', True):
+                        services = [EmailService(), EmailService()]
+                        task_ids = [await service.queue_email('user-1', 'user@example.com') for service in services]
+                        found = [service.get_task(task_id) for service, task_id in zip(services, task_ids)]
+                        for service in services:
+                            await service.stop()
+        finally:
+            fake_server.server.stop(grace=None)
+
+        assert task_ids[0] == task_ids[1]
+        assert task_ids[0].startswith('projects/test-project/locations/us-central1/queues/test-queue/tasks/email-')
+        assert fake_server.requests == 2
+        assert len(fake_server.names) == 1
+        assert all(task is not None and task.status == 'queued' for task in found)
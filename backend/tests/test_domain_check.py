@@ -0,0 +1,198 @@
+import pytest
+import sys
+import os
+import json
+import time
+import asyncio
+from pathlib import Path
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from benchmarks.stubs import DNSStub
+from services.domain_check import DomainChecker, _default_resolver, parse_nameservers
+from services.email_service import EmailService
+from app import app
+
+client = TestClient(app)
+
+RECORDS = {
+    'example.com': {'MX': ['10 mx1.example.com.', '20 mx2.example.com.']},
+    'null-mx.example': {'MX': ['0 .'], 'A': ['192.0.2.1']},
+    'a-only.example': {'A': ['192.0.2.1']},
+    'aaaa-only.example': {'AAAA': ['2001:db8::1']},
+    'no-mail.example': {'TXT': ['"v=spf1 -all"']},
+}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+async def dns_stub():
+    stub = await DNSStub(RECORDS).start()
+    yield stub
+    stub.close()
+
+
+def make_checker(stub, **kwargs):
+    resolver = _default_resolver(parse_nameservers(stub.nameserver), lifetime=1.0)
+    return DomainChecker(resolver, **{'timeout': 1.0, **kwargs})
+
+
+class TestDomainChecker:
+    @pytest.mark.asyncio
+    async def test_mx_domain_is_accepted_and_cached(self, dns_stub):
+        checker = make_checker(dns_stub)
+
+        assert await checker.accepts('a@example.com') is True
+        assert await checker.accepts('b@EXAMPLE.com') is True
+
+        assert dns_stub.queries[('example.com', 'MX')] == 1
+        assert checker.stats() == {'domainLookups': 1, 'domainCacheHits': 1, 'domainRejected': 0,
+                                   'domainCheckTimeouts': 0}
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize('domain, accepted', [
+        ('typo-domain.example', False),
+        ('null-mx.example', False),
+        ('a-only.example', True),
+        ('aaaa-only.example', True),
+        ('no-mail.example', False),
+    ])
+    async def test_deliverability(self, dns_stub, domain, accepted):
+        checker = make_checker(dns_stub)
+
+        assert await checker.accepts(f'user@{domain}') is accepted
+
+    @pytest.mark.asyncio
+    async def test_negative_results_expire_sooner(self, dns_stub):
+        clock = FakeClock()
+        checker = make_checker(dns_stub, ttl=3600, negative_ttl=60, clock=clock)
+        await checker.accepts('a@example.com')
+        await checker.accepts('a@typo-domain.example')
+
+        clock.now += 61
+        assert checker.cached('typo-domain.example') is None
+        assert checker.cached('example.com') is True
+        assert await checker.accepts('a@typo-domain.example') is False
+        assert dns_stub.queries[('typo-domain.example', 'MX')] == 2
+
+    @pytest.mark.asyncio
+    async def test_concurrent_checks_share_one_lookup(self, dns_stub):
+        checker = make_checker(dns_stub)
+
+        results = await asyncio.gather(*(checker.accepts(f'user{i}@example.com') for i in range(20)))
+
+        assert all(results)
+        assert dns_stub.queries[('example.com', 'MX')] == 1
+
+    @pytest.mark.asyncio
+    async def test_slow_lookup_accepts_within_budget_and_fills_cache(self, dns_stub):
+        dns_stub.latency = 0.2
+        checker = make_checker(dns_stub, timeout=0.02)
+
+        started = time.perf_counter()
+        assert await checker.accepts('a@typo-domain.example') is True
+        assert time.perf_counter() - started < 0.15
+        assert checker.timeouts == 1
+
+        await asyncio.sleep(0.3)
+        assert await checker.accepts('a@typo-domain.example') is False
+        assert dns_stub.queries[('typo-domain.example', 'MX')] == 1
+
+    @pytest.mark.asyncio
+    async def test_many_checks_are_bounded(self):
+        checker = DomainChecker(resolver=None, concurrency=2, timeout=1.0)
+        in_flight, peak = [0], [0]
+
+        async def resolve(domain):
+            in_flight[0] += 1
+            peak[0] = max(peak[0], in_flight[0])
+            await asyncio.sleep(0.01)
+            in_flight[0] -= 1
+            return True
+
+        with patch.object(checker, '_resolve', resolve):
+            results = await checker.accepts_many([f'user@domain{i}.example' for i in range(6)])
+
+        assert results == [True] * 6
+        assert peak[0] == 2
+
+    @pytest.mark.asyncio
+    async def test_resolver_failure_accepts(self):
+        resolver = _default_resolver([('127.0.0.1', 9)], lifetime=0.1)
+        checker = DomainChecker(resolver, timeout=1.0)
+
+        assert await checker.accepts('a@example.com') is True
+        assert checker.cached('example.com') is True
+
+    def test_cache_is_bounded(self):
+        checker = DomainChecker(resolver=None, maxsize=2)
+        for domain in ('a.example', 'b.example', 'c.example'):
+            checker._put(domain, True, 60)
+
+        assert len(checker) == 2
+        assert checker.cached('a.example') is None
+
+    def test_parse_nameservers(self):
+        assert parse_nameservers('127.0.0.1:5353, 10.0.0.2,') == [('127.0.0.1', 5353), ('10.0.0.2', None)]
+
+    def test_from_env(self):
+        with patch.dict(os.environ, {'EMAIL_DOMAIN_CHECK': 'false'}, clear=False):
+            assert DomainChecker.from_env() is None
+        env = {'EMAIL_DOMAIN_CHECK': 'true', 'EMAIL_DOMAIN_CHECK_NAMESERVERS': '127.0.0.1:5353',
+               'EMAIL_DOMAIN_CHECK_TIMEOUT_SECONDS': '0.01', 'EMAIL_DOMAIN_CHECK_NEGATIVE_TTL_SECONDS': '30',
+               'EMAIL_DOMAIN_CHECK_CONCURRENCY': '4'}
+        with patch.dict(os.environ, env, clear=False):
+            checker = DomainChecker.from_env()
+        assert checker.timeout == 0.01
+        assert checker.concurrency == 4
+        assert checker.negative_ttl == 30
+        assert checker.resolver.nameserver_ports == {'127.0.0.1': 5353}
+
+
+class TestDomainCheckEndpoints:
+    def test_undeliverable_domain_is_rejected(self):
+        async def accepts_recipient(self, email):
+            return not email.endswith('@typo-domain.example')
+
+        with patch.object(EmailService, 'accepts_recipient', accepts_recipient), \
+                patch.object(EmailService, 'queue_email') as queue_email:
+            response = client.post('/api/send-email', json={'userId': 'u', 'email': 'a@typo-domain.example'})
+
+        assert response.status_code == 422
+        assert response.json()['detail'] == 'Recipient domain does not accept email'
+        queue_email.assert_not_called()
+
+    def test_batch_checks_and_queues_in_chunks(self):
+        calls = []
+
+        async def accepts_recipients(self, emails):
+            calls.append(('check', len(emails)))
+            return [not email.endswith('@typo-domain.example') for email in emails]
+
+        async def queue_email_batch(self, jobs):
+            calls.append(('queue', len(jobs)))
+            for index, user_id, email in jobs:
+                yield index, f'task-{user_id}', None
+
+        items = [{'userId': 'u1', 'email': 'a@example.com'}, {'userId': 'u2', 'email': 'b@typo-domain.example'},
+                 {'userId': 'u3', 'email': 'c@example.com'}]
+        with patch.object(EmailService, 'accepts_recipients', accepts_recipients), \
+                patch.object(EmailService, 'queue_email_batch', queue_email_batch), \
+                patch('routers.email_router.BATCH_CHUNK_SIZE', 2):
+            response = client.post('/api/send-email/batch', json={'items': items})
+
+        results = [json.loads(line) for line in response.text.splitlines()]
+        assert [record['index'] for record in results] == [1, 0, 2]
+        assert results[0] == {'index': 1, 'success': False, 'error': 'Recipient domain does not accept email'}
+        assert results[1] == {'index': 0, 'success': True, 'taskId': 'task-u1'}
+        assert calls == [('check', 2), ('queue', 1), ('check', 1), ('queue', 1)]
@@ -0,0 +1,321 @@
+import pytest
+import sys
+import os
+import asyncio
+import sqlite3
+from pathlib import Path
+from unittest.mock import patch
+
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from services.durable_queue import SCHEMA, SQLiteJobQueue, release_owner_leases
+from services.worker_pool import EmailWorkerPool, QueueFullError
+from services.email_service import EmailService
+
+
+def rows(path):
+    with sqlite3.connect(str(path)) as db:
+        return db.execute('SELECT payload, lease_owner FROM email_jobs ORDER BY id').fetchall()
+
+
+class TestSQLiteJobQueue:
+    @pytest.mark.asyncio
+    async def test_enqueued_jobs_survive_reopen(self, tmp_path):
+        path = tmp_path / 'queue.db'
+        queue = SQLiteJobQueue(path)
+        await queue.put_nowait(('user-1', 'a@example.com'))
+        await queue.put(('user-2', 'b@example.com'))
+        await queue.close()
+
+        reopened = SQLiteJobQueue(path)
+        assert reopened.qsize() == 2
+        assert reopened.recovered == 2
+        first = await reopened.get()
+        second = await reopened.get()
+        assert [tuple(first), tuple(second)] == [('user-1', 'a@example.com'), ('user-2', 'b@example.com')]
+        reopened.ack(first)
+        reopened.ack(second)
+        await reopened.join()
+        await reopened.close()
+
+        assert rows(path) == []
+
+    @pytest.mark.asyncio
+    async def test_concurrent_enqueues_share_a_commit(self, tmp_path):
+        queue = SQLiteJobQueue(tmp_path / 'queue.db')
+        await asyncio.gather(*(queue.put_nowait((f'user-{i}', 'a@example.com')) for i in range(50)))
+
+        assert queue.committed_jobs == 50
+        assert queue.commits < 5
+        await queue.close()
+
+    @pytest.mark.asyncio
+    async def test_restart_releases_own_leases(self, tmp_path):
+        path = tmp_path / 'queue.db'
+        queue = SQLiteJobQueue(path, owner='backend-1')
+        await queue.put_nowait(('user-1', 'a@example.com'))
+        job = await queue.get()
+        assert job.attempts == 1
+        assert rows(path)[0][1] == 'backend-1'
+        queue._pump.cancel()
+        queue._executor.shutdown(wait=True)
+        queue._db.close()
+
+        restarted = SQLiteJobQueue(path, owner='backend-1')
+        redelivered = await asyncio.wait_for(restarted.get(), timeout=1)
+
+        assert tuple(redelivered) == ('user-1', 'a@example.com')
+        assert redelivered.attempts == 2
+        await restarted.close()
+
+    @pytest.mark.asyncio
+    async def test_expired_lease_of_another_owner_is_redelivered(self, tmp_path):
+        path = tmp_path / 'queue.db'
+        now = [1000.0]
+        with sqlite3.connect(str(path)) as db:
+            db.executescript(SCHEMA)
+            db.execute('INSERT INTO email_jobs (payload, enqueued_at, lease_owner, leased_until, attempts) '
+                       'VALUES (?, 1000, ?, 1030, 1)', ('["user-1", "a@example.com"]', 'backend-1'))
+
+        survivor = SQLiteJobQueue(path, owner='backend-2', lease_seconds=30, poll_interval=0.01,
+                                  clock=lambda: now[0])
+        waiting = asyncio.ensure_future(survivor.get())
+        await asyncio.sleep(0.05)
+        assert not waiting.done()
+
+        now[0] += 31
+        job = await asyncio.wait_for(waiting, timeout=1)
+        assert tuple(job) == ('user-1', 'a@example.com')
+        await survivor.close()
+
+    @pytest.mark.asyncio
+    async def test_in_flight_leases_are_renewed(self, tmp_path):
+        path = tmp_path / 'queue.db'
+        now = [1000.0]
+        owner = SQLiteJobQueue(path, owner='backend-1', lease_seconds=30, poll_interval=0.01, clock=lambda: now[0])
+        await owner.put_nowait(('user-1', 'a@example.com'))
+        job = await owner.get()
+
+        other = SQLiteJobQueue(path, owner='backend-2', lease_seconds=30, poll_interval=0.01, clock=lambda: now[0])
+        waiting = asyncio.ensure_future(other.get())
+        for _ in range(6):
+            now[0] += 15
+            await asyncio.sleep(0.05)
+        assert owner.lease_renewals >= 1
+        assert not waiting.done()
+
+        owner.ack(job)
+        await owner.close()
+        waiting.cancel()
+        await other.close()
+
+    @pytest.mark.asyncio
+    async def test_job_out_of_attempts_is_dead_lettered(self, tmp_path):
+        path = tmp_path / 'queue.db'
+        with sqlite3.connect(str(path)) as db:
+            db.executescript(SCHEMA)
+            db.execute('INSERT INTO email_jobs (payload, enqueued_at, attempts) VALUES (?, 1000, 3)',
+                       ('["user-1", "a@example.com"]',))
+            db.execute('INSERT INTO email_jobs (payload, enqueued_at, attempts) VALUES (?, 1000, 2)',
+                       ('["user-2", "b@example.com"]',))
+
+        queue = SQLiteJobQueue(path, max_attempts=3)
+        job = await asyncio.wait_for(queue.get(), timeout=1)
+        assert tuple(job) == ('user-2', 'b@example.com')
+        assert job.attempts == 3
+        queue.ack(job)
+        await asyncio.wait_for(queue.join(), timeout=1)
+        assert queue.stats()['queueDeadLettered'] == 1
+        await queue.close()
+
+        assert rows(path) == []
+        with sqlite3.connect(str(path)) as db:
+            assert db.execute('SELECT payload, attempts FROM email_jobs_dead').fetchall() == [
+                ('["user-1", "a@example.com"]', 3)
+            ]
+
+    @pytest.mark.asyncio
+    async def test_close_returns_unstarted_leases(self, tmp_path):
+        path = tmp_path / 'queue.db'
+        queue = SQLiteJobQueue(path, owner='backend-1')
+        await queue.put_nowait(('user-1', 'a@example.com'))
+        job = await queue.get()
+        queue.release(job)
+        await queue.close()
+
+        assert rows(path) == [('["user-1", "a@example.com"]', None)]
+
+    @pytest.mark.asyncio
+    async def test_depth_follows_other_processes(self, tmp_path):
+        path = tmp_path / 'queue.db'
+        api = SQLiteJobQueue(path, owner='api-1', poll_interval=0.01)
+        worker = SQLiteJobQueue(path, owner='worker-1', poll_interval=0.01)
+        await api.put_nowait(('user-1', 'a@example.com'))
+        assert api.qsize() == 1
+
+        job = await asyncio.wait_for(worker.get(), timeout=1)
+        worker.ack(job)
+        await worker.close()
+        for _ in range(100):
+            if api.qsize() == 0:
+                break
+            await asyncio.sleep(0.01)
+
+        assert api.qsize() == 0
+        await api.close()
+
+    def test_release_owner_leases(self, tmp_path):
+        path = tmp_path / 'queue.db'
+        with sqlite3.connect(str(path)) as db:
+            db.executescript(SCHEMA)
+            db.execute("INSERT INTO email_jobs (payload, enqueued_at, lease_owner, leased_until) "
+                       "VALUES ('[]', 0, 'host:42', 9999999999)")
+
+        assert release_owner_leases(path, 'host:42') == 1
+        assert rows(path) == [('[]', None)]
+
+    def test_rejects_unknown_synchronous_mode(self, tmp_path):
+        with pytest.raises(ValueError):
+            SQLiteJobQueue(tmp_path / 'queue.db', synchronous='SOMETIMES')
+
+
+class TestDurableWorkerPool:
+    @pytest.mark.asyncio
+    async def test_workers_drain_and_ack(self, tmp_path):
+        processed = []
+
+        async def handler(user_id, email):
+            processed.append(user_id)
+            return {'success': True}
+
+        queue = SQLiteJobQueue(tmp_path / 'queue.db')
+        pool = EmailWorkerPool(handler, concurrency=2, queue=queue)
+        pool.start()
+        await asyncio.gather(*(pool.submit(f'user-{i}', 'a@example.com') for i in range(10)))
+        await asyncio.wait_for(queue.join(), timeout=2)
+        await pool.stop(timeout=2)
+        await queue.close()
+
+        assert sorted(processed) == sorted(f'user-{i}' for i in range(10))
+        assert rows(tmp_path / 'queue.db') == []
+
+    @pytest.mark.asyncio
+    async def test_submit_rejects_when_full(self, tmp_path):
+        async def handler(user_id, email):
+            return {'success': True}
+
+        queue = SQLiteJobQueue(tmp_path / 'queue.db', maxsize=1)
+        pool = EmailWorkerPool(handler, queue=queue)
+        await pool.submit('user-1', 'a@example.com')
+
+        with pytest.raises(QueueFullError):
+            pool.submit('user-2', 'b@example.com')
+        await queue.close()
+
+    @pytest.mark.asyncio
+    async def test_stop_finishes_in_flight_and_keeps_the_rest(self, tmp_path):
+        processed = []
+
+        async def handler(user_id, email):
+            await asyncio.sleep(0.05)
+            processed.append(user_id)
+            return {'success': True}
+
+        queue = SQLiteJobQueue(tmp_path / 'queue.db')
+        pool = EmailWorkerPool(handler, concurrency=1, queue=queue)
+        pool.start()
+        await asyncio.gather(*(pool.submit(f'user-{i}', 'a@example.com') for i in range(3)))
+        while not pool.in_flight:
+            await asyncio.sleep(0.001)
+        await pool.stop(timeout=2)
+        await queue.close()
+
+        assert processed == ['user-0']
+        assert [payload for payload, _ in rows(tmp_path / 'queue.db')] == [
+            '["user-1", "a@example.com"]', '["user-2", "a@example.com"]'
+        ]
+
+    @pytest.mark.asyncio
+    async def test_cancelled_job_is_kept(self, tmp_path):
+        started = asyncio.Event()
+
+        async def handler(user_id, email):
+            started.set()
+            await asyncio.sleep(10)
+
+        queue = SQLiteJobQueue(tmp_path / 'queue.db', owner='backend-1')
+        pool = EmailWorkerPool(handler, concurrency=1, queue=queue)
+        pool.start()
+        await pool.submit('user-1', 'a@example.com')
+        await started.wait()
+        await pool.stop(timeout=0.01)
+        await queue.close()
+
+        assert rows(tmp_path / 'queue.db') == [('["user-1", "a@example.com"]', None)]
+
+
+class TestEmailServiceDurableQueue:
+    @pytest.mark.asyncio
+    async def test_queued_email_is_sent_after_restart(self, tmp_path):
+        env = {
+            'EMAIL_QUEUE_BACKEND': 'sqlite',
+            'EMAIL_QUEUE_PATH': str(tmp_path / 'queue.db'),
+            'EMAIL_MIN_DELAY_SECONDS': '0',
+            'EMAIL_DEDUPE_TTL_SECONDS': '0',
+        }
+        with patch('services.email_service.USE_GCP', False):
+            with patch.dict(os.environ, env, clear=False):
+                os.environ.pop('SENDGRID_API_KEY', None)
+                service = EmailService()
+                with patch.object(service.worker_pool, 'start'):
+                    task_id = await service.queue_email('user-1', 'user@example.com')
+                assert service.stats()['queueBackend'] == 'sqlite'
+                await service.job_queue.close()
+
+                sent = []
+
+                async def send(user_id, email, **kwargs):
+                    sent.append((user_id, email))
+                    return {'success': True}
+
+                restarted = EmailService()
+                with patch('services.email_service.send_email_task', side_effect=send):
+                    await restarted.start()
+                    await asyncio.wait_for(restarted.job_queue.join(), timeout=2)
+                    await restarted.stop()
+
+        assert task_id == 'task-user-1-user@example.com'
+        assert sent == [('user-1', 'user@example.com')]
+
+    def test_api_only_process_needs_shared_queue(self):
+        with patch('services.email_service.USE_GCP', False):
+            with patch.dict(os.environ, {'EMAIL_QUEUE_BACKEND': 'memory', 'EMAIL_WORKERS_ENABLED': 'false'},
+                            clear=False):
+                with pytest.raises(ValueError):
+                    EmailService()
+
+    @pytest.mark.asyncio
+    async def test_api_only_process_enqueues_without_workers(self, tmp_path):
+        env = {
+            'EMAIL_QUEUE_BACKEND': 'sqlite',
+            'EMAIL_QUEUE_PATH': str(tmp_path / 'queue.db'),
+            'EMAIL_WORKERS_ENABLED': 'false',
+            'EMAIL_MIN_DELAY_SECONDS': '0',
+            'EMAIL_DEDUPE_TTL_SECONDS': '0',
+        }
+        with patch('services.email_service.USE_GCP', False):
+            with patch.dict(os.environ, env, clear=False):
+                service = EmailService()
+                await service.start()
+                await service.queue_email('user-1', 'user@example.com')
+                assert not service.worker_pool.running
+                await service.stop()
+
+        assert rows(tmp_path / 'queue.db') == [('["user-1", "user@example.com"]', None)]
+
+    def test_rejects_unknown_backend(self):
+        with patch('services.email_service.USE_GCP', False):
+            with patch.dict(os.environ, {'EMAIL_QUEUE_BACKEND': 'redis'}, clear=False):
+                with pytest.raises(ValueError):
+                    EmailService()
@@ -14,87 +14,23 @@ from services.email_service import send_email_task, EmailService
 
 class TestEmailServiceCoverage:
     @pytest.mark.asyncio
-    async def test_send_email_task_with_sendgrid_and_firestore(self):
-        import services.email_service as es_module
-        importlib.reload(es_module)
-        
-        mock_response = MagicMock()
-        mock_response.status_code = 202
-        
-        mock_sg_instance = MagicMock()
-        mock_sg_instance.send.return_value = mock_response
-        
-        mock_db = MagicMock()
-        mock_user_ref = MagicMock()
-        mock_collection = MagicMock()
-        mock_collection.document.return_value = mock_user_ref
-        mock_db.collection.return_value = mock_collection
-        
-        es_module.SendGridAPIClient = MagicMock(return_value=mock_sg_instance)
-        es_module.Mail = MagicMock()
-        es_module.FirestoreClient = MagicMock(return_value=mock_db)
-        es_module.USE_GCP = True
+    async def test_send_email_task_without_status_writer_skips_firestore(self):
+        mock_response = MagicMock(status_code=202, message_id='sg-msg-1')
+        mock_transport = MagicMock()
+        mock_transport.send = AsyncMock(return_value=mock_response)
         
         with patch.dict(os.environ, {
             'SENDGRID_API_KEY': 'test-key',
             'SENDGRID_FROM_EMAIL': 'test@example.com',
-            'USE_GCP': 'true'
-        }, clear=False):
-            with patch('asyncio.get_event_loop') as mock_loop:
-                mock_loop_instance = MagicMock()
-                mock_loop_instance.run_in_executor = AsyncMock(return_value=mock_response)
-                mock_loop.return_value = mock_loop_instance
-                
-                # Import the reloaded function
-                from services.email_service import send_email_task as reloaded_send_email_task
-                
-                result = await reloaded_send_email_task('user-123', 'test@example.com')
-                
-                assert result['success'] is True
-                assert result['mode'] == 'gcp-sendgrid'
-                assert result['statusCode'] == 202
-                mock_user_ref.update.assert_called_once()
-    
-    @pytest.mark.asyncio
-    async def test_send_email_task_firestore_update_error_handling(self):
-        import services.email_service as es_module
-        importlib.reload(es_module)
-        
-        mock_response = MagicMock()
-        mock_response.status_code = 202
-        
-        mock_sg_instance = MagicMock()
-        mock_sg_instance.send.return_value = mock_response
-        
-        mock_db = MagicMock()
-        mock_user_ref = MagicMock()
-        mock_user_ref.update.side_effect = Exception('Firestore connection error')
-        mock_collection = MagicMock()
-        mock_collection.document.return_value = mock_user_ref
-        mock_db.collection.return_value = mock_collection
-        
-        es_module.SendGridAPIClient = MagicMock(return_value=mock_sg_instance)
-        es_module.Mail = MagicMock()
-        es_module.FirestoreClient = MagicMock(return_value=mock_db)
-        es_module.USE_GCP = True
-        
-        with patch.dict(os.environ, {
-            'SENDGRID_API_KEY': 'test-key',
-            'SENDGRID_FROM_EMAIL': 'test@example.com',
-            'USE_GCP': 'true'
-        }, clear=False):
-            with patch('asyncio.get_event_loop') as mock_loop:
-                mock_loop_instance = MagicMock()
-                mock_loop_instance.run_in_executor = AsyncMock(return_value=mock_response)
-                mock_loop.return_value = mock_loop_instance
-                
-                from services.email_service import send_email_task as reloaded_send_email_task
-                
-                result = await reloaded_send_email_task('user-123', 'test@example.com')
-                
-                assert result['success'] is True
-                assert result['mode'] == 'gcp-sendgrid'
-    
+        }, clear=False), patch('services.email_service.USE_GCP', True), \
+                patch('google.cloud.firestore.Client') as firestore_client:
+            result = await send_email_task('user-123', 'test@example.com', transport=mock_transport)
+            
+            assert result['success'] is True
+            assert result['mode'] == 'gcp-sendgrid'
+            assert result['statusCode'] == 202
+            firestore_client.assert_not_called()
+
     @pytest.mark.asyncio
     async def test_queue_local_task_full_coverage(self):
         with patch('services.email_service.USE_GCP', False):
@@ -109,14 +45,15 @@ class TestEmailServiceCoverage:
                     return 0.05
             
             with patch('time.time', side_effect=mock_time_func):
-                with patch('asyncio.create_task') as mock_create_task:
+                with patch.object(service.worker_pool, 'start') as mock_start:
                     with patch('asyncio.sleep', new_callable=AsyncMock) as mock_sleep:
                         with patch.dict(os.environ, {'EMAIL_MIN_DELAY_SECONDS': '0.1'}, clear=False):
                             task_id = await service._queue_local_task('user-123', 'test@example.com')
                             
                             assert task_id.startswith('task-user-123')
                             assert 'test@example.com' in task_id
-                            mock_create_task.assert_called_once()
+                            mock_start.assert_called_once()
+                            assert service.task_queue.qsize() == 1
                             mock_sleep.assert_called_once()
     
     @pytest.mark.asyncio
@@ -131,11 +68,9 @@ class TestEmailServiceCoverage:
         mock_response = MagicMock()
         mock_response.status_code = 200
         
-        mock_sg_instance = MagicMock()
-        mock_sg_instance.send.return_value = mock_response
+        mock_transport = MagicMock()
+        mock_transport.send = AsyncMock(return_value=mock_response)
         
-        es_module.SendGridAPIClient = MagicMock(return_value=mock_sg_instance)
-        es_module.Mail = MagicMock()
         es_module.USE_GCP = False  # Local mode
         
         with patch.dict(os.environ, {
@@ -143,17 +78,12 @@ class TestEmailServiceCoverage:
             'SENDGRID_FROM_EMAIL': 'test@example.com',
             'USE_GCP': 'false'
         }, clear=False):
-            with patch('asyncio.get_event_loop') as mock_loop:
-                mock_loop_instance = MagicMock()
-                mock_loop_instance.run_in_executor = AsyncMock(return_value=mock_response)
-                mock_loop.return_value = mock_loop_instance
-                
-                from services.email_service import send_email_task as reloaded_send_email_task
-                
-                result = await reloaded_send_email_task('user-456', 'user@example.com')
-                
-                assert result['success'] is True
-                assert result['mode'] == 'local-sendgrid'
-                assert result['statusCode'] == 200
-                assert es_module.USE_GCP is False
+            from services.email_service import send_email_task as reloaded_send_email_task
+            
+            result = await reloaded_send_email_task('user-456', 'user@example.com', transport=mock_transport)
+            
+            assert result['success'] is True
+            assert result['mode'] == 'local-sendgrid'
+            assert result['statusCode'] == 200
+            assert es_module.USE_GCP is False
 
@@ -0,0 +1,82 @@
+import pytest
+import sys
+import os
+from pathlib import Path
+from unittest.mock import patch, MagicMock, AsyncMock
+
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from cloud_functions.send_email.email_template import (
+    TemplateRegistry, TemplateNotFoundError, render_email, get_welcome_email_html
+)
+from services.email_service import send_email_task
+
+
+def make_registry(**kwargs):
+    registry = TemplateRegistry(**kwargs)
+    registry.register('greeting', 'en', subject='Hi {name}', html_source='<p>Hi {name}</p>', text='Hi {name}')
+    registry.register('greeting', 'de', subject='Hallo {name}', html_source='<p>Hallo {name}</p>', text='Hallo {name}')
+    return registry
+
+
+class TestTemplateRegistry:
+    def test_html_fields_are_escaped(self):
+        rendered = make_registry().render('greeting', name='<script>alert("x")</script>')
+
+        assert rendered.html == '<p>Hi &lt;script&gt;alert(&quot;x&quot;)&lt;/script&gt;</p>'
+        assert rendered.text == 'Hi <script>alert("x")</script>'
+
+    def test_subject_strips_line_breaks(self):
+        rendered = make_registry().render('greeting', name='Ann\r\nBcc: attacker@example.com')
+
+        assert '\n' not in rendered.subject
+        assert '\r' not in rendered.subject
+
+    def test_locale_selection_and_fallback(self):
+        registry = make_registry()
+
+        assert registry.render('greeting', 'de', name='Ann').subject == 'Hallo Ann'
+        assert registry.render('greeting', 'de-AT', name='Ann').subject == 'Hallo Ann'
+        assert registry.render('greeting', 'fr', name='Ann').subject == 'Hi Ann'
+
+    def test_unknown_template(self):
+        with pytest.raises(TemplateNotFoundError):
+            make_registry().render('missing', name='Ann')
+
+    def test_rendered_emails_are_cached_with_bounded_size(self):
+        registry = make_registry(cache_size=2)
+
+        first = registry.render('greeting', name='a')
+        assert registry.render('greeting', name='a') is first
+        registry.render('greeting', name='b')
+        registry.render('greeting', name='c')
+
+        stats = registry.stats()
+        assert stats['cached'] == 2
+        assert stats['hits'] == 1
+        assert stats['misses'] == 3
+        assert registry.render('greeting', name='a') is not first
+
+    def test_welcome_template_matches_legacy_html(self):
+        html = get_welcome_email_html('user-123')
+
+        assert '<p>Your user ID: user-123</p>' in html
+        assert render_email('welcome', 'es', user_id='user-123').subject == '¡Bienvenido a nuestra app!'
+
+
+class TestSendEmailTaskTemplates:
+    @pytest.mark.asyncio
+    async def test_payload_contains_text_and_html_parts(self):
+        mock_transport = MagicMock()
+        mock_transport.send = AsyncMock(return_value=MagicMock(status_code=202))
+
+        with patch('services.email_service.USE_GCP', False):
+            with patch.dict(os.environ, {'SENDGRID_API_KEY': 'test-key'}, clear=False):
+                result = await send_email_task('user-<1>', 'test@example.com', transport=mock_transport)
+
+        assert result['success'] is True
+        payload = mock_transport.send.call_args[0][0]
+        assert payload['subject'] == 'Welcome to Our App!'
+        assert [part['type'] for part in payload['content']] == ['text/plain', 'text/html']
+        assert 'Your user ID: user-&lt;1&gt;' in payload['content'][1]['value']
@@ -0,0 +1,189 @@
+import pytest
+import sys
+import os
+import uuid
+import asyncio
+from pathlib import Path
+from unittest.mock import patch, MagicMock, AsyncMock
+
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from services.firestore_writer import FirestoreWriteBehind
+from services.email_service import send_email_task
+from services.sendgrid_client import SendGridResponse
+
+
+class FakeBatch:
+    def __init__(self, client):
+        self.client = client
+        self.updates = []
+
+    def update(self, ref, data):
+        self.updates.append((ref.id, data))
+
+    async def commit(self):
+        if self.client.fail_commits:
+            raise Exception('NOT_FOUND: missing document')
+        self.client.commits.append(list(self.updates))
+
+
+class FakeAsyncClient:
+    def __init__(self, fail_commits=False, missing=()):
+        self.fail_commits = fail_commits
+        self.missing = set(missing)
+        self.commits = []
+        self.single_updates = []
+        self.closed = False
+
+    def collection(self, name):
+        client = self
+        collection = MagicMock()
+
+        def document(doc_id):
+            ref = MagicMock()
+            ref.id = doc_id
+
+            async def update(data):
+                if doc_id in client.missing:
+                    raise Exception(f'NOT_FOUND: {doc_id}')
+                client.single_updates.append((doc_id, data))
+
+            ref.update = update
+            return ref
+
+        collection.document.side_effect = document
+        return collection
+
+    def batch(self):
+        return FakeBatch(self)
+
+    def close(self):
+        self.closed = True
+
+
+def make_writer(client, **kwargs):
+    return FirestoreWriteBehind(client_factory=lambda: client, server_timestamp=lambda: 'SERVER_TIMESTAMP', **kwargs)
+
+
+class TestFirestoreWriteBehind:
+    @pytest.mark.asyncio
+    async def test_updates_are_coalesced_per_user(self):
+        client = FakeAsyncClient()
+        writer = make_writer(client, flush_interval=60)
+
+        await writer.record_email_sent('user-1', '202')
+        await writer.record_email_sent('user-1', '202-retry')
+        await writer.record_email_sent('user-2', '202')
+        await writer.stop()
+
+        assert len(client.commits) == 1
+        assert dict(client.commits[0]) == {
+            'user-1': {'emailSent': True, 'emailSentAt': 'SERVER_TIMESTAMP', 'emailMessageId': '202-retry'},
+            'user-2': {'emailSent': True, 'emailSentAt': 'SERVER_TIMESTAMP', 'emailMessageId': '202'},
+        }
+        assert writer.coalesced == 1
+        assert writer.writes == 2
+        assert client.closed
+
+    @pytest.mark.asyncio
+    async def test_flushes_when_batch_size_reached(self):
+        client = FakeAsyncClient()
+        writer = make_writer(client, max_batch_size=3, flush_interval=60)
+
+        for i in range(3):
+            await writer.record_email_sent(f'user-{i}', '202')
+        await asyncio.sleep(0.01)
+
+        assert len(client.commits) == 1
+        assert writer.pending == 0
+        await writer.stop()
+
+    @pytest.mark.asyncio
+    async def test_flushes_on_interval(self):
+        client = FakeAsyncClient()
+        writer = make_writer(client, flush_interval=0.02)
+        writer.start()
+
+        await writer.record_email_sent('user-1', '202')
+        await asyncio.sleep(0.1)
+
+        assert len(client.commits) == 1
+        await writer.stop()
+
+    @pytest.mark.asyncio
+    async def test_buffer_is_bounded(self):
+        client = FakeAsyncClient()
+        writer = make_writer(client, max_batch_size=500, max_pending=2, flush_interval=60)
+
+        for i in range(5):
+            await writer.record_email_sent(f'user-{i}', '202')
+            assert writer.pending <= 2
+        await writer.stop()
+
+        assert writer.writes == 5
+
+    @pytest.mark.asyncio
+    async def test_failed_batch_falls_back_to_single_updates(self):
+        client = FakeAsyncClient(fail_commits=True, missing={'user-gone'})
+        writer = make_writer(client, flush_interval=60)
+
+        await writer.record_email_sent('user-1', '202')
+        await writer.record_email_sent('user-gone', '202')
+        await writer.stop()
+
+        assert [doc_id for doc_id, _ in client.single_updates] == ['user-1']
+        assert writer.writes == 1
+        assert writer.failed == 1
+
+
+class TestSendEmailTaskStatusWriter:
+    @pytest.mark.asyncio
+    async def test_successful_send_queues_status_update(self):
+        mock_transport = MagicMock()
+        mock_transport.send = AsyncMock(return_value=SendGridResponse(status_code=202, message_id='sg-msg-1'))
+        status_writer = MagicMock()
+        status_writer.record_email_sent = AsyncMock()
+
+        with patch.dict(os.environ, {'SENDGRID_API_KEY': 'test-key'}, clear=False):
+            result = await send_email_task('user-123', 'test@example.com', transport=mock_transport,
+                                           status_writer=status_writer)
+
+        assert result['success'] is True
+        status_writer.record_email_sent.assert_awaited_once_with('user-123', 'sg-msg-1')
+
+    @pytest.mark.asyncio
+    async def test_simulated_send_writes_no_status(self):
+        status_writer = MagicMock()
+        status_writer.record_email_sent = AsyncMock()
+
+        with patch.dict(os.environ, {'SENDGRID_API_KEY': ''}, clear=False), \
+                patch('services.email_service.asyncio.sleep', AsyncMock()):
+            result = await send_email_task('user-123', 'test@example.com', status_writer=status_writer)
+
+        assert result['mode'] == 'local-simulated'
+        status_writer.record_email_sent.assert_not_awaited()
+
+
+@pytest.mark.skipif(not os.getenv('FIRESTORE_EMULATOR_HOST'), reason="Requires the Firestore emulator (docker-compose)")
+class TestFirestoreWriteBehindEmulator:
+    @pytest.mark.asyncio
+    async def test_batched_updates_reach_emulator(self):
+        from google.cloud import firestore
+
+        client = firestore.AsyncClient(project=os.getenv('GCP_PROJECT_ID', 'demo-project'))
+        user_ids = [f'write-behind-{uuid.uuid4().hex}' for _ in range(3)]
+        for user_id in user_ids:
+            await client.collection('users').document(user_id).set({'emailSent': False})
+
+        writer = FirestoreWriteBehind(flush_interval=60)
+        for user_id in user_ids:
+            await writer.record_email_sent(user_id, '202')
+        await writer.stop()
+
+        for user_id in user_ids:
+            snapshot = await client.collection('users').document(user_id).get()
+            assert snapshot.get('emailSent') is True
+            assert snapshot.get('emailMessageId') == '202'
+            await client.collection('users').document(user_id).delete()
+        assert writer.commits == 1
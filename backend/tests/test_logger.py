@@ -1,14 +1,20 @@
 import pytest
 import os
+import json
 import logging
+import queue
+import threading
 from pathlib import Path
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, AsyncMock
 import sys
 
 backend_dir = Path(__file__).parent.parent
 sys.path.insert(0, str(backend_dir))
 
-from logger_config import setup_logger, logger, LOG_DIR, LOG_FILE, ERROR_LOG_FILE
+from logger_config import (
+    setup_logger, shutdown_logging, log_event, logger, BoundedQueueHandler, JsonFormatter, LogEvent,
+    LOG_DIR, LOG_FILE, ERROR_LOG_FILE
+)
 
 
 class TestLoggerConfig:
@@ -75,3 +81,117 @@ class TestLoggerConfig:
             assert "user_registration_app" in caplog.text or "INFO" in caplog.text
             assert "Format test" in caplog.text
 
+
+
+class CollectingHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+        self.threads = set()
+
+    def emit(self, record):
+        self.threads.add(threading.get_ident())
+        self.records.append(record)
+
+
+class TestQueuedLogging:
+    def test_records_are_written_by_listener_thread(self):
+        collector = CollectingHandler()
+        with patch('logger_config._build_handlers', return_value=[collector]):
+            test_logger = setup_logger("test_queued_logger", level="INFO", use_queue=True)
+
+        assert [type(h) for h in test_logger.handlers] == [BoundedQueueHandler]
+        test_logger.info("queued %s", "message")
+        shutdown_logging()
+
+        assert [r.getMessage() for r in collector.records] == ["queued message"]
+        assert threading.get_ident() not in collector.threads
+        assert test_logger.handlers == [collector]
+
+    def test_log_queue_env_enables_queue(self):
+        with patch.dict(os.environ, {'LOG_ASYNC': 'true'}, clear=False):
+            with patch('logger_config._build_handlers', return_value=[CollectingHandler()]):
+                test_logger = setup_logger("test_env_queued_logger")
+
+        assert isinstance(test_logger.handlers[0], BoundedQueueHandler)
+        shutdown_logging()
+
+    def test_full_queue_drops_and_reports(self):
+        log_queue = queue.Queue(maxsize=2)
+        handler = BoundedQueueHandler(log_queue)
+        test_logger = logging.getLogger("test_bounded_queue")
+        test_logger.addHandler(handler)
+        test_logger.propagate = False
+
+        for i in range(5):
+            test_logger.warning(f"message {i}")
+        assert handler.dropped == 3
+
+        log_queue.get_nowait()
+        log_queue.get_nowait()
+        test_logger.warning("after overflow")
+        messages = [log_queue.get_nowait().getMessage() for _ in range(2)]
+
+        assert messages == ["after overflow", "Log queue full, dropped 3 log records"]
+        assert handler.dropped == 3
+        test_logger.removeHandler(handler)
+
+
+def email_events(caplog):
+    return [r.msg.fields for r in caplog.records if isinstance(r.msg, LogEvent)]
+
+
+class TestLogEvents:
+    def test_event_is_one_json_record(self, caplog):
+        with caplog.at_level("INFO"):
+            log_event('queued', task_id='task-1', user_id='user-1', duration_ms=1.5)
+
+        assert email_events(caplog) == [
+            {'event': 'email', 'stage': 'queued', 'task_id': 'task-1', 'user_id': 'user-1', 'duration_ms': 1.5}
+        ]
+        assert json.loads(caplog.records[-1].getMessage())['stage'] == 'queued'
+
+    def test_success_events_are_sampled_errors_kept(self, caplog):
+        with patch('logger_config.EVENT_SAMPLE_RATE', 0.0):
+            with caplog.at_level("INFO"):
+                for _ in range(20):
+                    log_event('sent', user_id='user-1')
+                log_event('send_failed', logging.ERROR, user_id='user-1', error='boom')
+
+        assert [e['stage'] for e in email_events(caplog)] == ['send_failed']
+
+    def test_sampled_events_carry_rate(self, caplog):
+        with patch('logger_config.EVENT_SAMPLE_RATE', 0.5), patch('logger_config.random.random', return_value=0.1):
+            with caplog.at_level("INFO"):
+                log_event('sent', user_id='user-1')
+
+        assert email_events(caplog)[0]['sample_rate'] == 0.5
+
+    def test_event_not_formatted_when_level_disabled(self):
+        with patch.object(LogEvent, '__str__', side_effect=AssertionError('formatted')) as mock_str:
+            with patch.object(logger, 'isEnabledFor', return_value=False):
+                log_event('queued', task_id='task-1')
+        mock_str.assert_not_called()
+
+    def test_json_formatter_merges_event_fields(self):
+        record = logging.LogRecord('app', logging.INFO, __file__, 1,
+                                   LogEvent({'event': 'email', 'stage': 'sent', 'user_id': 'user-1'}), None, None)
+        data = json.loads(JsonFormatter().format(record))
+
+        assert data['stage'] == 'sent'
+        assert data['user_id'] == 'user-1'
+        assert data['level'] == 'INFO'
+
+    @pytest.mark.asyncio
+    async def test_simulated_send_emits_single_event(self, caplog):
+        from services.email_service import send_email_task
+
+        with patch.dict(os.environ, {'SENDGRID_API_KEY': ''}, clear=False):
+            with patch('services.email_service.asyncio.sleep', new_callable=AsyncMock):
+                with caplog.at_level("INFO"):
+                    await send_email_task('user-1', 'user@example.com')
+
+        events = email_events(caplog)
+        assert [e['stage'] for e in events] == ['sent']
+        assert events[0]['mode'] == 'local-simulated'
+        assert 'duration_ms' in events[0]
@@ -0,0 +1,102 @@
+import pytest
+import sys
+import os
+from pathlib import Path
+from unittest.mock import patch, AsyncMock, MagicMock
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+import importlib.util
+app_file = backend_dir / "app.py"
+spec = importlib.util.spec_from_file_location("app_module", app_file)
+app_module = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(app_module)
+
+from services.email_service import EmailService, send_email_task
+from services.firestore_writer import FirestoreWriteBehind
+from services.sendgrid_client import SendGridError, SendGridResponse
+
+client = TestClient(app_module.app)
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+class TestMetricsEndpoint:
+    def test_exposes_prometheus_text(self):
+        response = client.get('/metrics')
+
+        assert response.status_code == 200
+        assert response.headers['content-type'].startswith('text/plain')
+        for name in ('email_api_request_duration_seconds', 'email_enqueue_duration_seconds',
+                     'email_provider_send_duration_seconds', 'email_firestore_update_duration_seconds',
+                     'email_sends_total', 'email_queue_depth', 'email_workers_in_flight'):
+            assert f'# TYPE {name}' in response.text
+
+    def test_request_latency_by_outcome(self):
+        before = sample('email_api_request_duration_seconds_count', endpoint='send_email', outcome='accepted')
+        with patch.object(EmailService, 'queue_email', AsyncMock(return_value='task-1')):
+            response = client.post('/api/send-email', json={'userId': 'user-1', 'email': 'user@example.com'})
+
+        assert response.status_code == 202
+        assert sample('email_api_request_duration_seconds_count', endpoint='send_email', outcome='accepted') == before + 1
+
+
+class TestPipelineMetrics:
+    @pytest.mark.asyncio
+    async def test_successful_send_is_counted_and_timed(self):
+        transport = MagicMock()
+        transport.send = AsyncMock(return_value=SendGridResponse(status_code=202))
+        sends = sample('email_sends_total', mode='local-sendgrid', outcome='success')
+        timed = sample('email_provider_send_duration_seconds_count', mode='local-sendgrid')
+
+        with patch('services.email_service.USE_GCP', False):
+            with patch.dict(os.environ, {'SENDGRID_API_KEY': 'test-key'}, clear=False):
+                result = await send_email_task('user-1', 'user@example.com', transport=transport)
+
+        assert result['success'] is True
+        assert sample('email_sends_total', mode='local-sendgrid', outcome='success') == sends + 1
+        assert sample('email_provider_send_duration_seconds_count', mode='local-sendgrid') == timed + 1
+
+    @pytest.mark.asyncio
+    async def test_failed_send_is_counted(self):
+        transport = MagicMock()
+        transport.send = AsyncMock(side_effect=SendGridError(400, 'bad request'))
+        failures = sample('email_sends_total', mode='local-sendgrid', outcome='failure')
+
+        with patch('services.email_service.USE_GCP', False):
+            with patch.dict(os.environ, {'SENDGRID_API_KEY': 'test-key'}, clear=False):
+                result = await send_email_task('user-1', 'user@example.com', transport=transport)
+
+        assert result['success'] is False
+        assert sample('email_sends_total', mode='local-sendgrid', outcome='failure') == failures + 1
+
+    @pytest.mark.asyncio
+    async def test_enqueue_and_queue_gauges(self):
+        with patch('services.email_service.USE_GCP', False):
+            with patch.dict(os.environ, {'EMAIL_MIN_DELAY_SECONDS': '0', 'EMAIL_DEDUPE_TTL_SECONDS': '0'}, clear=False):
+                service = EmailService()
+                enqueued = sample('email_enqueue_duration_seconds_count', mode='local')
+                with patch.object(service.worker_pool, 'start'):
+                    await service.queue_email('user-1', 'a@example.com')
+                    await service.queue_email('user-2', 'b@example.com')
+
+        assert sample('email_enqueue_duration_seconds_count', mode='local') == enqueued + 2
+        assert sample('email_queue_depth') == 2
+        assert sample('email_workers_in_flight') == 0
+
+    @pytest.mark.asyncio
+    async def test_firestore_batch_commit_is_timed(self):
+        firestore = MagicMock()
+        firestore.batch.return_value.commit = AsyncMock()
+        writer = FirestoreWriteBehind(client_factory=lambda: firestore, server_timestamp=lambda: 'now')
+        commits = sample('email_firestore_update_duration_seconds_count', kind='batch')
+
+        await writer.record_email_sent('user-1', 'msg-1')
+        await writer.stop()
+
+        assert sample('email_firestore_update_duration_seconds_count', kind='batch') == commits + 1
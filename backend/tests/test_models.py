@@ -0,0 +1,62 @@
+import pytest
+import sys
+import random
+from pathlib import Path
+
+from pydantic import EmailStr, TypeAdapter, ValidationError
+
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from models import SendEmailRequest
+
+email_str = TypeAdapter(EmailStr)
+
+
+def validate(adapter_or_model, value):
+    try:
+        if adapter_or_model is SendEmailRequest:
+            return SendEmailRequest(userId='u', email=value).email
+        return adapter_or_model.validate_python(value)
+    except ValidationError as e:
+        return ('error', e.errors()[0]['msg'])
+
+
+def random_address(rng):
+    local = ''.join(rng.choice("abcXYZ019.+_-'!") for _ in range(rng.randint(0, 12)))
+    labels = [''.join(rng.choice('abcDEF09-') for _ in range(rng.randint(0, 8))) for _ in range(rng.randint(1, 4))]
+    tld = rng.choice(['com', 'ORG', 'io', 'c', 'c0m', 'test', 'local', 'xn--p1ai', ''])
+    return f"{local}@{'.'.join(labels)}.{tld}"
+
+
+class TestSendEmailRequestEmail:
+    @pytest.mark.parametrize('value', [
+        'user@example.com',
+        'User.Name+tag@Example.COM',
+        "o'neil@sub.example.org",
+        'a@xn--80ak6aa92e.com',
+        'a@foo.test',
+        'a..b@example.com',
+        '.a@example.com',
+        'a@-example.com',
+        'a@1.2.3.4',
+        'John <john@example.com>',
+        ' user@example.com ',
+        'user@exa--mple.com',
+        'a' * 65 + '@example.com',
+        'user@' + 'a' * 64 + '.com',
+        'üser@example.com',
+    ])
+    def test_matches_email_str(self, value):
+        assert validate(SendEmailRequest, value) == validate(email_str, value)
+
+    def test_matches_email_str_on_random_addresses(self):
+        rng = random.Random(1234)
+        for _ in range(3000):
+            value = random_address(rng)
+            assert validate(SendEmailRequest, value) == validate(email_str, value), value
+
+    def test_validate_json(self):
+        request = SendEmailRequest.model_validate_json(b'{"userId": "u", "email": "A@Example.com"}')
+
+        assert request.email == 'A@example.com'
@@ -0,0 +1,127 @@
+import pytest
+import sys
+import os
+import time
+from pathlib import Path
+from unittest.mock import patch, AsyncMock
+
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from services.rate_limit import OutboundRateLimiter, TokenBucket, parse_domain_rates, recipient_domain
+from services.email_service import EmailService
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+    async def sleep(self, delay):
+        self.now += delay
+
+
+class TestTokenBucket:
+    def test_burst_then_refill_at_rate(self):
+        bucket = TokenBucket(rate=10, capacity=2, now=0.0)
+        for _ in range(2):
+            assert bucket.wait_time(0.0) == 0.0
+            bucket.take()
+        assert bucket.wait_time(0.0) == pytest.approx(0.1)
+        assert bucket.wait_time(0.1) == 0.0
+
+    def test_refill_is_capped_at_capacity(self):
+        bucket = TokenBucket(rate=10, capacity=2, now=0.0)
+        bucket.wait_time(60.0)
+        assert bucket.tokens == 2
+
+
+class TestOutboundRateLimiter:
+    def test_recipient_domain_is_normalized(self):
+        assert recipient_domain('User@Example.COM ') == 'example.com'
+        assert parse_domain_rates('gmail.com=20, Yahoo.com=5,,bad') == {'gmail.com': 20.0, 'yahoo.com': 5.0}
+
+    def test_global_bucket_limits_all_domains(self):
+        clock = FakeClock()
+        limiter = OutboundRateLimiter(rate=10, burst=2, clock=clock)
+        assert limiter.try_acquire('a@one.com') == 0.0
+        assert limiter.try_acquire('b@two.com') == 0.0
+        assert limiter.try_acquire('c@three.com') == pytest.approx(0.1)
+
+    def test_throttled_domain_does_not_block_others(self):
+        clock = FakeClock()
+        limiter = OutboundRateLimiter(rate=100, domain_rate=1, domain_burst=1, clock=clock)
+        assert limiter.try_acquire('a@gmail.com') == 0.0
+        assert limiter.try_acquire('b@gmail.com') == pytest.approx(1.0)
+        assert limiter.try_acquire('c@example.com') == 0.0
+
+    def test_domain_overrides_take_precedence(self):
+        clock = FakeClock()
+        limiter = OutboundRateLimiter(domain_rates={'gmail.com': 2}, domain_burst=1, clock=clock)
+        assert limiter.try_acquire('a@gmail.com') == 0.0
+        assert limiter.try_acquire('b@gmail.com') == pytest.approx(0.5)
+        for _ in range(5):
+            assert limiter.try_acquire('c@example.com') == 0.0
+
+    def test_rejected_attempt_does_not_spend_global_token(self):
+        clock = FakeClock()
+        limiter = OutboundRateLimiter(rate=10, burst=1, domain_rate=1, domain_burst=1, clock=clock)
+        limiter.try_acquire('a@gmail.com')
+        clock.now += 0.1
+        assert limiter.try_acquire('b@gmail.com') > 0
+        assert limiter.try_acquire('c@example.com') == 0.0
+
+    @pytest.mark.asyncio
+    async def test_acquire_delays_instead_of_failing(self):
+        clock = FakeClock()
+        limiter = OutboundRateLimiter(rate=5, burst=1, clock=clock, sleep=clock.sleep)
+        waits = [await limiter.acquire(f'user{i}@example.com') for i in range(4)]
+
+        assert waits == [0.0, pytest.approx(0.2), pytest.approx(0.2), pytest.approx(0.2)]
+        assert clock.now == pytest.approx(1000.6)
+        assert limiter.stats() == {'rateLimited': 3, 'rateLimitWaitSeconds': 0.6, 'rateLimitDomains': 0}
+
+    def test_domain_buckets_are_bounded(self):
+        limiter = OutboundRateLimiter(domain_rate=10, max_domains=2)
+        for domain in ('a.com', 'b.com', 'c.com'):
+            limiter.try_acquire(f'user@{domain}')
+        assert list(limiter._domains) == ['b.com', 'c.com']
+
+    def test_disabled_without_configuration(self):
+        with patch.dict(os.environ, {}, clear=False):
+            for name in ('EMAIL_RATE_LIMIT_PER_SECOND', 'EMAIL_DOMAIN_RATE_LIMIT_PER_SECOND', 'EMAIL_DOMAIN_RATE_LIMITS'):
+                os.environ.pop(name, None)
+            assert OutboundRateLimiter.from_env() is None
+
+
+class TestEmailServiceRateLimit:
+    @pytest.mark.asyncio
+    async def test_workers_pace_sends_to_limit(self):
+        env = {
+            'EMAIL_MIN_DELAY_SECONDS': '0',
+            'EMAIL_DEDUPE_TTL_SECONDS': '0',
+            'EMAIL_RATE_LIMIT_PER_SECOND': '50',
+            'EMAIL_RATE_LIMIT_BURST': '1',
+        }
+        send_times = []
+
+        async def fake_send(user_id, email, **kwargs):
+            send_times.append(time.monotonic())
+            return {'success': True, 'email': email, 'userId': user_id}
+
+        with patch('services.email_service.USE_GCP', False):
+            with patch.dict(os.environ, env, clear=False):
+                service = EmailService()
+                with patch('services.email_service.send_email_task', AsyncMock(side_effect=fake_send)):
+                    for i in range(6):
+                        await service.queue_email(f'user-{i}', f'user{i}@example.com')
+                    await service.worker_pool.queue.join()
+                await service.stop()
+
+        assert len(send_times) == 6
+        assert send_times[-1] - send_times[0] >= 0.09
+        stats = service.stats()
+        assert stats['failed'] == 0
+        assert stats['rateLimited'] >= 4
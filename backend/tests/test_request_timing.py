@@ -0,0 +1,105 @@
+import pytest
+import sys
+import os
+import pstats
+from pathlib import Path
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+import importlib.util
+app_file = backend_dir / "app.py"
+spec = importlib.util.spec_from_file_location("app_module", app_file)
+app_module = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(app_module)
+
+from request_timing import RequestTimings, ServerTimingMiddleware, current_timings, stage
+from services.email_service import EmailService
+from routers import email_router
+
+
+def parse_server_timing(header):
+    timings = {}
+    for part in header.split(','):
+        name, _, duration = part.strip().partition(';dur=')
+        timings[name] = float(duration)
+    return timings
+
+
+@pytest.fixture
+def service():
+    with patch('services.email_service.USE_GCP', False):
+        with patch.dict(os.environ, {'EMAIL_MIN_DELAY_SECONDS': '0.02', 'EMAIL_DEDUPE_TTL_SECONDS': '0'}, clear=False):
+            service = EmailService()
+            with patch.object(service.worker_pool, 'start'):
+                with patch.object(email_router, 'email_service', service):
+                    yield service
+
+
+class TestServerTiming:
+    def test_send_email_reports_stage_breakdown(self, service):
+        client = TestClient(ServerTimingMiddleware(app_module.app))
+        response = client.post('/api/send-email', json={'userId': 'user-1', 'email': 'user@example.com'})
+
+        assert response.status_code == 202
+        timings = parse_server_timing(response.headers['server-timing'])
+        assert {'parse', 'admit', 'queue', 'enqueue', 'pad', 'log', 'total'} <= set(timings)
+        assert timings['pad'] >= 15
+        assert timings['queue'] >= timings['pad']
+        assert timings['total'] >= timings['queue']
+
+    def test_disabled_by_default(self, service):
+        client = TestClient(ServerTimingMiddleware(app_module.app, server_timing=False))
+        response = client.get('/api/health')
+
+        assert response.status_code == 200
+        assert 'server-timing' not in response.headers
+
+    def test_stages_are_noop_outside_requests(self):
+        with stage('queue'):
+            pass
+        assert current_timings() is None
+
+    def test_repeated_stages_accumulate(self):
+        timings = RequestTimings()
+        timings.add('log', 0.001)
+        timings.add('log', 0.002)
+        assert timings.header(0.01) == b'log;dur=3.00, total;dur=10.00'
+
+
+class TestProfiling:
+    def test_token_header_writes_profile(self, tmp_path, service):
+        middleware = ServerTimingMiddleware(
+            app_module.app, server_timing=False, profile_token='secret', profile_dir=tmp_path
+        )
+        client = TestClient(middleware)
+
+        response = client.post('/api/send-email', json={'userId': 'user-1', 'email': 'user@example.com'},
+                               headers={'X-Profile': 'secret'})
+
+        assert response.status_code == 202
+        profile_file = tmp_path / response.headers['x-profile-file']
+        assert profile_file.exists()
+        stats = pstats.Stats(str(profile_file))
+        assert any('queue_email' in function for _, _, function in stats.stats)
+
+    def test_wrong_token_is_ignored(self, tmp_path):
+        middleware = ServerTimingMiddleware(
+            app_module.app, server_timing=False, profile_token='secret', profile_dir=tmp_path
+        )
+        response = TestClient(middleware).get('/api/health', headers={'X-Profile': 'guess'})
+
+        assert 'x-profile-file' not in response.headers
+        assert list(tmp_path.iterdir()) == []
+
+    def test_sampling_respects_file_limit(self, tmp_path):
+        middleware = ServerTimingMiddleware(
+            app_module.app, server_timing=False, profile_sample_rate=1.0, profile_dir=tmp_path, profile_max_files=2
+        )
+        client = TestClient(middleware)
+        for _ in range(4):
+            client.get('/api/health')
+
+        assert len(list(tmp_path.glob('*.prof'))) == 2
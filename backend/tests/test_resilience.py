@@ -0,0 +1,284 @@
+import pytest
+import sys
+import os
+import asyncio
+from pathlib import Path
+from unittest.mock import patch
+
+import httpx
+
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from benchmarks.stubs import FaultInjectingSendGridStub, ThreadedStubServer
+from services.resilience import (
+    CircuitBreaker, CircuitOpenError, ResilientSender, RetryBudget, RetryPolicy, is_retryable,
+    STATE_CLOSED, STATE_HALF_OPEN, STATE_OPEN
+)
+from services.sendgrid_client import SendGridError, SendGridTransport, build_mail_payload, parse_retry_after
+from services.email_service import EmailService, send_email_task
+
+PAYLOAD = build_mail_payload('noreply@example.com', 'user@example.com', 'Welcome', '<p>Hi</p>')
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+async def no_sleep(delay):
+    pass
+
+
+@pytest.fixture(scope='module')
+def sendgrid_stub():
+    stub = FaultInjectingSendGridStub()
+    with ThreadedStubServer(stub) as server:
+        yield stub, server.url
+
+
+@pytest.fixture
+def stub(sendgrid_stub):
+    stub, url = sendgrid_stub
+    stub.faults.clear()
+    stub.requests = 0
+    stub.retry_after = None
+    return stub, url
+
+
+class TestRetryPolicy:
+    def test_backoff_grows_exponentially_up_to_cap(self):
+        policy = RetryPolicy(base_delay=0.5, max_delay=3.0, rng=lambda: 1.0)
+        assert [policy.backoff(attempt) for attempt in range(1, 6)] == [0.5, 1.0, 2.0, 3.0, 3.0]
+
+    def test_backoff_uses_full_jitter(self):
+        policy = RetryPolicy(base_delay=1.0, rng=lambda: 0.25)
+        assert policy.backoff(3) == 1.0
+
+    def test_only_transient_errors_are_retryable(self):
+        assert is_retryable(SendGridError(503, 'unavailable'))
+        assert is_retryable(SendGridError(429, 'rate limited'))
+        assert is_retryable(httpx.ConnectError('refused'))
+        assert is_retryable(asyncio.TimeoutError())
+        assert not is_retryable(SendGridError(400, 'bad request'))
+        assert not is_retryable(ValueError('bad payload'))
+
+
+    def test_retry_after_accepts_seconds_and_dates(self):
+        assert parse_retry_after('3') == 3.0
+        assert parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT') == 0.0
+        assert parse_retry_after('soon') is None
+        assert parse_retry_after(None) is None
+
+
+class TestRetryBudget:
+    def test_budget_caps_retries_relative_to_requests(self):
+        budget = RetryBudget(ratio=0.5, max_tokens=2)
+        assert budget.withdraw()
+        assert budget.withdraw()
+        assert not budget.withdraw()
+        budget.deposit()
+        budget.deposit()
+        assert budget.withdraw()
+        assert budget.exhausted == 1
+
+
+class TestCircuitBreaker:
+    def test_opens_after_consecutive_failures(self):
+        breaker = CircuitBreaker(failure_threshold=3, recovery_timeout=30, clock=FakeClock())
+        breaker.record_failure()
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        breaker.record_failure()
+        assert breaker.state == STATE_CLOSED
+        breaker.record_failure()
+        assert breaker.state == STATE_OPEN
+
+        with pytest.raises(CircuitOpenError) as exc_info:
+            breaker.before_call()
+        assert exc_info.value.retry_after == 30
+        assert breaker.rejected == 1
+
+    def test_half_open_probe_closes_or_reopens(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=10, clock=clock)
+        breaker.record_failure()
+        clock.now += 10
+        assert breaker.state == STATE_HALF_OPEN
+
+        breaker.before_call()
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call()
+        breaker.record_failure()
+        assert breaker.state == STATE_OPEN
+        assert breaker.opened == 2
+
+        clock.now += 10
+        breaker.before_call()
+        breaker.record_success()
+        assert breaker.state == STATE_CLOSED
+
+    def test_zero_threshold_never_opens(self):
+        breaker = CircuitBreaker(failure_threshold=0)
+        for _ in range(100):
+            breaker.record_failure()
+        assert breaker.state == STATE_CLOSED
+
+
+class TestResilientSenderAgainstStub:
+    @pytest.mark.asyncio
+    async def test_transient_errors_are_retried(self, stub):
+        stub, url = stub
+        stub.fail_next(503, 429)
+        sender = ResilientSender(RetryPolicy(max_attempts=3), sleep=no_sleep)
+
+        async with SendGridTransport('test-key', base_url=url) as transport:
+            response = await sender.call(lambda: transport.send(PAYLOAD))
+
+        assert response.status_code == 202
+        assert stub.requests == 3
+        assert sender.stats()['retries'] == 2
+
+    @pytest.mark.asyncio
+    async def test_rate_limited_retry_waits_for_retry_after(self, stub):
+        stub, url = stub
+        stub.retry_after = '2'
+        stub.fail_next(429)
+        delays = []
+
+        async def sleep(delay):
+            delays.append(delay)
+
+        sender = ResilientSender(RetryPolicy(base_delay=0.1, max_delay=10.0), sleep=sleep)
+
+        async with SendGridTransport('test-key', base_url=url) as transport:
+            response = await sender.call(lambda: transport.send(PAYLOAD))
+
+        assert response.status_code == 202
+        assert delays == [2.0]
+
+    @pytest.mark.asyncio
+    async def test_retry_after_beyond_max_delay_is_not_retried(self, stub):
+        stub, url = stub
+        stub.retry_after = '60'
+        stub.fail_next(429)
+        sender = ResilientSender(RetryPolicy(max_delay=10.0), sleep=no_sleep)
+
+        async with SendGridTransport('test-key', base_url=url) as transport:
+            with pytest.raises(SendGridError) as exc_info:
+                await sender.call(lambda: transport.send(PAYLOAD))
+
+        assert exc_info.value.retry_after == 60.0
+        assert stub.requests == 1
+        assert sender.budget.tokens == sender.budget.max_tokens
+
+    @pytest.mark.asyncio
+    async def test_gives_up_after_max_attempts(self, stub):
+        stub, url = stub
+        stub.fail_next(500, 500, 500)
+        sender = ResilientSender(RetryPolicy(max_attempts=2), sleep=no_sleep)
+
+        async with SendGridTransport('test-key', base_url=url) as transport:
+            with pytest.raises(SendGridError):
+                await sender.call(lambda: transport.send(PAYLOAD))
+
+        assert stub.requests == 2
+
+    @pytest.mark.asyncio
+    async def test_client_errors_are_not_retried(self, stub):
+        stub, url = stub
+        stub.fail_next(400)
+        sender = ResilientSender(RetryPolicy(max_attempts=3), sleep=no_sleep)
+
+        async with SendGridTransport('test-key', base_url=url) as transport:
+            with pytest.raises(SendGridError):
+                await sender.call(lambda: transport.send(PAYLOAD))
+
+        assert stub.requests == 1
+        assert sender.breaker.consecutive_failures == 0
+
+    @pytest.mark.asyncio
+    async def test_exhausted_budget_stops_retry_storm(self, stub):
+        stub, url = stub
+        stub.fail_next(*[503] * 20)
+        sender = ResilientSender(
+            RetryPolicy(max_attempts=5), RetryBudget(ratio=0.1, max_tokens=2), CircuitBreaker(failure_threshold=0),
+            sleep=no_sleep
+        )
+
+        async with SendGridTransport('test-key', base_url=url) as transport:
+            for _ in range(4):
+                with pytest.raises(SendGridError):
+                    await sender.call(lambda: transport.send(PAYLOAD))
+
+        assert sender.retries == 2
+        assert stub.requests == 6
+        assert sender.stats()['retryBudgetExhausted'] == 4
+
+    @pytest.mark.asyncio
+    async def test_open_circuit_fails_fast_without_calling_provider(self, stub):
+        stub, url = stub
+        stub.fail_next(*[503] * 10)
+        clock = FakeClock()
+        sender = ResilientSender(
+            RetryPolicy(max_attempts=1), breaker=CircuitBreaker(failure_threshold=3, recovery_timeout=5, clock=clock),
+            sleep=no_sleep
+        )
+
+        async with SendGridTransport('test-key', base_url=url) as transport:
+            for _ in range(3):
+                with pytest.raises(SendGridError):
+                    await sender.call(lambda: transport.send(PAYLOAD))
+            with pytest.raises(CircuitOpenError):
+                await sender.call(lambda: transport.send(PAYLOAD))
+            assert stub.requests == 3
+
+            stub.faults.clear()
+            clock.now += 5
+            response = await sender.call(lambda: transport.send(PAYLOAD))
+
+        assert response.status_code == 202
+        assert sender.stats() == {
+            'retries': 0, 'retryBudgetExhausted': 0, 'circuitState': STATE_CLOSED, 'circuitOpened': 1,
+            'circuitRejected': 1
+        }
+
+
+class TestEmailServiceResilience:
+    @pytest.fixture
+    def service(self):
+        with patch('services.email_service.USE_GCP', False):
+            with patch.dict(os.environ, {
+                'EMAIL_MIN_DELAY_SECONDS': '0', 'EMAIL_BREAKER_FAILURE_THRESHOLD': '2', 'EMAIL_RETRY_MAX_ATTEMPTS': '1'
+            }, clear=False):
+                yield EmailService()
+
+    @pytest.mark.asyncio
+    async def test_failed_send_reports_circuit_and_sheds_requests(self, service, stub):
+        stub, url = stub
+        stub.fail_next(503, 503)
+
+        with patch.dict(os.environ, {'SENDGRID_API_KEY': 'test-key'}, clear=False):
+            async with SendGridTransport('test-key', base_url=url) as transport:
+                results = [
+                    await send_email_task('user-1', 'user@example.com', transport=transport,
+                                          resilience=service.resilience)
+                    for _ in range(3)
+                ]
+
+        assert [result['success'] for result in results] == [False, False, False]
+        assert 'circuit open' in results[2]['error']
+        assert stub.requests == 2
+
+        decision = service.admit()
+        assert decision.admitted is False
+        assert decision.status_code == 503
+        assert decision.reason == 'circuit_open'
+        assert decision.retry_after >= 1
+        stats = service.stats()
+        assert stats['circuitState'] == STATE_OPEN
+        assert stats['shedByReason'] == {'circuit_open': 1}
@@ -0,0 +1,263 @@
+import pytest
+import sys
+import os
+import json
+import asyncio
+from pathlib import Path
+from unittest.mock import patch
+
+import httpx
+
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from services.send_batcher import SendBatcher
+from services.sendgrid_client import SendGridTransport, build_batch_payload
+from services.email_service import EmailService, send_email_batch_task
+from cloud_functions.send_email.email_template import get_template, render_email
+
+
+def make_transport(handler):
+    return SendGridTransport('test-key', base_url='http://sendgrid.test', http_transport=httpx.MockTransport(handler))
+
+
+def apply_substitutions(text, substitutions):
+    for placeholder, value in substitutions.items():
+        text = text.replace(placeholder, value)
+    return text
+
+
+class TestSendBatcher:
+    @pytest.mark.asyncio
+    async def test_full_batch_is_sent_at_once(self):
+        batches = []
+
+        async def send_batch(key, items):
+            batches.append((key, items))
+            return [f'sent-{item}' for item in items]
+
+        batcher = SendBatcher(send_batch, max_batch_size=3, max_wait=60)
+        results = await asyncio.gather(*(batcher.submit('welcome', i) for i in range(3)))
+
+        assert results == ['sent-0', 'sent-1', 'sent-2']
+        assert batches == [('welcome', [0, 1, 2])]
+
+    @pytest.mark.asyncio
+    async def test_partial_batch_is_sent_after_the_window(self):
+        batches = []
+
+        async def send_batch(key, items):
+            batches.append(items)
+            return items
+
+        batcher = SendBatcher(send_batch, max_batch_size=100, max_wait=0.01)
+        results = await asyncio.gather(*(batcher.submit('welcome', i) for i in range(5)))
+
+        assert results == [0, 1, 2, 3, 4]
+        assert batches == [[0, 1, 2, 3, 4]]
+        assert batcher.stats() == {'sendBatches': 1, 'avgSendBatchSize': 5.0}
+
+    @pytest.mark.asyncio
+    async def test_keys_are_batched_separately(self):
+        batches = []
+
+        async def send_batch(key, items):
+            batches.append((key, items))
+            return items
+
+        batcher = SendBatcher(send_batch, max_batch_size=100, max_wait=0.01)
+        await asyncio.gather(batcher.submit('en', 1), batcher.submit('de', 2), batcher.submit('en', 3))
+
+        assert sorted(batches) == [('de', [2]), ('en', [1, 3])]
+
+    @pytest.mark.asyncio
+    async def test_crashed_batch_fails_every_submitter(self):
+        async def send_batch(key, items):
+            raise RuntimeError('boom')
+
+        batcher = SendBatcher(send_batch, max_batch_size=2, max_wait=60)
+        results = await asyncio.gather(batcher.submit('k', 1), batcher.submit('k', 2), return_exceptions=True)
+
+        assert all(isinstance(result, RuntimeError) for result in results)
+
+    @pytest.mark.asyncio
+    async def test_short_result_list_fails_every_submitter(self):
+        async def send_batch(key, items):
+            return items[:1]
+
+        batcher = SendBatcher(send_batch, max_batch_size=2, max_wait=60)
+        results = await asyncio.wait_for(
+            asyncio.gather(batcher.submit('k', 1), batcher.submit('k', 2), return_exceptions=True), timeout=1
+        )
+
+        assert all(isinstance(result, RuntimeError) for result in results)
+
+    @pytest.mark.asyncio
+    async def test_cancelled_submitter_does_not_break_the_batch(self):
+        async def send_batch(key, items):
+            return items
+
+        batcher = SendBatcher(send_batch, max_batch_size=100, max_wait=0.02)
+        cancelled = asyncio.ensure_future(batcher.submit('k', 1))
+        kept = asyncio.ensure_future(batcher.submit('k', 2))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+
+        assert await kept == 2
+
+    def test_from_env(self):
+        async def send_batch(key, items):
+            return items
+
+        with patch.dict(os.environ, {'EMAIL_SEND_BATCH_SIZE': '1'}, clear=False):
+            assert SendBatcher.from_env(send_batch) is None
+        env = {'EMAIL_SEND_BATCH_SIZE': '5000', 'EMAIL_SEND_BATCH_WINDOW_SECONDS': '0.2'}
+        with patch.dict(os.environ, env, clear=False):
+            batcher = SendBatcher.from_env(send_batch)
+        assert batcher.max_batch_size == 1000
+        assert batcher.max_wait == 0.2
+
+
+class TestBatchPayload:
+    def test_one_personalization_per_recipient(self):
+        payload = build_batch_payload(
+            'noreply@example.com', [('a@example.com', {'-x-': '1'}), ('b@example.com', {'-x-': '2'})],
+            'Hi -x-', '<p>-x-</p>'
+        )
+
+        assert payload['personalizations'] == [
+            {'to': [{'email': 'a@example.com'}], 'substitutions': {'-x-': '1'}},
+            {'to': [{'email': 'b@example.com'}], 'substitutions': {'-x-': '2'}},
+        ]
+        assert payload['subject'] == 'Hi -x-'
+
+    def test_too_many_recipients(self):
+        with pytest.raises(ValueError):
+            build_batch_payload('noreply@example.com', [('a@example.com', {})] * 1001, 's', 'c')
+
+    def test_substitutions_reproduce_the_rendered_email(self):
+        template = get_template('welcome')
+        placeholders = template.render_placeholders()
+        user_id = '<script>alert(1)</script>'
+        substitutions = template.substitutions({'user_id': user_id})
+        expected = render_email('welcome', user_id=user_id)
+
+        assert apply_substitutions(placeholders.subject, substitutions) == expected.subject
+        assert apply_substitutions(placeholders.html, substitutions) == expected.html
+        assert apply_substitutions(placeholders.text, substitutions) == expected.text
+        assert '<script>' not in apply_substitutions(placeholders.html, substitutions)
+
+
+class TestSendEmailBatchTask:
+    @pytest.mark.asyncio
+    async def test_one_request_with_per_job_results(self):
+        seen = []
+
+        def handler(request):
+            seen.append(json.loads(request.content))
+            return httpx.Response(202, headers={'X-Message-Id': 'sg-batch-1'})
+
+        jobs = [('user-1', 'a@example.com'), ('user-2', 'b@example.com')]
+        with patch.dict(os.environ, {'SENDGRID_API_KEY': 'test-key'}, clear=False):
+            async with make_transport(handler) as transport:
+                results = await send_email_batch_task('welcome', None, jobs, transport=transport)
+
+        assert len(seen) == 1
+        assert [p['to'][0]['email'] for p in seen[0]['personalizations']] == ['a@example.com', 'b@example.com']
+        assert [r['userId'] for r in results] == ['user-1', 'user-2']
+        assert all(r['success'] and r['statusCode'] == 202 for r in results)
+        assert all(r['messageId'] == 'sg-batch-1' for r in results)
+
+    @pytest.mark.asyncio
+    async def test_rejected_batch_falls_back_to_single_sends(self):
+        def handler(request):
+            payload = json.loads(request.content)
+            if len(payload['personalizations']) > 1:
+                return httpx.Response(400, text='bad batch')
+            if payload['personalizations'][0]['to'][0]['email'] == 'bad':
+                return httpx.Response(400, text='invalid email')
+            return httpx.Response(202)
+
+        jobs = [('user-1', 'a@example.com'), ('user-2', 'bad')]
+        with patch.dict(os.environ, {'SENDGRID_API_KEY': 'test-key'}, clear=False):
+            async with make_transport(handler) as transport:
+                results = await send_email_batch_task('welcome', None, jobs, transport=transport)
+
+        assert [r['success'] for r in results] == [True, False]
+        assert 'invalid email' in results[1]['error']
+
+    @pytest.mark.asyncio
+    async def test_provider_failure_fails_every_job(self):
+        def handler(request):
+            return httpx.Response(503, text='unavailable')
+
+        jobs = [('user-1', 'a@example.com'), ('user-2', 'b@example.com')]
+        with patch.dict(os.environ, {'SENDGRID_API_KEY': 'test-key'}, clear=False):
+            async with make_transport(handler) as transport:
+                results = await send_email_batch_task('welcome', None, jobs, transport=transport)
+
+        assert [r['success'] for r in results] == [False, False]
+        assert all('503' in r['error'] for r in results)
+
+
+class TestEmailServiceBatching:
+    @pytest.mark.asyncio
+    async def test_workers_share_provider_requests(self):
+        seen = []
+
+        def handler(request):
+            seen.append(len(json.loads(request.content)['personalizations']))
+            return httpx.Response(202)
+
+        env = {
+            'SENDGRID_API_KEY': 'test-key',
+            'EMAIL_SEND_BATCH_SIZE': '4',
+            'EMAIL_SEND_BATCH_WINDOW_SECONDS': '0.05',
+            'EMAIL_WORKER_CONCURRENCY': '4',
+            'EMAIL_QUEUE_BACKEND': 'memory',
+            'EMAIL_DEDUPE_TTL_SECONDS': '0',
+            'EMAIL_MIN_DELAY_SECONDS': '0',
+        }
+        with patch.dict(os.environ, env, clear=False):
+            service = EmailService()
+            service.sendgrid_transport = make_transport(handler)
+            await service.start()
+            for i in range(4):
+                await service.queue_email(f'user-{i}', f'u{i}@example.com')
+            await service.worker_pool.queue.join()
+            stats = service.stats()
+            await service.stop()
+
+        assert seen == [4]
+        assert stats['sendBatches'] == 1
+        assert service.get_task('task-user-3-u3@example.com').status == 'sent'
+
+    @pytest.mark.asyncio
+    async def test_batches_fill_with_default_worker_count(self):
+        seen = []
+
+        def handler(request):
+            seen.append(len(json.loads(request.content)['personalizations']))
+            return httpx.Response(202)
+
+        env = {
+            'SENDGRID_API_KEY': 'test-key',
+            'EMAIL_SEND_BATCH_SIZE': '10',
+            'EMAIL_SEND_BATCH_WINDOW_SECONDS': '0.05',
+            'EMAIL_QUEUE_BACKEND': 'memory',
+            'EMAIL_DEDUPE_TTL_SECONDS': '0',
+            'EMAIL_MIN_DELAY_SECONDS': '0',
+        }
+        with patch.dict(os.environ, env, clear=False):
+            os.environ.pop('EMAIL_WORKER_CONCURRENCY', None)
+            service = EmailService()
+            service.sendgrid_transport = make_transport(handler)
+            await service.start()
+            for i in range(20):
+                await service.queue_email(f'user-{i}', f'u{i}@example.com')
+            await service.worker_pool.queue.join()
+            stats = service.stats()
+            await service.stop()
+
+        assert seen == [10, 10]
+        assert stats['concurrency'] == 20
@@ -0,0 +1,85 @@
+import pytest
+import sys
+import os
+import json
+from pathlib import Path
+from unittest.mock import patch
+
+import httpx
+
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from services.sendgrid_client import SendGridTransport, SendGridError, build_mail_payload
+from services.email_service import EmailService
+
+
+def make_transport(handler):
+    return SendGridTransport('test-key', base_url='http://sendgrid.test', http_transport=httpx.MockTransport(handler))
+
+
+class TestSendGridTransport:
+    @pytest.mark.asyncio
+    async def test_send_posts_mail_payload(self):
+        seen = []
+
+        def handler(request):
+            seen.append(request)
+            return httpx.Response(202, headers={'X-Message-Id': 'sg-abc'})
+
+        payload = build_mail_payload('noreply@example.com', 'user@example.com', 'Welcome!', '<p>Hi</p>')
+        async with make_transport(handler) as transport:
+            response = await transport.send(payload)
+
+        assert response.status_code == 202
+        assert response.message_id == 'sg-abc'
+        request = seen[0]
+        assert request.url.path == '/v3/mail/send'
+        assert request.headers['Authorization'] == 'Bearer test-key'
+        assert json.loads(request.content) == payload
+
+    @pytest.mark.asyncio
+    async def test_error_status_raises(self):
+        def handler(request):
+            return httpx.Response(429, text='rate limited')
+
+        async with make_transport(handler) as transport:
+            with pytest.raises(SendGridError) as exc_info:
+                await transport.send(build_mail_payload('a@example.com', 'b@example.com', 's', 'c'))
+
+        assert exc_info.value.status_code == 429
+        assert 'rate limited' in str(exc_info.value)
+
+    def test_from_env_reads_pool_settings(self):
+        env = {
+            'SENDGRID_API_BASE_URL': 'http://127.0.0.1:9999',
+            'SENDGRID_MAX_CONNECTIONS': '7',
+        }
+        with patch.dict(os.environ, env, clear=False):
+            transport = SendGridTransport.from_env('test-key')
+
+        assert transport.base_url == 'http://127.0.0.1:9999'
+        assert transport.limits.max_connections == 7
+
+
+class TestEmailServiceTransport:
+    @pytest.mark.asyncio
+    async def test_service_reuses_one_transport(self):
+        with patch('services.email_service.USE_GCP', False):
+            service = EmailService()
+
+        with patch.dict(os.environ, {'SENDGRID_API_KEY': 'test-key'}, clear=False):
+            first = service._get_sendgrid_transport()
+            second = service._get_sendgrid_transport()
+            await service.stop()
+
+        assert first is second
+        assert first.closed
+        assert service.sendgrid_transport is None
+
+    def test_no_transport_without_api_key(self):
+        with patch('services.email_service.USE_GCP', False):
+            service = EmailService()
+
+        with patch.dict(os.environ, {'SENDGRID_API_KEY': ''}, clear=False):
+            assert service._get_sendgrid_transport() is None
@@ -0,0 +1,99 @@
+import pytest
+import sys
+import os
+import json
+import signal
+import sqlite3
+import subprocess
+import time
+import urllib.request
+from pathlib import Path
+
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+import serve
+from benchmarks.stubs import free_port
+
+
+def queued_jobs(path):
+    if not path.exists():
+        return None
+    with sqlite3.connect(str(path)) as db:
+        try:
+            return db.execute('SELECT COUNT(*) FROM email_jobs').fetchone()[0]
+        except sqlite3.OperationalError:
+            return None
+
+
+def wait_for(condition, timeout=20.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if condition():
+                return True
+        except OSError:
+            pass
+        time.sleep(0.1)
+    return False
+
+
+class TestProcessEnv:
+    def test_api_processes_leave_sending_to_email_workers(self):
+        assert serve.process_env('api', {}, 2)['EMAIL_WORKERS_ENABLED'] == 'false'
+        assert serve.process_env('email-worker', {}, 2)['EMAIL_WORKERS_ENABLED'] == 'true'
+
+    def test_api_processes_send_without_email_workers(self):
+        assert 'EMAIL_WORKERS_ENABLED' not in serve.process_env('api', {}, 0)
+
+    def test_unknown_role(self):
+        with pytest.raises(SystemExit):
+            serve.main(['scheduler'])
+
+
+class TestSupervisor:
+    def test_api_and_email_workers_share_the_queue(self, tmp_path):
+        port = free_port()
+        queue_path = tmp_path / 'queue.db'
+        env = {
+            **os.environ,
+            'USE_GCP': 'false',
+            'HOST': '127.0.0.1',
+            'PORT': str(port),
+            'API_WORKERS': '2',
+            'EMAIL_WORKER_PROCESSES': '2',
+            'EMAIL_QUEUE_BACKEND': 'sqlite',
+            'EMAIL_QUEUE_PATH': str(queue_path),
+            'EMAIL_MIN_DELAY_SECONDS': '0',
+            'EMAIL_DEDUPE_TTL_SECONDS': '0',
+            'EMAIL_SHUTDOWN_TIMEOUT_SECONDS': '2',
+            'FIRESTORE_STATUS_UPDATES': 'false',
+            'LOG_DIR': str(tmp_path / 'logs'),
+            'LOG_LEVEL': 'WARNING',
+        }
+        env.pop('SENDGRID_API_KEY', None)
+        env.pop('PROMETHEUS_MULTIPROC_DIR', None)
+        url = f'http://127.0.0.1:{port}'
+        process = subprocess.Popen([sys.executable, 'serve.py'], cwd=backend_dir, env=env,
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.STDOUT)
+        try:
+            assert wait_for(lambda: urllib.request.urlopen(f'{url}/api/ready', timeout=1).status == 200)
+            for i in range(4):
+                request = urllib.request.Request(
+                    f'{url}/api/send-email', data=json.dumps({'userId': f'user-{i}', 'email': f'u{i}@example.com'}).encode(),
+                    headers={'Content-Type': 'application/json'}
+                )
+                assert urllib.request.urlopen(request, timeout=5).status == 202
+
+            assert wait_for(lambda: queued_jobs(queue_path) == 0)
+
+            def sends_reported():
+                metrics = urllib.request.urlopen(f'{url}/metrics', timeout=5).read().decode()
+                return 'email_sends_total{mode="local-simulated",outcome="success"} 4.0' in metrics
+
+            assert wait_for(sends_reported, timeout=5)
+        finally:
+            process.send_signal(signal.SIGTERM)
+            process.wait(timeout=30)
+
+        assert process.returncode == 0
@@ -0,0 +1,125 @@
+import pytest
+import sys
+import os
+from pathlib import Path
+from unittest.mock import patch, AsyncMock
+from fastapi.testclient import TestClient
+
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from services.task_store import TaskStore
+from services.email_service import EmailService
+from routers import email_router
+
+import importlib.util
+app_file = backend_dir / "app.py"
+spec = importlib.util.spec_from_file_location("app_module", app_file)
+app_module = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(app_module)
+
+client = TestClient(app_module.app)
+
+
+class TestTaskStore:
+    def test_queued_task_has_no_outcome(self):
+        store = TaskStore(capacity=10)
+        store.record_queued('task-1', 'user-1', 'user@example.com', 'local')
+
+        result = store.get('task-1')
+        assert result.status == 'queued'
+        assert result.success is None
+        assert result.userId == 'user-1'
+        assert result.queuedAt is not None
+        assert result.completedAt is None
+
+    def test_record_result_marks_sent_or_failed(self):
+        store = TaskStore(capacity=10)
+        store.record_queued('task-1', 'user-1', 'a@example.com', 'local')
+        store.record_queued('task-2', 'user-2', 'b@example.com', 'local')
+        store.record_result('task-1', {'success': True, 'messageId': 'msg-1', 'statusCode': 202,
+                                       'mode': 'local-sendgrid'})
+        store.record_result('task-2', {'success': False, 'error': 'SendGrid returned status 500',
+                                       'statusCode': 500})
+
+        sent = store.get('task-1')
+        assert sent.status == 'sent'
+        assert sent.success is True
+        assert sent.messageId == 'msg-1'
+        assert sent.mode == 'local-sendgrid'
+        assert sent.completedAt is not None
+        failed = store.get('task-2')
+        assert failed.status == 'failed'
+        assert failed.success is False
+        assert failed.error == 'SendGrid returned status 500'
+
+    def test_oldest_tasks_are_evicted_at_capacity(self):
+        store = TaskStore(capacity=3)
+        for i in range(5):
+            store.record_queued(f'task-{i}', f'user-{i}', f'user{i}@example.com', 'local')
+
+        assert len(store) == 3
+        assert store.get('task-0') is None
+        assert store.get('task-1') is None
+        assert store.get('task-4') is not None
+        assert store.stats() == {'tracked': 3, 'capacity': 3, 'evicted': 2}
+
+    def test_requeued_task_does_not_take_another_slot(self):
+        store = TaskStore(capacity=2)
+        store.record_queued('task-1', 'user-1', 'a@example.com', 'local')
+        store.record_result('task-1', {'success': True})
+        store.record_queued('task-1', 'user-1', 'a@example.com', 'local')
+        store.record_queued('task-2', 'user-2', 'b@example.com', 'local')
+
+        assert store.get('task-1').status == 'queued'
+        assert store.get('task-2') is not None
+        assert store.evicted == 0
+
+    def test_result_for_unknown_task_is_ignored(self):
+        store = TaskStore(capacity=2)
+        store.record_result('missing', {'success': True})
+        assert len(store) == 0
+
+    def test_capacity_zero_disables_store(self):
+        with patch.dict(os.environ, {'TASK_STORE_CAPACITY': '0'}, clear=False):
+            assert TaskStore.from_env() is None
+
+
+class TestTaskEndpoint:
+    @pytest.fixture
+    def service(self):
+        with patch('services.email_service.USE_GCP', False):
+            with patch.dict(os.environ, {'EMAIL_MIN_DELAY_SECONDS': '0', 'EMAIL_DEDUPE_TTL_SECONDS': '0'}, clear=False):
+                service = EmailService()
+        with patch.object(email_router, 'email_service', service):
+            yield service
+
+    @pytest.mark.asyncio
+    async def test_local_task_reports_sent_after_worker_runs(self, service):
+        send_result = {'success': True, 'messageId': 'msg-1', 'statusCode': 202, 'mode': 'local-sendgrid'}
+        with patch('services.email_service.send_email_task', AsyncMock(return_value=send_result)):
+            task_id = await service.queue_email('user-1', 'user@example.com')
+            await service.worker_pool.queue.join()
+
+        response = client.get(f'/api/tasks/{task_id}')
+        assert response.status_code == 200
+        data = response.json()
+        assert data['taskId'] == task_id
+        assert data['status'] == 'sent'
+        assert data['success'] is True
+        assert data['messageId'] == 'msg-1'
+        await service.stop()
+
+    def test_unknown_task_returns_404(self, service):
+        response = client.get('/api/tasks/does-not-exist')
+        assert response.status_code == 404
+        assert response.json()['detail'] == 'Task not found'
+
+    def test_gcp_task_name_with_slashes(self, service):
+        task_id = 'projects/test-project/locations/us-central1/queues/test-queue/tasks/email-abc'
+        service.task_store.record_queued(task_id, 'user-1', 'user@example.com', 'gcp')
+
+        response = client.get(f'/api/tasks/{task_id}')
+        assert response.status_code == 200
+        assert response.json()['status'] == 'queued'
+        assert response.json()['mode'] == 'gcp'
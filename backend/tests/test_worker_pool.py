@@ -0,0 +1,135 @@
+import pytest
+import sys
+import os
+import asyncio
+from pathlib import Path
+from unittest.mock import patch
+
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from services.worker_pool import EmailWorkerPool, QueueFullError
+from services.email_service import EmailService
+
+
+class TestEmailWorkerPool:
+    @pytest.mark.asyncio
+    async def test_workers_drain_queue(self):
+        processed = []
+
+        async def handler(user_id, email):
+            processed.append((user_id, email))
+            return {'success': True}
+
+        pool = EmailWorkerPool(handler, concurrency=2, maxsize=10)
+        pool.start()
+        for i in range(5):
+            pool.submit(f'user-{i}', f'user{i}@example.com')
+        await pool.stop(timeout=1)
+
+        assert len(processed) == 5
+        assert pool.processed == 5
+        assert pool.failed == 0
+        assert pool.queue_depth == 0
+        assert not pool.running
+
+    @pytest.mark.asyncio
+    async def test_concurrency_is_bounded(self):
+        active = 0
+        peak = 0
+
+        async def handler(user_id, email):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+            return {'success': True}
+
+        pool = EmailWorkerPool(handler, concurrency=3, maxsize=50)
+        pool.start()
+        for i in range(20):
+            pool.submit(f'user-{i}', 'test@example.com')
+        await pool.stop(timeout=2)
+
+        assert peak == 3
+        assert pool.processed == 20
+
+    @pytest.mark.asyncio
+    async def test_submit_rejects_when_full(self):
+        async def handler(user_id, email):
+            return {'success': True}
+
+        pool = EmailWorkerPool(handler, concurrency=1, maxsize=2)
+        pool.submit('user-1', 'a@example.com')
+        pool.submit('user-2', 'b@example.com')
+
+        with pytest.raises(QueueFullError):
+            pool.submit('user-3', 'c@example.com')
+        assert pool.queue_depth == 2
+
+    @pytest.mark.asyncio
+    async def test_in_flight_and_failure_counters(self):
+        release = asyncio.Event()
+
+        async def handler(user_id, email):
+            await release.wait()
+            if user_id == 'bad':
+                raise RuntimeError('boom')
+            return {'success': user_id != 'soft-fail'}
+
+        pool = EmailWorkerPool(handler, concurrency=3, maxsize=10)
+        pool.start()
+        for user_id in ('ok', 'bad', 'soft-fail'):
+            pool.submit(user_id, 'test@example.com')
+        await asyncio.sleep(0.01)
+
+        assert pool.stats()['inFlight'] == 3
+        assert pool.stats()['queueDepth'] == 0
+
+        release.set()
+        await pool.stop(timeout=1)
+
+        stats = pool.stats()
+        assert stats['inFlight'] == 0
+        assert stats['processed'] == 3
+        assert stats['failed'] == 2
+
+    def test_invalid_concurrency(self):
+        async def handler(user_id, email):
+            return {'success': True}
+
+        with pytest.raises(ValueError):
+            EmailWorkerPool(handler, concurrency=0)
+
+
+class TestEmailServiceWorkers:
+    @pytest.mark.asyncio
+    async def test_local_service_uses_configured_pool(self):
+        with patch('services.email_service.USE_GCP', False):
+            with patch.dict(os.environ, {'EMAIL_WORKER_CONCURRENCY': '2', 'EMAIL_QUEUE_MAXSIZE': '5'}, clear=False):
+                service = EmailService()
+
+        assert service.worker_pool.concurrency == 2
+        assert service.worker_pool.maxsize == 5
+        assert service.stats()['mode'] == 'local'
+
+    @pytest.mark.asyncio
+    async def test_queued_jobs_are_sent_by_workers(self):
+        sent = []
+
+        async def fake_send_email_task(user_id, email, **kwargs):
+            sent.append(user_id)
+            return {'success': True}
+
+        with patch('services.email_service.USE_GCP', False):
+            service = EmailService()
+        with patch('services.email_service.send_email_task', side_effect=fake_send_email_task):
+            with patch.dict(os.environ, {'EMAIL_MIN_DELAY_SECONDS': '0'}, clear=False):
+                await service.start()
+                await service.queue_email('user-1', 'one@example.com')
+                await service.queue_email('user-2', 'two@example.com')
+                await service.stop()
+
+        assert sorted(sent) == ['user-1', 'user-2']
+        assert service.stats()['processed'] == 2
@@ -139,10 +139,12 @@ resource "google_cloudfunctions2_function" "send_email_http" {
   }
 
   service_config {
-    max_instance_count    = 10
-    min_instance_count    = 0
-    available_memory      = "256M"
-    timeout_seconds       = 60
+    max_instance_count               = 10
+    min_instance_count               = 0
+    available_memory                 = "256M"
+    available_cpu                    = "1"
+    max_instance_request_concurrency = var.function_concurrency
+    timeout_seconds                  = 60
     service_account_email = google_service_account.cloud_function_sa.email
     ingress_settings      = "ALLOW_INTERNAL_AND_GCLB"
 
@@ -46,3 +46,8 @@ variable "sendgrid_from_email" {
   default     = "noreply@yourapp.com"
 }
 
+variable "function_concurrency" {
+  description = "Concurrent requests served by one send-email Cloud Function instance (clients are shared per instance)"
+  type        = number
+  default     = 8
+}